@@ -0,0 +1,193 @@
+import heapq
+from bisect import bisect_left
+from itertools import chain
+import numpy as np
+import networkx as nx
+from typing import List, Optional, Sequence, Tuple
+
+
+class CSRGraph:
+    """
+    Directed graph in compressed sparse row form.
+
+    Nodes are integer ids 0..n-1 with a name <-> id mapping; the out-edges of
+    node u are targets[offsets[u]:offsets[u + 1]] (sorted by target id) with
+    matching weights. Edge slots are also addressable by the sorted key
+    u * n + v, so whole batches of (u, v) pairs resolve in one searchsorted.
+    """
+
+    def __init__(self, names: List[str], offsets: np.ndarray, targets: np.ndarray,
+                 weights: Optional[np.ndarray] = None, edge_rows: Optional[np.ndarray] = None):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights if weights is not None else np.ones(len(targets))
+        # Row of the source edge table feeding each slot (last duplicate wins)
+        self.edge_rows = edge_rows
+        self.sources = np.repeat(np.arange(len(names), dtype=np.int64), np.diff(offsets))
+        self.keys = self.sources * len(names) + targets
+        self._adjacency = None
+        self._lists = None
+        self._reversed = None
+
+    @classmethod
+    def from_edges(cls, sources: Sequence[str], targets: Sequence[str],
+                   weights: Optional[Sequence[float]] = None,
+                   names: Optional[List[str]] = None) -> 'CSRGraph':
+        """Build from parallel source/target name sequences (duplicate edges: last wins)"""
+        sources, targets = list(sources), list(targets)
+        if names is None:
+            # Same node order as networkx add_edges_from
+            names = list(dict.fromkeys(chain.from_iterable(zip(sources, targets))))
+        ids = {name: i for i, name in enumerate(names)}
+        n = len(names)
+
+        u = np.fromiter((ids[s] for s in sources), dtype=np.int64, count=len(sources))
+        v = np.fromiter((ids[t] for t in targets), dtype=np.int64, count=len(targets))
+        rows = np.arange(len(u))
+
+        # Keep the last occurrence of each (u, v) pair, sorted by key
+        keys = u * n + v
+        unique_keys, first_in_reversed = np.unique(keys[::-1], return_index=True)
+        rows = rows[::-1][first_in_reversed]
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u[rows], minlength=n), out=offsets[1:])
+
+        edge_weights = None
+        if weights is not None:
+            edge_weights = np.asarray(weights, dtype=float)[rows]
+        return cls(names, offsets, v[rows], edge_weights, edge_rows=rows)
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.targets)
+
+    def with_weights(self, row_weights: np.ndarray) -> 'CSRGraph':
+        """Same topology with weights given per row of the source edge table"""
+        weighted = CSRGraph.__new__(CSRGraph)
+        weighted.__dict__.update(self.__dict__)
+        weighted.weights = np.asarray(row_weights, dtype=float)[self.edge_rows]
+        weighted._adjacency = None
+        weighted._lists = None
+        weighted._reversed = None
+        return weighted
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.targets, minlength=len(self.names))
+
+    def start_nodes(self) -> List[int]:
+        """Node ids with no incoming edges"""
+        return np.flatnonzero(self.in_degree() == 0).tolist()
+
+    def as_lists(self) -> Tuple[List[int], List[int], List[float]]:
+        """offsets/targets/weights as plain lists for scalar Python loops"""
+        if self._lists is None:
+            self._lists = (self.offsets.tolist(), self.targets.tolist(), self.weights.tolist())
+        return self._lists
+
+    def adjacency(self) -> List[List[Tuple[int, float]]]:
+        """Out-edge lists as plain Python data for scalar search loops"""
+        if self._adjacency is None:
+            offsets, targets, weights = self.as_lists()
+            self._adjacency = [
+                list(zip(targets[offsets[u]:offsets[u + 1]], weights[offsets[u]:offsets[u + 1]]))
+                for u in range(len(self.names))
+            ]
+        return self._adjacency
+
+    def edge_slots(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Slot of each (u, v) id pair, or -1 where the edge does not exist"""
+        keys = np.asarray(u, dtype=np.int64) * len(self.names) + np.asarray(v, dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys)
+        pos = np.minimum(pos, max(len(self.keys) - 1, 0))
+        found = (len(self.keys) > 0) & (self.keys[pos] == keys)
+        return np.where(found, pos, -1)
+
+    def path_ids(self, path: Sequence[str]) -> Optional[np.ndarray]:
+        ids = [self.ids.get(name) for name in path]
+        if any(i is None for i in ids):
+            return None
+        return np.asarray(ids, dtype=np.int64)
+
+    def path_slots(self, path: Sequence[str]) -> Optional[np.ndarray]:
+        """Edge slots along a named path, or None if any step is not an edge"""
+        ids = self.path_ids(path)
+        if ids is None:
+            return None
+        slots = self.edge_slots(ids[:-1], ids[1:])
+        if (slots < 0).any():
+            return None
+        return slots
+
+    def path_cost(self, path: Sequence[str]) -> float:
+        """Total weight of a named path (inf if it leaves the graph)"""
+        offsets, targets, weights = self.as_lists()
+        ids = self.ids
+        cost = 0
+        u = ids.get(path[0]) if path else None
+        for name in path[1:]:
+            v = ids.get(name)
+            if u is None or v is None:
+                return float('inf')
+            # Binary search within u's sorted out-edges
+            end = offsets[u + 1]
+            i = bisect_left(targets, v, offsets[u], end)
+            if i == end or targets[i] != v:
+                return float('inf')
+            cost += weights[i]
+            u = v
+        return cost
+
+    def reverse(self) -> 'CSRGraph':
+        """Graph with every edge flipped, keeping weights (built once)"""
+        if self._reversed is None:
+            self._reversed = self._build_reverse()
+        return self._reversed
+
+    def _build_reverse(self) -> 'CSRGraph':
+        n = len(self.names)
+        order = np.lexsort((self.sources, self.targets))
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.targets, minlength=n), out=offsets[1:])
+        edge_rows = self.edge_rows[order] if self.edge_rows is not None else None
+        return CSRGraph(self.names, offsets, self.sources[order], self.weights[order], edge_rows)
+
+    def dijkstra(self, source: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Single-source shortest paths; returns (dist, pred) arrays, pred -1 = none"""
+        n = len(self.names)
+        adjacency = self.adjacency()
+        dist = [float('inf')] * n
+        pred = [-1] * n
+        done = [False] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            for v, w in adjacency[u]:
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+
+        return np.asarray(dist), np.asarray(pred, dtype=np.int64)
+
+    def to_networkx(self) -> nx.DiGraph:
+        """Weighted networkx view for code that needs the networkx API"""
+        G = nx.DiGraph()
+        G.add_nodes_from(self.names)
+        names = self.names
+        G.add_weighted_edges_from(
+            (names[u], names[v], w)
+            for u, v, w in zip(self.sources.tolist(), self.targets.tolist(), self.weights.tolist()))
+        return G
@@ -0,0 +1,95 @@
+import networkx as nx
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+from .csr_graph import CSRGraph
+
+
+class GraphCycleError(ValueError):
+    """Raised when a disassembly graph that must be a DAG contains a cycle"""
+
+    def __init__(self, cycle: List[Tuple[str, str]]):
+        self.cycle = cycle
+        chain = ' -> '.join([u for u, _ in cycle] + [cycle[-1][1]]) if cycle else ''
+        super().__init__(f"Disassembly graph contains a cycle: {chain}")
+
+
+def topological_order(graph: CSRGraph) -> List[int]:
+    """Kahn's algorithm over node ids; raises GraphCycleError with one offending cycle"""
+    in_degree = graph.in_degree().tolist()
+    offsets, targets, _ = graph.as_lists()
+    queue = deque(i for i, d in enumerate(in_degree) if d == 0)
+    order = []
+
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        for v in targets[offsets[u]:offsets[u + 1]]:
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                queue.append(v)
+
+    if len(order) < len(in_degree):
+        # Every node left over sits on or behind a cycle
+        remaining = [graph.names[i] for i, d in enumerate(in_degree) if d > 0]
+        G = graph.to_networkx().subgraph(remaining)
+        raise GraphCycleError(list(nx.find_cycle(G)))
+
+    return order
+
+
+class DagShortestPaths:
+    """
+    Optimal removal chain and cost for every component of a weighted
+    precedence DAG, computed with one topological-order sweep.
+    Every start node (no incoming edges) is a source with cost 0.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        self.order = topological_order(graph)
+        n = graph.number_of_nodes
+        inf = float('inf')
+        dist = [inf] * n
+        pred = [-1] * n
+
+        for u in graph.start_nodes():
+            dist[u] = 0
+
+        # Relax edges in topological order: O(V + E)
+        adjacency = graph.adjacency()
+        for u in self.order:
+            du = dist[u]
+            if du == inf:
+                continue
+            for v, w in adjacency[u]:
+                cost = du + w
+                if cost < dist[v]:
+                    dist[v] = cost
+                    pred[v] = u
+
+        self.dist = dist
+        self.pred = pred
+
+    def cost(self, target: str) -> Optional[float]:
+        i = self.graph.ids.get(target)
+        if i is None or self.dist[i] == float('inf'):
+            return None
+        return self.dist[i]
+
+    def path(self, target: str) -> List[str]:
+        """Optimal start-to-target removal chain"""
+        if self.cost(target) is None:
+            raise ValueError("No valid disassembly paths found")
+
+        i = self.graph.ids[target]
+        path = [i]
+        while self.pred[path[-1]] != -1:
+            path.append(self.pred[path[-1]])
+        path.reverse()
+        return [self.graph.names[i] for i in path]
+
+    def all_targets(self) -> Dict[str, Dict[str, Any]]:
+        """Cost and removal chain for every reachable component"""
+        names = self.graph.names
+        return {names[i]: {'cost': self.dist[i], 'path': self.path(names[i])}
+                for i in self.order if self.dist[i] != float('inf')}
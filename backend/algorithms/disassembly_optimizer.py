@@ -1,23 +1,71 @@
 import pandas as pd
+import numpy as np
 import networkx as nx
 import time
 import math
-import copy
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Tuple, Set
+from .product_graph import ProductGraph
+from .csr_graph import CSRGraph
+from .dag_shortest_path import DagShortestPaths
+from .fitness import PathFitness
+from .island_ga import run_islands, MAX_ISLANDS
+from .path_listing import PathLister
+from .termination import StoppingCriteria
+from .hashing import canonical_hash
+from .timing import PhaseTimer, timed
+
+# Parameters that change edge weights (everything else only steers the search)
+WEIGHT_PARAMETERS = ('default_weight', 'component_safety')
+
+# component_properties fields each cost model reads: the kettle's are keyed
+# by edge ('from->to'), every other product's by the edge's target component
+KETTLE_PROPERTIES = ('safety_risk', 'fastener', 'tool', 'fastener_count')
+COMPONENT_PROPERTIES = ('safety_risk', 'disassembly_tools')
+
+# Number of solved weight configurations kept for the DAG engine
+DAG_CACHE_SIZE = 32
+
+# Number of weighted graphs (one per product and weight configuration) kept
+WEIGHTS_CACHE_SIZE = 32
+
+# Number of path listers (one per product and weight configuration) kept
+PATH_LISTERS_CACHE_SIZE = 8
+
+
+def weight_properties(product_id: str, graph: ProductGraph) -> Tuple[str, Tuple[str, ...], Set[str]]:
+    """
+    What a product's cost model reads from component_properties:
+    ('edge' or 'component', the fields it reads, the keys it looks up)
+    """
+    if product_id == 'kettle':
+        keys = set(graph.edges_df['from'] + '->' + graph.edges_df['to'])
+        return 'edge', KETTLE_PROPERTIES, keys
+    return 'component', COMPONENT_PROPERTIES, set(graph.edges_df['to'])
 
 
 class DisassemblyOptimizer:
     """
-    Disassembly optimization using Dijkstra and Genetic Algorithms
+    Disassembly optimization using Dijkstra, DAG dynamic programming and
+    Genetic Algorithms
     Adapted from the ALGORITHMS file
     """
 
     def __init__(self):
         self.optimization_history = []
-
-    def optimize(self, product_id: str, graph_data: Any, target_parts: List[str], parameters: Dict[str, Any], component_properties: Dict[str, Any] = None) -> Dict[str, Any]:
+        self._dag_cache = OrderedDict()
+        self._weights_cache = OrderedDict()
+        self._listers_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def optimize(self, product_id: str, graph_data: Any, target_parts: List[str], parameters: Dict[str, Any], component_properties: Dict[str, Any] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
         """
-        Optimize disassembly path using Dijkstra or Genetic Algorithm
+        Optimize disassembly path using Dijkstra, DAG or Genetic Algorithm
         
         Args:
             product_id: Product identifier (kettle, gearbox)
@@ -25,167 +73,230 @@ class DisassemblyOptimizer:
             target_parts: List of parts to disassemble (target component)
             parameters: Optimization parameters including algorithm type
             component_properties: User-defined properties for components/edges
+            progress_callback: Called with a progress dict as the GA advances
+            should_stop: Polled by the GA; returning True cancels the run
+            timer: Records seconds per phase and graph size gauges
         
         Returns:
             Dictionary with optimized path, sequence, and metrics
         """
 
-        # Extract CSV data
-        if isinstance(graph_data, dict) and 'csv_data' in graph_data:
-            edges_df = pd.DataFrame(graph_data['csv_data'])
-        elif isinstance(graph_data, list):
-            edges_df = pd.DataFrame(graph_data)
-        else:
-            # Convert graph format to DataFrame
-            edges_df = self._graph_to_dataframe(graph_data)
-
-        # Clean data
-        edges_df['from'] = edges_df['from'].astype(str).str.strip()
-        edges_df['to'] = edges_df['to'].astype(str).str.strip()
+        graph = self._compile_graph(product_id, graph_data, timer)
+        G_topology = graph.topology
+        if timer is not None:
+            timer.gauge('node_count', G_topology.number_of_nodes())
+            timer.gauge('edge_count', G_topology.number_of_edges())
 
         # Get target part (use first one if multiple)
         target = target_parts[0] if target_parts else None
         if not target:
             raise ValueError("No target part specified")
 
-        # Build topology graph
-        G_topology = nx.DiGraph()
-        for _, row in edges_df.iterrows():
-            G_topology.add_edge(row['from'], row['to'])
-
         # Validate target
         if target not in G_topology.nodes:
             raise ValueError(f"Target '{target}' not found in graph")
 
-        # Find start nodes (nodes with no incoming edges)
-        start_nodes = [
-            n for n in G_topology.nodes if G_topology.in_degree(n) == 0]
+        start_nodes = graph.start_nodes
 
         if not start_nodes:
             raise ValueError("No start nodes found in graph")
 
-        # Enumerate all valid paths
-        all_paths = []
-        for start in start_nodes:
-            try:
-                all_paths.extend(nx.all_simple_paths(
-                    G_topology, start, target))
-            except nx.NetworkXNoPath:
-                pass
-
-        if not all_paths:
-            raise ValueError("No valid disassembly paths found")
-
         # Get algorithm type from parameters (default: dijkstra)
         algorithm = parameters.get('algorithm', 'dijkstra')
 
         if algorithm == 'genetic':
+            # Checked before the (possibly long) path enumeration
+            islands = int(parameters.get('islands', 1))
+            if not 1 <= islands <= MAX_ISLANDS:
+                raise ValueError(f'islands must be between 1 and {MAX_ISLANDS}')
+            with timed(timer, 'enumeration'):
+                all_paths = self._enumerate_paths(G_topology, start_nodes, target)
+            if timer is not None:
+                timer.gauge('path_count', len(all_paths))
             result = self._genetic_algorithm(
-                product_id, edges_df, G_topology, all_paths, target, start_nodes, parameters, component_properties
+                product_id, graph, all_paths, target, start_nodes, parameters, component_properties,
+                progress_callback, should_stop, timer
+            )
+        elif algorithm == 'dag':
+            result = self._dag_algorithm(
+                product_id, graph, target, parameters, component_properties, timer
             )
         else:
+            # Dijkstra never needs the path enumeration
             result = self._dijkstra_algorithm(
-                product_id, edges_df, G_topology, all_paths, target, start_nodes, parameters, component_properties
+                product_id, graph, target, start_nodes, parameters, component_properties, timer
             )
         
         return result
 
+    def optimize_batch(self, product_id: str, graph_data: Any, scenarios: List[Dict[str, Any]],
+                       max_workers: int = 1) -> List[Dict[str, Any]]:
+        """
+        Optimize many (target, parameters, component_properties) scenarios
+        against one graph
+
+        The graph is compiled once and scenarios are grouped by weight
+        configuration, so each distinct set of edge weights is built once and
+        shared by every target in its group. Groups run on up to
+        `max_workers` threads. Results come back in scenario order; a
+        scenario that fails validation gets {'error': ...} in its slot.
+        """
+        graph = self._compile_graph(product_id, graph_data)
+
+        groups = OrderedDict()
+        for index, scenario in enumerate(scenarios):
+            key = self._weight_config_key(
+                scenario.get('parameters', {}), scenario.get('component_properties'))
+            groups.setdefault(key, []).append(index)
+
+        results = [None] * len(scenarios)
+
+        def solve_group(indices):
+            for index in indices:
+                scenario = scenarios[index]
+                try:
+                    results[index] = self.optimize(
+                        product_id, graph, scenario.get('target_parts', []),
+                        scenario.get('parameters', {}), scenario.get('component_properties'))
+                except ValueError as e:
+                    results[index] = {
+                        'error': str(e),
+                        'target_parts': scenario.get('target_parts', [])
+                    }
+
+        if max_workers > 1 and len(groups) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+                list(executor.map(solve_group, groups.values()))
+        else:
+            for indices in groups.values():
+                solve_group(indices)
+
+        return results
+
+    def weighted_graph(self, product_id: str, graph_data: Any, parameters: Dict[str, Any] = None,
+                       component_properties: Dict[str, Any] = None) -> CSRGraph:
+        """The product graph in CSR form with the edge weights optimize() would use"""
+        graph = self._compile_graph(product_id, graph_data)
+        return self._weighted_graph(product_id, graph, parameters or {}, component_properties)
+
+    def path_lister(self, product_id: str, graph_data: Any, parameters: Dict[str, Any] = None,
+                    component_properties: Dict[str, Any] = None) -> PathLister:
+        """
+        Cost-ordered path listing under these weights, shared by every page
+        request for the same graph version and weight configuration
+        """
+        graph = self._compile_graph(product_id, graph_data)
+        parameters = parameters or {}
+        key = (product_id, graph.fingerprint,
+               self._weight_config_key(parameters, component_properties))
+        lister = self._cache_get(self._listers_cache, key)
+        if lister is None:
+            weighted = self._weighted_graph(product_id, graph, parameters, component_properties)
+            lister = PathLister(weighted.to_networkx(), graph.start_nodes)
+            self._cache_put(self._listers_cache, key, lister, PATH_LISTERS_CACHE_SIZE)
+        return lister
+
+    def _compile_graph(self, product_id: str, graph_data: Any,
+                       timer: Optional[PhaseTimer] = None) -> ProductGraph:
+        """Reuse a compiled graph as-is, otherwise compile the raw graph data"""
+        if isinstance(graph_data, ProductGraph):
+            return graph_data
+        return ProductGraph(product_id, self._graph_data_to_dataframe(graph_data), timer=timer)
+
+    def _enumerate_paths(self, G_topology: nx.DiGraph, start_nodes: List[str], target: str) -> List[List[str]]:
+        """Enumerate all valid paths from the start nodes to the target"""
+        all_paths = []
+        for start in start_nodes:
+            try:
+                all_paths.extend(nx.all_simple_paths(
+                    G_topology, start, target))
+            except nx.NetworkXNoPath:
+                pass
+
+        if not all_paths:
+            raise ValueError("No valid disassembly paths found")
+        return all_paths
+
+    def _graph_data_to_dataframe(self, graph_data: Any) -> pd.DataFrame:
+        """Extract the edge table from CSV records, an edge list or nodes/edges"""
+        if isinstance(graph_data, dict) and 'csv_data' in graph_data:
+            return pd.DataFrame(graph_data['csv_data'])
+        elif isinstance(graph_data, list):
+            return pd.DataFrame(graph_data)
+        # Convert graph format to DataFrame
+        return self._graph_to_dataframe(graph_data)
+
     def _graph_to_dataframe(self, graph_data: Dict) -> pd.DataFrame:
-        """Convert graph format (nodes/edges) to DataFrame"""
+        """
+        Convert graph format (nodes/edges) to DataFrame. Edge attributes may
+        be top-level fields or nested under 'properties' (Neo4j edges); both
+        end up as columns next to the source/target part names.
+        """
         if 'edges' in graph_data:
-            edges = graph_data['edges']
             df_data = []
-            for edge in edges:
-                df_data.append({
-                    'from': edge.get('source', ''),
-                    'to': edge.get('target', ''),
-                    'safety_risk': edge.get('safety_risk', ''),
-                    'fastener': edge.get('fastener', ''),
-                    'tool': edge.get('tool', ''),
-                    'fastener_count': edge.get('fastener_count', 0)
-                })
-            return pd.DataFrame(df_data)
+            for edge in graph_data['edges']:
+                row = dict(edge.get('properties') or {})
+                row.update({key: value for key, value in edge.items()
+                            if key not in ('source', 'target', 'type', 'properties')})
+                row['from'] = edge.get('source', edge.get('from', ''))
+                row['to'] = edge.get('target', edge.get('to', ''))
+                df_data.append(row)
+            return pd.DataFrame(df_data, columns=None if df_data else ['from', 'to'])
         return pd.DataFrame()
 
-    def _dijkstra_algorithm(self, product_id: str, edges_df: pd.DataFrame, 
-                           G_topology: nx.DiGraph, all_paths: List[List[str]],
-                           target: str, start_nodes: List[str], 
-                           parameters: Dict[str, Any], component_properties: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _dijkstra_algorithm(self, product_id: str, graph: ProductGraph,
+                           target: str, start_nodes: List[str],
+                           parameters: Dict[str, Any], component_properties: Dict[str, Any] = None,
+                           timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
         """Dijkstra algorithm for disassembly optimization"""
 
         # Compute edge weights based on product type
-        if product_id == 'kettle':
-            G = self._build_weighted_graph_kettle(
-                edges_df, all_paths, parameters, component_properties)
-        else:  # gearbox
-            G = self._build_weighted_graph_gearbox(
-                edges_df, all_paths, parameters, component_properties)
-
-        # Run Dijkstra
-        best_path = None
-        best_cost = float('inf')
-
-        for start in start_nodes:
-            if start not in G:
-                continue
-            try:
-                path = nx.dijkstra_path(G, start, target, weight='weight')
-                cost = nx.dijkstra_path_length(
-                    G, start, target, weight='weight')
-
+        G = self._weighted_graph(
+            product_id, graph, parameters, component_properties, timer)
+
+        with timed(timer, 'search'):
+            # One search from the target over reversed edges gives the cost from
+            # every start node at once; predecessors lead back towards the target
+            dist, pred = G.reverse().dijkstra(G.ids[target])
+
+            best_start = None
+            best_cost = float('inf')
+            for start in start_nodes:
+                cost = dist[G.ids[start]]
                 if cost < best_cost:
-                    best_cost = cost
-                    best_path = path
-            except nx.NetworkXNoPath:
-                pass
+                    best_cost = float(cost)
+                    best_start = G.ids[start]
 
-        if not best_path:
-            raise ValueError("No path found to target")
+            if best_start is None:
+                raise ValueError("No valid disassembly paths found")
 
-        # Build result
-        optimal_path = []
-        for i, part in enumerate(best_path):
-            optimal_path.append({
-                'step': i + 1,
-                'part_id': part,
-                'part_name': part,
-                'action': 'disassemble'
-            })
+            best_path = [best_start]
+            while pred[best_path[-1]] != -1:
+                best_path.append(int(pred[best_path[-1]]))
+            best_path = [G.names[i] for i in best_path]
 
-        return {
-            'product_id': product_id,
-            'target_parts': [target],
-            'optimal_path': optimal_path,
-            'sequence': best_path,
-            'metrics': {
-                'total_time': best_cost,
-                'total_cost': best_cost,
-                'average_difficulty': best_cost / len(best_path) if best_path else 0,
-                'number_of_steps': len(best_path),
-                'efficiency_score': 1.0 / best_cost if best_cost > 0 else 0,
-                'algorithm': 'dijkstra'
-            },
-            'animation_steps': self._generate_animation_steps(best_path)
-        }
+        return self._build_result(product_id, target, best_path, best_cost, {
+            'algorithm': 'dijkstra'
+        }, timer)
 
-    def _genetic_algorithm(self, product_id: str, edges_df: pd.DataFrame,
-                          G_topology: nx.DiGraph, all_paths: List[List[str]],
+    def _genetic_algorithm(self, product_id: str, graph: ProductGraph,
+                          all_paths: List[List[str]],
                           target: str, start_nodes: List[str],
-                          parameters: Dict[str, Any], component_properties: Dict[str, Any] = None) -> Dict[str, Any]:
+                          parameters: Dict[str, Any], component_properties: Dict[str, Any] = None,
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          should_stop: Optional[Callable[[], bool]] = None,
+                          timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
         """Genetic algorithm for disassembly optimization"""
 
         # Build weighted graph
-        if product_id == 'kettle':
-            G = self._build_weighted_graph_kettle(
-                edges_df, all_paths, parameters, component_properties)
-        else:  # gearbox
-            G = self._build_weighted_graph_gearbox(
-                edges_df, all_paths, parameters, component_properties)
+        G = self._weighted_graph(
+            product_id, graph, parameters, component_properties, timer)
 
         # GA parameters
         retain = parameters.get('retain', 0.5)
         mutation_rate = parameters.get('mutation_rate', 0.2)
         generations = parameters.get('generations', 30)
+        progress_interval = max(1, int(parameters.get('progress_interval', 1)))
 
         # Population size
         avg_path_length = int(sum(len(p) for p in all_paths) / len(all_paths))
@@ -208,35 +319,174 @@ class DisassemblyOptimizer:
             population.append(all_paths[idx % len(all_paths)])
             idx += 1
 
+        # Island model: sub-populations evolved in a process pool
+        islands = int(parameters.get('islands', 1))
+        if islands > 1:
+            return self._island_genetic_algorithm(
+                product_id, G, all_paths, target, population_size, parameters,
+                progress_callback, should_stop, timer)
+
         best_overall = None
         best_cost = float('inf')
 
+        # Path costs are memoized and evaluated a population at a time
+        fitness = PathFitness(G)
+
         # GA main loop
         start_time = time.time()
+        criteria = StoppingCriteria.from_parameters(parameters, start_time)
+        best_generation = None
+        generations_run = 0
+        termination_reason = 'generations'
 
         for gen in range(generations):
             # Selection
-            population = self._select_population(population, G, retain)
+            population = self._select_population(population, fitness, retain)
 
             # Mutation
             population = self._mutate_population(
                 population, all_paths, mutation_rate, gen)
 
             # Evaluate
-            for path in population:
-                cost = self._path_cost(path, G)
-                if cost < best_cost:
-                    best_cost = cost
-                    best_overall = path
+            costs = fitness.costs(population)
+            i = int(np.argmin(costs))
+            if costs[i] < best_cost:
+                best_cost = float(costs[i])
+                best_overall = list(population[i])
+                best_generation = gen
+
+            generations_run = gen + 1
+
+            # Stopping criteria
+            if should_stop and should_stop():
+                reason = 'cancelled'
+            else:
+                reason = criteria.check(gen, best_cost, best_generation)
+
+            # Progress every progress_interval generations and on the last one
+            if progress_callback and (reason or generations_run % progress_interval == 0):
+                progress_callback({
+                    'generation': generations_run,
+                    'generations': generations,
+                    'best_cost': best_cost,
+                    'best_path': best_overall,
+                    'diversity': len(set(map(tuple, population))) / len(population),
+                    'elapsed': time.time() - start_time
+                })
+            if reason:
+                termination_reason = reason
+                break
 
         elapsed_time = time.time() - start_time
+        if timer is not None:
+            timer.record('search', elapsed_time)
 
         if not best_overall:
             raise ValueError("No solution found")
 
-        # Build result
+        return self._build_result(product_id, target, best_overall, best_cost, {
+            'algorithm': 'genetic',
+            'generations': generations,
+            'generations_run': generations_run,
+            'termination_reason': termination_reason,
+            'best_generation': best_generation,
+            'execution_time': elapsed_time,
+            'fitness_evaluations': fitness.evaluations,
+            'evaluations_saved': fitness.cache_hits
+        }, timer)
+
+    def _island_genetic_algorithm(self, product_id: str, G: CSRGraph, all_paths: List[List[str]],
+                                  target: str, population_size: int,
+                                  parameters: Dict[str, Any],
+                                  progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                  should_stop: Optional[Callable[[], bool]] = None,
+                                  timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
+        """Island-model genetic algorithm with periodic ring migration"""
+        generations = parameters.get('generations', 30)
+        islands = int(parameters.get('islands', 1))
+        workers = parameters.get('workers')
+
+        start_time = time.time()
+        result = run_islands(
+            G, all_paths, population_size,
+            criteria=StoppingCriteria.from_parameters(parameters, start_time),
+            retain=parameters.get('retain', 0.5),
+            mutation_rate=parameters.get('mutation_rate', 0.2),
+            islands=islands,
+            migration_interval=int(parameters.get('migration_interval', 5)),
+            workers=int(workers) if workers is not None else None,
+            seed=int(parameters.get('seed', 0)),
+            progress_callback=progress_callback,
+            progress_interval=max(1, int(parameters.get('progress_interval', 1))),
+            should_stop=should_stop)
+        elapsed_time = time.time() - start_time
+        if timer is not None:
+            timer.record('search', elapsed_time)
+
+        if not result['best_path']:
+            raise ValueError("No solution found")
+
+        return self._build_result(product_id, target, result['best_path'], result['best_cost'], {
+            'algorithm': 'genetic',
+            'generations': generations,
+            'generations_run': result['generations_run'],
+            'termination_reason': result['termination_reason'],
+            'best_generation': result['best_generation'],
+            'execution_time': elapsed_time,
+            'fitness_evaluations': result['evaluations'],
+            'evaluations_saved': result['cache_hits'],
+            'islands': islands,
+            'workers': result['workers'],
+            'migrations': result['migrations'],
+            'best_island': result['best_island']
+        }, timer)
+
+    def _dag_algorithm(self, product_id: str, graph: ProductGraph, target: str,
+                       parameters: Dict[str, Any], component_properties: Dict[str, Any] = None,
+                       timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
+        """DAG dynamic programming: one sweep solves every target, then lookups"""
+
+        key = (product_id, graph.fingerprint,
+               self._weight_config_key(parameters, component_properties))
+
+        solution = self._cache_get(self._dag_cache, key)
+        cache_hit = solution is not None
+        if not cache_hit:
+            G = self._weighted_graph(
+                product_id, graph, parameters, component_properties, timer)
+            with timed(timer, 'search'):
+                # Raises GraphCycleError (a ValueError) if the graph is not a DAG
+                solution = DagShortestPaths(G)
+            self._cache_put(self._dag_cache, key, solution, DAG_CACHE_SIZE)
+
+        with timed(timer, 'search'):
+            best_path = solution.path(target)
+            best_cost = solution.cost(target)
+
+        return self._build_result(product_id, target, best_path, best_cost, {
+            'algorithm': 'dag',
+            'acyclic': True,
+            'cache_hit': cache_hit
+        }, timer)
+
+    def _weight_config_key(self, parameters: Dict[str, Any], component_properties: Dict[str, Any] = None) -> str:
+        """Canonical hash of everything that determines the edge weights"""
+        return canonical_hash({
+            'parameters': {k: parameters.get(k) for k in WEIGHT_PARAMETERS},
+            'component_properties': component_properties or {}
+        })
+
+    def _build_result(self, product_id: str, target: str, best_path: List[str],
+                      best_cost: float, extra_metrics: Dict[str, Any],
+                      timer: Optional[PhaseTimer] = None) -> Dict[str, Any]:
+        """Build the optimization response for a chosen path"""
+        with timed(timer, 'serialisation'):
+            return self._result_document(product_id, target, best_path, best_cost, extra_metrics)
+
+    def _result_document(self, product_id: str, target: str, best_path: List[str],
+                         best_cost: float, extra_metrics: Dict[str, Any]) -> Dict[str, Any]:
         optimal_path = []
-        for i, part in enumerate(best_overall):
+        for i, part in enumerate(best_path):
             optimal_path.append({
                 'step': i + 1,
                 'part_id': part,
@@ -248,25 +498,62 @@ class DisassemblyOptimizer:
             'product_id': product_id,
             'target_parts': [target],
             'optimal_path': optimal_path,
-            'sequence': best_overall,
+            'sequence': best_path,
             'metrics': {
                 'total_time': best_cost,
                 'total_cost': best_cost,
-                'average_difficulty': best_cost / len(best_overall) if best_overall else 0,
-                'number_of_steps': len(best_overall),
+                'average_difficulty': best_cost / len(best_path) if best_path else 0,
+                'number_of_steps': len(best_path),
                 'efficiency_score': 1.0 / best_cost if best_cost > 0 else 0,
-                'algorithm': 'genetic',
-                'generations': generations,
-                'execution_time': elapsed_time
+                **extra_metrics
             },
-            'animation_steps': self._generate_animation_steps(best_overall)
+            'animation_steps': self._generate_animation_steps(best_path)
         }
 
-    def _build_weighted_graph_kettle(self, edges_df: pd.DataFrame, 
-                                     all_paths: List[List[str]],
-                                     parameters: Dict[str, Any],
-                                     component_properties: Dict[str, Any] = None) -> nx.DiGraph:
-        """Build weighted graph for kettle using CSV data or defaults"""
+    def _weighted_graph(self, product_id: str, graph: ProductGraph,
+                        parameters: Dict[str, Any],
+                        component_properties: Dict[str, Any] = None,
+                        timer: Optional[PhaseTimer] = None) -> CSRGraph:
+        """Product topology in CSR form with this request's edge weights"""
+        with timed(timer, 'weights'):
+            key = (product_id, graph.fingerprint,
+                   self._weight_config_key(parameters, component_properties))
+            weighted = self._cache_get(self._weights_cache, key)
+            if weighted is None:
+                weights = self._edge_weights(
+                    product_id, graph.edges_df, parameters, component_properties)
+                weighted = graph.csr.with_weights(weights)
+                self._cache_put(self._weights_cache, key, weighted, WEIGHTS_CACHE_SIZE)
+        return weighted
+
+    def _cache_get(self, cache: OrderedDict, key: Any) -> Any:
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key: Any, value: Any, max_size: int):
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+
+    def _edge_weights(self, product_id: str, edges_df: pd.DataFrame,
+                      parameters: Dict[str, Any],
+                      component_properties: Dict[str, Any] = None) -> np.ndarray:
+        """Per-edge weights with the product's cost model"""
+        if product_id == 'kettle':
+            return self._kettle_edge_weights(
+                edges_df, parameters, component_properties)
+        # gearbox
+        return self._gearbox_edge_weights(
+            edges_df, parameters, component_properties)
+
+    def _kettle_edge_weights(self, edges_df: pd.DataFrame, parameters: Dict[str, Any],
+                             component_properties: Dict[str, Any] = None) -> np.ndarray:
+        """Per-edge kettle weights, computed column-wise"""
 
         # Mapping dictionaries
         safety_map = {"Low": 1, "Medium": 2, "High": 3,
@@ -276,98 +563,82 @@ class DisassemblyOptimizer:
         tool_map = {"Hand": 1, "Pull": 1.5, "Philips screwdriver": 2, "Wire cutter": 3,
                     "hand": 1, "pull": 1.5, "philips screwdriver": 2, "wire cutter": 2}
 
-        def fastener_count_penalty(count):
-            if pd.isna(count) or count == 0:
-                return 1
-            count = int(count)
-            if count <= 2:
-                return 1
-            elif count <= 4:
-                return 2
-            else:
-                return 3
-
-        # Build graph
-        G = nx.DiGraph()
-        edge_weights = {}
-
         # Use component_properties if provided (from user input)
         if component_properties:
-            for _, row in edges_df.iterrows():
-                u, v = row['from'], row['to']
-                edge_key = f"{u}->{v}"
-                
-                # Get properties from user input
-                edge_props = component_properties.get(edge_key, {})
-                
-                safety_str = str(edge_props.get('safety_risk', 'Medium')).strip()
-                safety = safety_map.get(safety_str, 2)
-                
-                fastener_str = str(edge_props.get('fastener', 'Screws')).strip()
-                fastener = fastener_map.get(fastener_str, 2)
-                
-                tool_str = str(edge_props.get('tool', 'Hand')).strip()
-                tool = tool_map.get(tool_str, 1)
-                
-                count_penalty = fastener_count_penalty(edge_props.get('fastener_count', 2))
-                
-                weight = safety + fastener + tool + count_penalty
-                G.add_edge(u, v, weight=weight)
+            edge_keys = edges_df['from'] + '->' + edges_df['to']
+            props = pd.DataFrame.from_records(
+                [component_properties.get(key, {}) for key in edge_keys],
+                index=edges_df.index)
         # Use CSV data if available (kettle has safety_risk, fastener, tool, fastener_count)
         elif 'safety_risk' in edges_df.columns:
-            for _, row in edges_df.iterrows():
-                u, v = row['from'], row['to']
-                safety_str = str(row.get('safety_risk', 'Medium')).strip()
-                safety = safety_map.get(safety_str, 2)
-
-                fastener_str = str(row.get('fastener', 'Screws')).strip()
-                fastener = fastener_map.get(fastener_str, 2)
-
-                tool_str = str(row.get('tool', 'Hand')).strip()
-                tool = tool_map.get(tool_str, 1)
-
-                count_penalty = fastener_count_penalty(
-                    row.get('fastener_count', 2))
-
-                weight = safety + fastener + tool + count_penalty
-                edge_weights[(u, v)] = weight
-                G.add_edge(u, v, weight=weight)
+            props = edges_df
         else:
             # Use default weights if CSV doesn't have the data
-            for _, row in edges_df.iterrows():
-                u, v = row['from'], row['to']
-                # Default weights
-                weight = parameters.get('default_weight', 2.0)
-                G.add_edge(u, v, weight=weight)
-
-        return G
-
-    def _build_weighted_graph_gearbox(self, edges_df: pd.DataFrame,
-                                     all_paths: List[List[str]],
-                                     parameters: Dict[str, Any],
-                                     component_properties: Dict[str, Any] = None) -> nx.DiGraph:
-        """Build weighted graph for gearbox using component safety and rule-based costs"""
+            return np.full(len(edges_df), parameters.get('default_weight', 2.0), dtype=float)
+
+        def column(name):
+            if name in props.columns:
+                return props[name]
+            return pd.Series(None, index=props.index, dtype=object)
+
+        # Missing and unknown values fall back to the defaults
+        # (Medium / Screws / Hand / 2 fasteners)
+        safety = self._category_costs(column('safety_risk'), safety_map, 2)
+        fastener = self._category_costs(column('fastener'), fastener_map, 2)
+        tool = self._category_costs(column('tool'), tool_map, 1)
+        count_penalty = self._fastener_count_penalty(column('fastener_count'))
+
+        return safety + fastener + tool + count_penalty
+
+    def _category_costs(self, values: pd.Series, mapping: Dict[str, float], default: float) -> np.ndarray:
+        """Map a categorical column to costs, looking up each distinct value once"""
+        codes, uniques = pd.factorize(values)
+        costs = np.array([mapping.get(str(u).strip(), default) for u in uniques] + [default],
+                         dtype=float)
+        # Missing values have code -1, which picks the trailing default
+        return costs[codes]
+
+    def _fastener_count_penalty(self, counts: pd.Series) -> np.ndarray:
+        """Binned fastener count penalty: 0-2 -> 1, 3-4 -> 2, 5+ -> 3"""
+        counts = pd.to_numeric(counts, errors='coerce').to_numpy(dtype=float)
+        whole = np.trunc(counts)
+        return np.select(
+            [np.isnan(counts) | (counts == 0), whole <= 2, whole <= 4],
+            [1.0, 1.0, 2.0],
+            default=3.0)
+
+    def _gearbox_edge_weights(self, edges_df: pd.DataFrame, parameters: Dict[str, Any],
+                              component_properties: Dict[str, Any] = None) -> np.ndarray:
+        """Per-edge gearbox weights, computed column-wise on the target component"""
 
         # Get component safety from component_properties (user input) or parameters
-        component_safety = {}
         default_safety = {"Low": 1, "Medium": 2, "High": 3}
-        
+        component_safety = {}
+        component_tools = {}
+
         if component_properties:
-            # Extract safety from component_properties (gearbox uses component names as keys)
+            # Gearbox uses component names as keys
             for comp_name, props in component_properties.items():
-                if isinstance(props, dict) and 'safety_risk' in props:
-                    safety_val = props['safety_risk']
-                    if isinstance(safety_val, str):
-                        component_safety[comp_name] = default_safety.get(safety_val, 2)
-                    else:
-                        component_safety[comp_name] = safety_val
+                if not isinstance(props, dict):
+                    continue
+                if 'safety_risk' in props:
+                    component_safety[comp_name] = props['safety_risk']
+                if 'disassembly_tools' in props:
+                    component_tools[comp_name] = props['disassembly_tools']
         else:
             # Fallback to parameters
             component_safety = parameters.get('component_safety', {})
 
+        def safety_value(value):
+            if isinstance(value, str):
+                return default_safety.get(value, 2)
+            return value
+
         def tool_cost(tools):
-            if pd.isna(tools) or not tools:
+            if tools is None or not tools:
                 return 1
+            if isinstance(tools, (list, tuple)):
+                tools = ' '.join(str(t) for t in tools)
             tools = str(tools).lower()
             if "pull" in tools:
                 return 2
@@ -383,56 +654,37 @@ class DisassemblyOptimizer:
                 return 2
             return 1
 
-        # Build graph
-        G = nx.DiGraph()
-
-        # Get component tools from component_properties if provided
-        component_tools = {}
-        if component_properties:
-            for comp_name, props in component_properties.items():
-                if isinstance(props, dict) and 'disassembly_tools' in props:
-                    component_tools[comp_name] = props['disassembly_tools']
-
-        for _, row in edges_df.iterrows():
-            u, v = row['from'], row['to']
-
-            # Get safety for target component
-            safety_val = component_safety.get(v, 2)  # Default to Medium
-            if isinstance(safety_val, str):
-                safety = default_safety.get(safety_val, 2)
-            else:
-                safety = safety_val
-
-            # Get tool cost - prefer user input, then CSV, then default
-            tool_str = None
-            if component_tools and v in component_tools:
-                tool_str = component_tools[v]
-            else:
-                tool_str = row.get('disassembly_tools', None)
-            tool = tool_cost(tool_str)
+        # Every cost depends only on the target component, so evaluate the
+        # rules once per distinct component and gather them per edge
+        codes, components = pd.factorize(edges_df['to'])
 
-            # Get fastener cost
-            fastener = fastener_count_cost(v)
+        # Safety for target component (default to Medium)
+        safety = np.array([safety_value(component_safety.get(v, 2)) for v in components],
+                          dtype=float)
 
-            weight = safety + tool + fastener
-            G.add_edge(u, v, weight=weight)
+        # Tool cost - prefer user input, then CSV, then default
+        if 'disassembly_tools' in edges_df.columns:
+            csv_tools = edges_df['disassembly_tools'].where(
+                edges_df['disassembly_tools'].notna(), None).to_numpy(dtype=object)
+        else:
+            csv_tools = np.full(len(edges_df), None, dtype=object)
+        user_tools = np.array([tool_cost(component_tools[v]) if v in component_tools else np.nan
+                               for v in components], dtype=float)[codes]
+        tool_codes, tool_values = pd.factorize(csv_tools)
+        csv_tool_costs = np.array([tool_cost(t) for t in tool_values] + [1],
+                                  dtype=float)[tool_codes]
+        tool = np.where(np.isnan(user_tools), csv_tool_costs, user_tools)
 
-        return G
+        # Name-based fastener cost
+        fastener = np.array([fastener_count_cost(v) for v in components], dtype=float)
 
-    def _path_cost(self, path: List[str], G: nx.DiGraph) -> float:
-        """Calculate total cost of a path"""
-        cost = 0
-        for i in range(len(path) - 1):
-            if not G.has_edge(path[i], path[i + 1]):
-                return float('inf')
-            cost += G[path[i]][path[i + 1]]['weight']
-        return cost
+        return safety[codes] + tool + fastener[codes]
 
-    def _select_population(self, population: List[List[str]], G: nx.DiGraph, retain: float) -> List[List[str]]:
+    def _select_population(self, population: List[List[str]], fitness: PathFitness, retain: float) -> List[List[str]]:
         """Select top retain% of population based on cost"""
-        population = sorted(population, key=lambda p: self._path_cost(p, G))
+        order = np.argsort(fitness.costs(population), kind='stable')
         retain_length = max(1, int(len(population) * retain))
-        return population[:retain_length]
+        return [population[i] for i in order[:retain_length]]
 
     def _mutate_population(self, population: List[List[str]], all_paths: List[List[str]],
                            mutation_rate: float, generation: int) -> List[List[str]]:
@@ -441,12 +693,15 @@ class DisassemblyOptimizer:
             return population
 
         mutation_interval = max(1, int(1 / mutation_rate))
-        new_population = copy.deepcopy(population)
+        if generation % mutation_interval != 0:
+            return population
 
-        if generation % mutation_interval == 0:
-            for i in range(len(new_population)):
-                new_population[i] = all_paths[(
-                    generation + i) % len(all_paths)]
+        # Paths are never modified in place, so mutated slots just point at
+        # the replacement path and untouched ones are shared
+        new_population = list(population)
+        for i in range(len(new_population)):
+            new_population[i] = all_paths[(
+                generation + i) % len(all_paths)]
 
         return new_population
 
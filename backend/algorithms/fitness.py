@@ -0,0 +1,75 @@
+import numpy as np
+from collections import OrderedDict
+from typing import List, Sequence
+from .csr_graph import CSRGraph
+
+
+class PathFitness:
+    """
+    Memoized path costs over a weighted CSRGraph.
+
+    Costs are cached per path (tuple key, LRU bounded). Cache misses for a
+    whole population are resolved together: paths become a padded id matrix,
+    edges resolve to CSR slots in one searchsorted and the costs are a single
+    gather-and-sum over the edge-weight table.
+    """
+
+    def __init__(self, graph: CSRGraph, cache_size: int = 4096):
+        self.graph = graph
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.evaluations = 0
+        self.cache_hits = 0
+
+        # Edge weights plus two sentinels: padding (0) and missing edge (inf)
+        self._pad_slot = len(graph.weights)
+        self._missing_slot = len(graph.weights) + 1
+        self._table = np.concatenate([graph.weights, [0.0, float('inf')]])
+
+    def cost(self, path: Sequence[str]) -> float:
+        return float(self.costs([path])[0])
+
+    def costs(self, population: List[Sequence[str]]) -> np.ndarray:
+        """Cost of every path in the population"""
+        keys = [tuple(path) for path in population]
+        cache = self._cache
+
+        missing = [key for key in dict.fromkeys(keys) if key not in cache]
+        if missing:
+            for key, cost in zip(missing, self._evaluate(missing)):
+                cache[key] = cost
+            self.evaluations += len(missing)
+
+        costs = np.empty(len(keys))
+        for i, key in enumerate(keys):
+            costs[i] = cache[key]
+            cache.move_to_end(key)
+        self.cache_hits += len(keys) - len(missing)
+
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return costs
+
+    def _evaluate(self, paths: List[tuple]) -> np.ndarray:
+        """Batched cost of distinct paths: one gather over the weight table"""
+        graph = self.graph
+        width = max(len(path) for path in paths)
+        if width < 2:
+            return np.zeros(len(paths))
+
+        ids = np.full((len(paths), width), -1, dtype=np.int64)
+        unknown = np.zeros(len(paths), dtype=bool)
+        for row, path in enumerate(paths):
+            path_ids = [graph.ids.get(name, -1) for name in path]
+            unknown[row] = -1 in path_ids
+            ids[row, :len(path_ids)] = path_ids
+
+        u, v = ids[:, :-1], ids[:, 1:]
+        padding = v < 0
+        slots = graph.edge_slots(np.maximum(u, 0), np.maximum(v, 0))
+        slots = np.where(slots < 0, self._missing_slot, slots)
+        slots = np.where(padding, self._pad_slot, slots)
+
+        costs = self._table[slots].sum(axis=1)
+        costs[unknown] = float('inf')
+        return costs
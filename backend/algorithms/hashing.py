@@ -0,0 +1,10 @@
+import hashlib
+import json
+from typing import Any
+
+
+def canonical_hash(value: Any) -> str:
+    """Stable hash of a JSON-like value, independent of dict key order"""
+    payload = json.dumps(value, sort_keys=True,
+                         separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,206 @@
+import os
+import time
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable
+from .csr_graph import CSRGraph
+from .fitness import PathFitness
+from .process_pool import PoolRun, clamp_workers
+from .termination import StoppingCriteria
+
+# Most islands one optimisation may ask for
+MAX_ISLANDS = int(os.environ.get('MAX_ISLANDS', 16))
+
+
+def _make_state(graph: CSRGraph, all_paths: List[List[str]]) -> Dict[str, Any]:
+    return {'fitness': PathFitness(graph), 'all_paths': all_paths}
+
+
+def _evolve_islands(state: Dict[str, Any], island_args: List[tuple]) -> List[Dict[str, Any]]:
+    """One pool task: _evolve_island for each of a group of islands"""
+    return [_evolve_island(*args, state=state) for args in island_args]
+
+
+def _evolve_island(population: List[int], order: List[int], start_gen: int, end_gen: int,
+                   retain: float, mutation_rate: float, criteria: StoppingCriteria,
+                   state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one island for generations [start_gen, end_gen), stopping early on
+    the time budget or target cost (stalls are judged across islands).
+    Individuals are indices into all_paths; `order` is the island's own
+    permutation of all_paths that mutation draws replacements from.
+    """
+    fitness = state['fitness']
+    all_paths = state['all_paths']
+    evaluations, cache_hits = fitness.evaluations, fitness.cache_hits
+
+    best_index = None
+    best_cost = float('inf')
+    best_generation = None
+    stop_reason = None
+    last_generation = start_gen - 1
+    mutation_interval = max(1, int(1 / mutation_rate)) if mutation_rate > 0 else None
+
+    for gen in range(start_gen, end_gen):
+        # Selection
+        costs = fitness.costs([all_paths[i] for i in population])
+        ranked = np.argsort(costs, kind='stable')
+        retain_length = max(1, int(len(population) * retain))
+        population = [population[i] for i in ranked[:retain_length]]
+
+        # Mutation (same deterministic schedule as the single-population GA)
+        if mutation_interval and gen % mutation_interval == 0:
+            population = [order[(gen + i) % len(order)] for i in range(len(population))]
+
+        # Evaluate
+        costs = fitness.costs([all_paths[i] for i in population])
+        i = int(np.argmin(costs))
+        if costs[i] < best_cost:
+            best_cost = float(costs[i])
+            best_index = population[i]
+            best_generation = gen
+
+        last_generation = gen
+        stop_reason = criteria.hard_stop(best_cost)
+        if stop_reason:
+            break
+
+    return {
+        'population': population,
+        'best_index': best_index,
+        'best_cost': best_cost,
+        'best_generation': best_generation,
+        'last_generation': last_generation,
+        'stop_reason': stop_reason,
+        'evaluations': fitness.evaluations - evaluations,
+        'cache_hits': fitness.cache_hits - cache_hits
+    }
+
+
+def run_islands(graph: CSRGraph, all_paths: List[List[str]], population_size: int,
+                criteria: StoppingCriteria, retain: float, mutation_rate: float,
+                islands: int, migration_interval: int, workers: int = None,
+                seed: int = 0,
+                progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                progress_interval: int = 1,
+                should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+    """
+    Island-model GA: `islands` sub-populations evolve independently (split
+    into `workers` groups on the shared process pool when workers > 1) and
+    every `migration_interval` generations each island's best individual
+    migrates to the next island in a ring. Results depend only on the seed
+    and island count, not on the number of workers (unless a time budget
+    cuts the run short).
+    """
+    if not 1 <= islands <= MAX_ISLANDS:
+        raise ValueError(f'islands must be between 1 and {MAX_ISLANDS}')
+    generations = criteria.generations
+    start_time = time.time()
+    workers = clamp_workers(workers, islands)
+    migration_interval = max(1, migration_interval)
+
+    # Seeded initial populations and mutation orders per island
+    orders = []
+    populations = []
+    for island in range(islands):
+        rng = random.Random(seed * 1000003 + island)
+        order = list(range(len(all_paths)))
+        rng.shuffle(order)
+        orders.append(order)
+        populations.append([order[i % len(order)] for i in range(population_size)])
+
+    best = (float('inf'), islands, generations, None)  # (cost, island, generation, index)
+    evaluations = 0
+    cache_hits = 0
+    migrations = 0
+    generations_run = 0
+    termination_reason = 'generations'
+
+    run = None
+    inline_state = None
+    if workers > 1:
+        run = PoolRun(_make_state, graph, all_paths)
+    else:
+        inline_state = _make_state(graph, all_paths)
+
+    for start_gen in range(0, generations, migration_interval):
+        end_gen = min(start_gen + migration_interval, generations)
+        args = [(populations[i], orders[i], start_gen, end_gen, retain, mutation_rate, criteria)
+                for i in range(islands)]
+        if run:
+            # Islands in `workers` contiguous groups, results back in island order
+            groups = [(args[i * islands // workers:(i + 1) * islands // workers],)
+                      for i in range(workers)]
+            results = [r for group in run.map(_evolve_islands, groups) for r in group]
+        else:
+            results = _evolve_islands(inline_state, args)
+
+        for island, result in enumerate(results):
+            populations[island] = result['population']
+            evaluations += result['evaluations']
+            cache_hits += result['cache_hits']
+            if result['best_index'] is not None:
+                candidate = (result['best_cost'], island,
+                             result['best_generation'], result['best_index'])
+                if candidate[:3] < best[:3]:
+                    best = candidate
+
+        previous_run = generations_run
+        last_generation = max(r['last_generation'] for r in results)
+        generations_run = last_generation + 1
+
+        # Stopping criteria, judged on the best across all islands
+        if should_stop and should_stop():
+            reason = 'cancelled'
+        else:
+            reason = next((r['stop_reason'] for r in results if r['stop_reason']), None)
+            reason = reason or criteria.check(last_generation, best[0], best[2] if best[3] is not None else None)
+
+        # Progress once per block that crosses a progress_interval boundary
+        if progress_callback and (
+                reason or generations_run // progress_interval > previous_run // progress_interval):
+            members = [i for population in populations for i in population]
+            progress_callback({
+                'generation': generations_run,
+                'generations': generations,
+                'best_cost': best[0],
+                'best_path': list(all_paths[best[3]]) if best[3] is not None else None,
+                'diversity': len(set(members)) / len(members),
+                'elapsed': time.time() - start_time
+            })
+        if reason:
+            termination_reason = reason
+            break
+
+        # Ring migration of each island's best surviving individual
+        if islands > 1:
+            migrants = [_best_individual(populations[i], all_paths, graph)
+                        for i in range(islands)]
+            for island in range(islands):
+                migrant = migrants[(island - 1) % islands]
+                if migrant not in populations[island]:
+                    populations[island] = populations[island] + [migrant]
+                    migrations += 1
+
+    if run:
+        run.close()
+
+    best_cost, best_island, best_generation, best_index = best
+    return {
+        'best_path': list(all_paths[best_index]) if best_index is not None else None,
+        'best_cost': best_cost,
+        'best_island': best_island,
+        'best_generation': best_generation if best_index is not None else None,
+        'generations_run': generations_run,
+        'termination_reason': termination_reason,
+        'evaluations': evaluations,
+        'cache_hits': cache_hits,
+        'migrations': migrations,
+        'workers': workers
+    }
+
+
+def _best_individual(population: List[int], all_paths: List[List[str]], graph: CSRGraph) -> int:
+    """Cheapest individual of a population (first one on ties)"""
+    costs = [graph.path_cost(all_paths[i]) for i in population]
+    return population[int(np.argmin(costs))]
@@ -0,0 +1,175 @@
+import itertools
+import threading
+import networkx as nx
+from collections import OrderedDict
+from typing import List, Tuple, Set
+
+# Counting simple paths through a cycle needs a search; stop it here
+COUNT_LIMIT = 100000
+
+# Targets whose path listings a PathLister keeps for later pages
+LISTED_TARGETS = 16
+
+# Virtual node feeding every start node with a 0-weight edge
+_SOURCE = ('__source__',)
+
+
+def involved_subgraph(topology: nx.DiGraph, start_nodes: List[str],
+                      target: str) -> Tuple[Set[str], List[Tuple[str, str]]]:
+    """
+    Components and edges that lie on at least one simple start-to-target
+    path, found without enumerating the paths. Returns (nodes, edges); both
+    are empty when the target cannot be reached.
+
+    An edge u -> v qualifies when u is reachable from a start without
+    passing the target and v is an ancestor of the target. That is exact
+    unless u and v share a cycle, where the two halves might have to reuse
+    a node; those few edges are confirmed by a search.
+    """
+    ancestors = nx.ancestors(topology, target)
+    reachable = set()
+    frontier = [s for s in start_nodes if s != target]
+    reachable.update(frontier)
+    while frontier:
+        node = frontier.pop()
+        for successor in topology.successors(node):
+            if successor not in reachable and successor != target:
+                reachable.add(successor)
+                frontier.append(successor)
+
+    candidates = [(u, v) for u, v in topology.edges
+                  if u in reachable and u in ancestors and (v in ancestors or v == target)]
+    if not candidates:
+        return ({target}, []) if target in start_nodes else (set(), [])
+
+    component = {}
+    for index, members in enumerate(nx.strongly_connected_components(topology)):
+        for node in members:
+            component[node] = index
+
+    nodes = reachable & ancestors
+    nodes.add(target)
+    sub = topology.subgraph(nodes)
+    starts = [s for s in start_nodes if s in nodes and s != target]
+    edges = [(u, v) for u, v in candidates
+             if component[u] != component[v] or _on_simple_path(sub, starts, u, v, target)]
+
+    on_paths = {node for edge in edges for node in edge}
+    if target in start_nodes:
+        # The target alone is a (zero-step) path
+        on_paths.add(target)
+    return on_paths, edges
+
+
+def _on_simple_path(sub: nx.DiGraph, starts: List[str], u: str, v: str, target: str) -> bool:
+    """Is there a simple start -> ... -> u -> v -> ... -> target path?"""
+    tails = itertools.islice(nx.all_simple_paths(sub, v, target), COUNT_LIMIT)
+    for tail in itertools.chain([[v]] if v == target else [], tails):
+        if u in tail:
+            continue
+        blocked = set(tail) | {target}
+        allowed = sub.subgraph(n for n in sub if n not in blocked)
+        if any(s in allowed and (s == u or nx.has_path(allowed, s, u)) for s in starts):
+            return True
+    return False
+
+
+def count_paths(topology: nx.DiGraph, start_nodes: List[str], target: str,
+                limit: int = COUNT_LIMIT) -> Tuple[int, bool]:
+    """
+    Number of simple start-to-target paths, as (count, exact).
+
+    Acyclic graphs use a DP over the involved subgraph in topological order.
+    If that subgraph has a cycle the paths are counted by search instead,
+    stopping at `limit` (exact is False when the limit was hit).
+    """
+    nodes, edges = involved_subgraph(topology, start_nodes, target)
+    if not nodes:
+        return 0, True
+    sub = nx.DiGraph(edges)
+    sub.add_nodes_from(nodes)
+    starts = set(start_nodes) & nodes
+
+    try:
+        order = list(nx.topological_sort(sub))
+    except nx.NetworkXUnfeasible:
+        return _count_by_search(sub, starts, target, limit)
+
+    ways = dict.fromkeys(order, 0)
+    for node in order:
+        if node in starts:
+            ways[node] += 1
+        for successor in sub.successors(node):
+            ways[successor] += ways[node]
+    return ways[target], True
+
+
+def _count_by_search(sub: nx.DiGraph, starts: Set[str], target: str,
+                     limit: int) -> Tuple[int, bool]:
+    paths = itertools.chain.from_iterable(
+        nx.all_simple_paths(sub, start, target) for start in sorted(starts))
+    count = sum(1 for _ in itertools.islice(paths, limit + 1))
+    return min(count, limit), count <= limit
+
+
+class PathLister:
+    """
+    Start-to-target paths of one weighted graph in increasing cost order
+    (Yen's algorithm, from a virtual source joined to every start node).
+    Each target's generator is kept with the paths it has produced, so the
+    next page continues where the last one stopped instead of starting
+    over. Listings of the `max_targets` most recently paged targets are kept.
+    """
+
+    def __init__(self, weighted: nx.DiGraph, start_nodes: List[str],
+                 max_targets: int = LISTED_TARGETS):
+        self._graph = weighted.copy()
+        self._graph.add_weighted_edges_from((_SOURCE, start, 0.0) for start in start_nodes)
+        self.max_targets = max_targets
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(self, target: str, offset: int = 0,
+             limit: int = 10) -> Tuple[List[Tuple[List[str], float]], bool]:
+        """
+        Paths [offset, offset + limit) as ([(path, cost), ...], has_more).
+        At most offset + limit + 1 paths are ever generated for a target.
+        """
+        with self._lock:
+            listing = self._listings.get(target)
+            if listing is None:
+                listing = self._listings[target] = _Listing(self._graph, target)
+                while len(self._listings) > self.max_targets:
+                    self._listings.popitem(last=False)
+            else:
+                self._listings.move_to_end(target)
+
+        paths = listing.paths(offset + limit + 1)
+        return paths[offset:offset + limit], len(paths) > offset + limit
+
+
+class _Listing:
+    """One target's paths generated so far, and the generator for the rest"""
+
+    def __init__(self, G: nx.DiGraph, target: str):
+        self._graph = G
+        self._generator = nx.shortest_simple_paths(G, _SOURCE, target, weight='weight')
+        self._paths = []
+        self._lock = threading.Lock()
+
+    def paths(self, count: int) -> List[Tuple[List[str], float]]:
+        """The `count` cheapest paths (fewer if there are no more)"""
+        with self._lock:
+            if self._generator is not None and len(self._paths) < count:
+                G = self._graph
+                try:
+                    for path in itertools.islice(self._generator, count - len(self._paths)):
+                        path = path[1:]
+                        cost = sum(G[u][v]['weight'] for u, v in zip(path, path[1:]))
+                        self._paths.append((path, float(cost)))
+                except nx.NetworkXNoPath:
+                    self._generator = None
+                if len(self._paths) < count:
+                    # Every path has been listed
+                    self._generator = None
+            return self._paths[:count]
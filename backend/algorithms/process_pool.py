@@ -0,0 +1,115 @@
+import os
+import pickle
+import weakref
+import tempfile
+import threading
+from itertools import repeat
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Any, Callable, Iterable
+
+# Processes in this server process's pool (never more than there are CPUs).
+# Under gunicorn every worker process has its own pool, started on first use.
+POOL_WORKERS = max(1, min(int(os.environ.get('POOL_WORKERS', os.cpu_count() or 1)),
+                          os.cpu_count() or 1))
+
+# Run states each pool process keeps, for requests that interleave
+STATE_CACHE_SIZE = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# In pool processes: run payload path -> state built by that run's build function
+_states = OrderedDict()
+
+
+def _forget_pool():
+    # A forked child must not use its parent's pool
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def clamp_workers(workers: int, tasks: int) -> int:
+    """Processes a run may use: what it asked for (default all), at most POOL_WORKERS and one per task"""
+    if workers is None:
+        workers = POOL_WORKERS
+    return max(1, min(int(workers), POOL_WORKERS, tasks))
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared process pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+        return _pool
+
+
+def _discard(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next run starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _call(fn: Callable, path: str, task: tuple):
+    state = _states.get(path)
+    if state is None:
+        # First task of this run in this process: load the run's payload
+        with open(path, 'rb') as f:
+            build, args = pickle.load(f)
+        state = _states[path] = build(*args)
+        while len(_states) > STATE_CACHE_SIZE:
+            _states.popitem(last=False)
+    else:
+        _states.move_to_end(path)
+    return fn(state, *task)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class PoolRun:
+    """
+    One request's tasks on the shared pool. The state every task needs
+    (graph, paths, ...) is pickled once, to a temporary file; tasks carry
+    only its path. Each pool process reads the file on its first task of
+    the run, builds the state with build(*args) and reuses it for the
+    run's later tasks. The file is removed by close() (or when the run is
+    garbage collected).
+    """
+
+    def __init__(self, build: Callable[..., Any], *args):
+        fd, self.path = tempfile.mkstemp(prefix='pool-run-', suffix='.pickle')
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((build, args), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def map(self, fn: Callable[..., Any], tasks: Iterable[tuple]) -> List[Any]:
+        """[fn(state, *task) for task in tasks], run across the pool"""
+        pool = get_pool()
+        try:
+            return list(pool.map(_call, repeat(fn), repeat(self.path), tasks))
+        except BrokenProcessPool:
+            _discard(pool)
+            raise
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
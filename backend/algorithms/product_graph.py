@@ -0,0 +1,121 @@
+import pandas as pd
+import networkx as nx
+from typing import Dict, Any, Optional
+from .hashing import canonical_hash
+from .csr_graph import CSRGraph
+from .reachability import ReachabilityIndex
+from .timing import PhaseTimer, timed
+
+
+# Edge attribute columns that feed the weight builders
+TEXT_COLUMNS = ['safety_risk', 'fastener', 'tool', 'disassembly_tools']
+NUMERIC_COLUMNS = ['fastener_count']
+
+
+def clean_edges(edges_df: pd.DataFrame) -> pd.DataFrame:
+    """Strip node names and normalise the weight columns of an edge table"""
+    if 'from' not in edges_df.columns or 'to' not in edges_df.columns:
+        raise ValueError('CSV must have "from" and "to" columns')
+
+    edges_df = edges_df.copy()
+    edges_df['from'] = edges_df['from'].astype(str).str.strip()
+    edges_df['to'] = edges_df['to'].astype(str).str.strip()
+
+    # Weight-ready columns: text attributes stripped once, counts numeric
+    for column in TEXT_COLUMNS:
+        if column in edges_df.columns:
+            stripped = edges_df[column].astype(str).str.strip()
+            edges_df[column] = stripped.where(edges_df[column].notna(), None)
+    for column in NUMERIC_COLUMNS:
+        if column in edges_df.columns:
+            edges_df[column] = pd.to_numeric(edges_df[column], errors='coerce')
+
+    return edges_df.reset_index(drop=True)
+
+
+class ProductGraph:
+    """
+    Compiled form of a product's disassembly graph: the cleaned edge table,
+    the topology graph and its start nodes. Built once and shared read-only
+    by every request for the same graph version.
+    """
+
+    def __init__(self, product_id: str, edges_df: pd.DataFrame, version: Any = None,
+                 timer: Optional[PhaseTimer] = None):
+        self.product_id = product_id
+        self.version = version
+        with timed(timer, 'cleaning'):
+            self.edges_df = clean_edges(edges_df)
+
+        with timed(timer, 'topology'):
+            # Build topology graph
+            self.topology = nx.DiGraph()
+            self.topology.add_edges_from(
+                zip(self.edges_df['from'], self.edges_df['to']))
+
+            # Start nodes (nodes with no incoming edges)
+            self.start_nodes = [
+                n for n in self.topology.nodes if self.topology.in_degree(n) == 0]
+
+        self.records = self.edges_df.astype(object).where(
+            self.edges_df.notna(), None).to_dict('records')
+        self._graph_payload = None
+        self._fingerprint = None
+        self._csr = None
+        self._reachability = None
+
+    @property
+    def csr(self) -> CSRGraph:
+        """Array-backed topology, built once; weights are attached per request"""
+        if self._csr is None:
+            self._csr = CSRGraph.from_edges(
+                self.edges_df['from'], self.edges_df['to'], names=list(self.topology.nodes))
+        return self._csr
+
+    @property
+    def reachability(self) -> ReachabilityIndex:
+        """Ancestor index answering which components/edges lead to a target"""
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self.topology, self.start_nodes)
+        return self._reachability
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of the cleaned edge table"""
+        if self._fingerprint is None:
+            self._fingerprint = canonical_hash(self.records)
+        return self._fingerprint
+
+    @property
+    def has_edge_properties(self) -> bool:
+        return 'safety_risk' in self.edges_df.columns
+
+    def graph_payload(self) -> Dict[str, Any]:
+        """Nodes/edges/csv_data structure served by the graph endpoint"""
+        if self._graph_payload is None:
+            columns = self.edges_df.columns
+            nodes = [{'id': node, 'label': node} for node in self.topology.nodes]
+            edges = []
+            for record in self.records:
+                edge = {
+                    'source': record['from'],
+                    'target': record['to'],
+                    'type': 'disassembles_to'
+                }
+                # Add additional properties if they exist in CSV
+                if 'safety_risk' in columns:
+                    edge['safety_risk'] = record.get('safety_risk') or ''
+                if 'fastener' in columns:
+                    edge['fastener'] = record.get('fastener') or ''
+                if 'tool' in columns:
+                    edge['tool'] = record.get('tool') or ''
+                if 'fastener_count' in columns:
+                    edge['fastener_count'] = record.get('fastener_count') or 0
+                edges.append(edge)
+
+            self._graph_payload = {
+                'nodes': nodes,
+                'edges': edges,
+                'csv_data': self.records  # Include raw CSV for algorithm
+            }
+        return self._graph_payload
@@ -0,0 +1,88 @@
+import networkx as nx
+from typing import List, Tuple
+from . import path_listing
+
+
+def _bits(mask: int):
+    """Indices of the set bits of mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ReachabilityIndex:
+    """
+    Ancestor bitsets over a product topology, built once per compiled graph.
+
+    Bit i of ancestors[v] is set when node i can reach v. In an acyclic
+    region the components on some start-to-target path are exactly the
+    target's ancestors, so the involved node/edge sets are a lookup.
+    Targets whose ancestry touches a cycle fall back to the exact search in
+    path_listing. Answers are memoised per target.
+    """
+
+    def __init__(self, topology: nx.DiGraph, start_nodes: List[str]):
+        self.topology = topology
+        self.start_nodes = list(start_nodes)
+        self.names = list(topology.nodes)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        # Propagate ancestor sets along the condensation's topological order
+        condensation = nx.condensation(topology)
+        members = {c: 0 for c in condensation.nodes}
+        for name, c in condensation.graph['mapping'].items():
+            members[c] |= 1 << self.ids[name]
+        ancestors = {}
+        for c in nx.topological_sort(condensation):
+            mask = 0
+            for p in condensation.predecessors(c):
+                mask |= ancestors[p] | members[p]
+            ancestors[c] = mask
+
+        # Nodes on a cycle (including self-loops) need the exact search
+        self.cyclic = 0
+        for c, mask in members.items():
+            if mask & (mask - 1):
+                self.cyclic |= mask
+        for u, v in nx.selfloop_edges(topology):
+            self.cyclic |= 1 << self.ids[u]
+
+        mapping = condensation.graph['mapping']
+        self.ancestors = [ancestors[mapping[name]] |
+                          (members[mapping[name]] if (self.cyclic >> i) & 1 else 0)
+                          for i, name in enumerate(self.names)]
+        self._involved = {}
+        self._counts = {}
+
+    def involved(self, target: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Sorted (components, edges) on at least one start-to-target path"""
+        result = self._involved.get(target)
+        if result is not None:
+            return result
+
+        i = self.ids[target]
+        mask = self.ancestors[i]
+        if (mask | 1 << i) & self.cyclic:
+            nodes, edges = path_listing.involved_subgraph(
+                self.topology, self.start_nodes, target)
+            result = (sorted(nodes), sorted(edges))
+        else:
+            if mask or target in self.start_nodes:
+                mask |= 1 << i
+            nodes = [self.names[j] for j in _bits(mask)]
+            edges = [(u, v) for v in nodes for u in self.topology.predecessors(v)
+                     if (mask >> self.ids[u]) & 1]
+            result = (sorted(nodes), sorted(edges))
+
+        self._involved[target] = result
+        return result
+
+    def count_paths(self, target: str) -> Tuple[int, bool]:
+        """Memoised (count, exact) of start-to-target paths"""
+        result = self._counts.get(target)
+        if result is None:
+            result = self._counts[target] = path_listing.count_paths(
+                self.topology, self.start_nodes, target)
+        return result
+
@@ -0,0 +1,198 @@
+import random
+import itertools
+from typing import List, Dict, Any, Tuple
+from .product_graph import ProductGraph
+from .disassembly_optimizer import DisassemblyOptimizer, weight_properties
+from .process_pool import PoolRun, clamp_workers
+
+# Sweeps only use the deterministic optimisers
+SWEEP_ALGORITHMS = ('dijkstra', 'dag')
+
+
+def _make_state(product_id: str, graph: ProductGraph, target: str,
+                parameters: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'optimizer': DisassemblyOptimizer(),
+        'product_id': product_id,
+        'graph': graph,
+        'target': target,
+        'parameters': parameters
+    }
+
+
+def _evaluate_chunk(state: Dict[str, Any],
+                    scenarios: List[Dict[str, Any]]) -> List[Tuple[List[str], float]]:
+    """(optimal path, cost) for each component_properties scenario"""
+    optimizer = state['optimizer']
+    results = []
+    for component_properties in scenarios:
+        result = optimizer.optimize(
+            state['product_id'], state['graph'], [state['target']],
+            state['parameters'], component_properties)
+        results.append((result['sequence'], result['metrics']['total_cost']))
+    return results
+
+
+def validate_factors(factors: List[Dict[str, Any]], product_id: str,
+                     graph: ProductGraph) -> List[Dict[str, Any]]:
+    """
+    Check a list of {'key', 'property', 'values'} factors against what the
+    product's cost model reads (kettle edges 'from->to', other products'
+    components); returns it normalised
+    """
+    if not factors:
+        raise ValueError('No sweep factors specified')
+    if not isinstance(factors, list):
+        raise ValueError('factors must be a list')
+    kind, properties, keys = weight_properties(product_id, graph)
+    normalised = []
+    seen = set()
+    for factor in factors:
+        if not isinstance(factor, dict):
+            raise ValueError('Every factor must be an object with key, property and values')
+        key = factor.get('key')
+        prop = factor.get('property')
+        values = factor.get('values')
+        if not key or not isinstance(key, str):
+            raise ValueError(f'Every factor needs a {kind} "key"')
+        if key not in keys:
+            if kind == 'edge':
+                raise ValueError(f'Factor key {key!r} is not a {product_id} edge ("from->to")')
+            # Costs are charged on an edge's target, so start components never count
+            raise ValueError(f'Factor key {key!r} is not a {product_id} component '
+                             f'that any disassembly step removes')
+        if prop not in properties:
+            raise ValueError(f'Unsupported sweep property {prop!r} for {product_id}; '
+                             f'expected one of {", ".join(properties)}')
+        if not isinstance(values, list) or not values:
+            raise ValueError(f'Factor {key} {prop} needs a non-empty list of values')
+        if (key, prop) in seen:
+            raise ValueError(f'Factor {key} {prop} is listed twice')
+        seen.add((key, prop))
+        normalised.append({'key': key, 'property': prop, 'values': values})
+    return normalised
+
+
+def grid_size(factors: List[Dict[str, Any]]) -> int:
+    size = 1
+    for factor in factors:
+        size *= len(factor['values'])
+    return size
+
+
+def expand_levels(factors: List[Dict[str, Any]], mode: str = 'grid', samples: int = 100,
+                  seed: int = 0) -> List[Tuple[int, ...]]:
+    """
+    Scenarios as tuples of value indices, one per factor: the full
+    cartesian grid, or `samples` independent uniform draws for 'random'
+    """
+    if mode == 'grid':
+        return list(itertools.product(*(range(len(f['values'])) for f in factors)))
+    if mode == 'random':
+        rng = random.Random(seed)
+        return [tuple(rng.randrange(len(f['values'])) for f in factors) for _ in range(samples)]
+    raise ValueError(f"Unknown sweep mode '{mode}'")
+
+
+def scenario_properties(base_properties: Dict[str, Any], factors: List[Dict[str, Any]],
+                        levels: Tuple[int, ...]) -> Dict[str, Any]:
+    """base_properties with each factor's chosen value overlaid"""
+    properties = {key: dict(value) if isinstance(value, dict) else value
+                  for key, value in (base_properties or {}).items()}
+    for factor, level in zip(factors, levels):
+        entry = properties.get(factor['key'])
+        if not isinstance(entry, dict):
+            entry = properties[factor['key']] = {}
+        entry[factor['property']] = factor['values'][level]
+    return properties
+
+
+def run_sweep(product_id: str, graph: ProductGraph, target: str, parameters: Dict[str, Any],
+              base_properties: Dict[str, Any], factors: List[Dict[str, Any]],
+              levels: List[Tuple[int, ...]], workers: int = None) -> Dict[str, Any]:
+    """
+    Solve every scenario (on the shared process pool when workers > 1) and
+    summarise: the distinct optimal paths with their win counts, and per
+    factor how much the winning path depends on its value.
+
+    A factor's sensitivity is the largest total-variation distance between
+    the winning-path distributions of any two of its values: 0 means the
+    value never changes which path wins, 1 means two values always pick
+    different paths.
+    """
+    if target not in graph.topology:
+        raise ValueError(f"Target '{target}' not found in graph")
+    if parameters.get('algorithm', 'dijkstra') not in SWEEP_ALGORITHMS:
+        raise ValueError(f'Sweeps support the {" and ".join(SWEEP_ALGORITHMS)} algorithms')
+
+    scenarios = [scenario_properties(base_properties, factors, level) for level in levels]
+    workers = clamp_workers(workers, len(scenarios))
+
+    # A few chunks per worker keeps the pool busy without per-scenario IPC
+    chunk_size = max(1, -(-len(scenarios) // (workers * 4)))
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    if workers > 1:
+        with PoolRun(_make_state, product_id, graph, target, parameters) as run:
+            solved = [r for chunk in run.map(_evaluate_chunk, [(c,) for c in chunks]) for r in chunk]
+    else:
+        state = _make_state(product_id, graph, target, parameters)
+        solved = [r for chunk in chunks for r in _evaluate_chunk(state, chunk)]
+
+    # Distinct optimal paths, numbered in order of first appearance
+    path_ids = {}
+    paths = []
+    winners = []
+    for path, cost in solved:
+        path_id = path_ids.get(tuple(path))
+        if path_id is None:
+            path_id = path_ids[tuple(path)] = len(paths)
+            paths.append({'path': path, 'wins': 0, 'min_cost': cost, 'max_cost': cost})
+        entry = paths[path_id]
+        entry['wins'] += 1
+        entry['min_cost'] = min(entry['min_cost'], cost)
+        entry['max_cost'] = max(entry['max_cost'], cost)
+        winners.append(path_id)
+
+    for path_id, entry in enumerate(paths):
+        entry['path_id'] = path_id
+        entry['share'] = entry['wins'] / len(winners)
+
+    sensitivity = [_factor_sensitivity(factor, index, levels, winners)
+                   for index, factor in enumerate(factors)]
+    sensitivity.sort(key=lambda s: -s['sensitivity'])
+
+    return {
+        'scenarios': len(scenarios),
+        'workers': workers,
+        'paths': sorted(paths, key=lambda p: (-p['wins'], p['path_id'])),
+        'sensitivity': sensitivity
+    }
+
+
+def _factor_sensitivity(factor: Dict[str, Any], index: int, levels: List[Tuple[int, ...]],
+                        winners: List[int]) -> Dict[str, Any]:
+    """Winning-path distribution per value of one factor, and their spread"""
+    counts = [{} for _ in factor['values']]
+    for level, winner in zip(levels, winners):
+        wins = counts[level[index]]
+        wins[winner] = wins.get(winner, 0) + 1
+
+    distributions = []
+    for wins in counts:
+        total = sum(wins.values())
+        if total:
+            distributions.append({path_id: n / total for path_id, n in wins.items()})
+
+    spread = 0.0
+    for a, b in itertools.combinations(distributions, 2):
+        distance = 0.5 * sum(abs(a.get(p, 0.0) - b.get(p, 0.0)) for p in set(a) | set(b))
+        spread = max(spread, distance)
+
+    return {
+        'key': factor['key'],
+        'property': factor['property'],
+        'sensitivity': spread,
+        'values': [{'value': value, 'scenarios': sum(wins.values()),
+                    'wins': {str(path_id): n for path_id, n in sorted(wins.items())}}
+                   for value, wins in zip(factor['values'], counts)]
+    }
@@ -0,0 +1,54 @@
+import time
+from typing import Dict, Any, Optional
+
+
+class StoppingCriteria:
+    """
+    When a GA run stops: after `generations`, when the wall-clock budget is
+    spent, when the best cost has not improved for `stall_generations`, or
+    once the best cost reaches `target_cost`.
+    Plain attributes only, so it can be shipped to worker processes.
+    """
+
+    def __init__(self, generations: int, time_budget_ms: Optional[float] = None,
+                 stall_generations: Optional[int] = None, target_cost: Optional[float] = None,
+                 start_time: Optional[float] = None):
+        self.generations = generations
+        self.stall_generations = stall_generations
+        self.target_cost = target_cost
+        start_time = time.time() if start_time is None else start_time
+        self.deadline = start_time + time_budget_ms / 1000.0 if time_budget_ms is not None else None
+
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any], start_time: Optional[float] = None) -> 'StoppingCriteria':
+        def optional(name, cast):
+            value = parameters.get(name)
+            return cast(value) if value is not None else None
+
+        return cls(
+            generations=parameters.get('generations', 30),
+            time_budget_ms=optional('time_budget_ms', float),
+            stall_generations=optional('stall_generations', int),
+            target_cost=optional('target_cost', float),
+            start_time=start_time)
+
+    def hard_stop(self, best_cost: float) -> Optional[str]:
+        """Criteria that apply to any sub-run: target cost and time budget"""
+        if self.target_cost is not None and best_cost <= self.target_cost:
+            return 'target_cost'
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 'time_budget'
+        return None
+
+    def check(self, generation: int, best_cost: float, best_generation: Optional[int]) -> Optional[str]:
+        """Reason to stop after `generation` (0-based), or None to continue"""
+        reason = self.hard_stop(best_cost)
+        if reason:
+            return reason
+        if self.stall_generations is not None:
+            last_improvement = best_generation if best_generation is not None else -1
+            if generation - last_improvement >= self.stall_generations:
+                return 'stall'
+        if generation + 1 >= self.generations:
+            return 'generations'
+        return None
@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+class PhaseTimer:
+    """
+    Wall-clock seconds spent in each phase of one request (graph load,
+    weight build, search, ...) and a few size gauges. Not shared between
+    threads: each optimisation gets its own.
+    """
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.gauges = OrderedDict()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def summary(self) -> Dict[str, Any]:
+        return {'phases': dict(self.phases), **self.gauges}
+
+
+@contextmanager
+def timed(timer: Optional[PhaseTimer], name: str):
+    """timer.phase(name), or nothing if there is no timer"""
+    if timer is None:
+        yield
+    else:
+        with timer.phase(name):
+            yield
@@ -1,10 +1,18 @@
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, jsonify, send_file, request, Response, stream_with_context
 from flask_cors import CORS
 import os
 import json
-import pandas as pd
+import time
+import importlib
+import threading
 from neo4j_client import Neo4jClient
-from algorithms.disassembly_optimizer import DisassemblyOptimizer
+from algorithms.timing import PhaseTimer
+from graph_store import ProductGraphStore
+from metadata_store import MetadataStore, CachedDocument
+from model_assets import ModelAssetIndex, LOD_LEVELS
+from result_cache import ResultCache
+from jobs import JobManager, JobQueueFull, FINISHED_STATUSES, DEFAULT_STORE_PATH
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 app = Flask(__name__)
 CORS(app)
@@ -16,7 +24,20 @@ except Exception as e:
     print(f"Warning: Neo4j not available: {e}. Will use CSV files instead.")
     neo4j_client = None
 
-optimizer = DisassemblyOptimizer()
+# The optimizer pulls in pandas, numpy and networkx; it is created on first
+# use, or by warm_up() in the gunicorn master before workers fork
+_optimizer = None
+_optimizer_lock = threading.Lock()
+
+
+def get_optimizer():
+    global _optimizer
+    if _optimizer is None:
+        with _optimizer_lock:
+            if _optimizer is None:
+                from algorithms.disassembly_optimizer import DisassemblyOptimizer
+                _optimizer = DisassemblyOptimizer()
+    return _optimizer
 
 # Data directories
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -28,6 +49,109 @@ CSV_DIR = os.path.join(BASE_DIR, 'data', 'csv')
 for directory in [GLTF_DIR, METADATA_DIR, CSV_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Upper bound on scenarios in one batch optimisation request, and on the
+# threads one parallel batch may use
+MAX_BATCH_SCENARIOS = int(os.environ.get('MAX_BATCH_SCENARIOS', 500))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+
+# Paths listing: default and maximum page size, and how deep paging may go
+DEFAULT_PATHS_PAGE = 10
+MAX_PATHS_PAGE = 100
+MAX_PATHS_LISTED = 1000
+
+# Upper bound on scenarios in one sensitivity sweep, and on the pool
+# processes (algorithms/process_pool.py) one sweep may use
+MAX_SWEEP_SCENARIOS = int(os.environ.get('MAX_SWEEP_SCENARIOS', 5000))
+SWEEP_WORKERS = int(os.environ.get('SWEEP_WORKERS', os.cpu_count() or 1))
+
+# Job event streams: each one holds a request thread while open, so at most
+# MAX_EVENT_STREAMS per process (half of gunicorn.conf.py's default 4
+# threads), each closed after STREAM_MAX_SECONDS (clients reconnect and
+# resume from Last-Event-ID)
+MAX_EVENT_STREAMS = int(os.environ.get('MAX_EVENT_STREAMS', 2))
+STREAM_MAX_SECONDS = float(os.environ.get('STREAM_MAX_SECONDS', 300))
+event_stream_slots = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+# Model files the API may serve, and how long clients may reuse them unchecked
+model_assets = ModelAssetIndex(GLTF_DIR)
+MODEL_CACHE_MAX_AGE = int(os.environ.get('MODEL_CACHE_MAX_AGE', 3600))
+
+# Parsed and pre-serialised product metadata
+metadata_store = MetadataStore(METADATA_DIR)
+
+# Compiled product graphs shared by every endpoint
+graph_store = ProductGraphStore(CSV_DIR)
+
+# Optimisation results, dropped whenever a product's graph changes
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+    ttl_seconds=float(os.environ.get('RESULT_CACHE_TTL', 600)))
+graph_store.add_listener(result_cache.invalidate)
+
+
+def load_product_graph(product_id, timer=None):
+    """
+    Compiled graph of a product: its CSV if there is one, otherwise the
+    cached Neo4j snapshot. None if neither source has the product.
+    """
+    graph = graph_store.get(product_id, timer)
+    if graph is None and neo4j_client:
+        graph = neo4j_client.get_compiled_graph(product_id)
+    return graph
+
+
+# Background optimisation jobs (bounded pool per process; job state in a
+# sqlite file every worker process shares, no external services)
+job_manager = JobManager(
+    lambda product_id, payload, **hooks: run_optimization(product_id, payload, **hooks)[0],
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queue=int(os.environ.get('JOB_QUEUE_DEPTH', 16)),
+    store_path=os.environ.get('JOB_STORE_PATH', DEFAULT_STORE_PATH))
+
+
+# Process-wide metrics served by /api/metrics
+metrics = MetricsRegistry('disassembly')
+optimization_seconds = metrics.histogram(
+    'optimization_seconds', 'Optimize request time, graph load to result',
+    ['algorithm', 'cache'])
+optimization_phase_seconds = metrics.histogram(
+    'optimization_phase_seconds', 'Time spent in each optimisation phase', ['phase'])
+graph_nodes = metrics.gauge('graph_nodes', 'Components in the last optimised graph', ['product'])
+graph_edges = metrics.gauge('graph_edges', 'Edges in the last optimised graph', ['product'])
+enumerated_paths = metrics.gauge(
+    'enumerated_paths', 'Paths enumerated by the last genetic optimisation', ['product'])
+sweep_seconds = metrics.histogram('sweep_seconds', 'Sensitivity sweep time, solving to summary')
+sweep_scenarios = metrics.counter('sweep_scenarios_total', 'Scenarios solved by sensitivity sweeps')
+
+
+def _collect_runtime_metrics():
+    caches = {'result': result_cache.stats(),
+              'graph': {'hits': graph_store.hits, 'misses': graph_store.misses}}
+    hit_ratio = []
+    for name, stats in caches.items():
+        lookups = stats['hits'] + stats['misses']
+        hit_ratio.append(({'cache': name}, stats['hits'] / lookups if lookups else 0.0))
+    yield ('cache_hits_total', 'Cache lookups answered from the cache', 'counter',
+           [({'cache': name}, stats['hits']) for name, stats in caches.items()])
+    yield ('cache_misses_total', 'Cache lookups that missed', 'counter',
+           [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+    yield ('cache_hit_ratio', 'Hits over lookups since start', 'gauge', hit_ratio)
+    yield ('result_cache_entries', 'Optimisation results held', 'gauge',
+           [({}, caches['result']['size'])])
+    yield ('job_queue_depth', 'Optimisation jobs waiting for a worker', 'gauge',
+           [({}, job_manager.queue_depth())])
+    yield ('jobs_pending', 'Optimisation jobs queued or running', 'gauge',
+           [({}, job_manager.pending())])
+
+
+metrics.add_collector(_collect_runtime_metrics)
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text-format metrics of this process"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -35,88 +159,157 @@ def health_check():
     return jsonify({'status': 'healthy', 'message': 'Disassembly Optimizer API is running'})
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness: 503 while a background warm-up is still compiling product
+    graphs, 200 once the process can serve requests without cold caches.
+    Never connects to Neo4j itself.
+    """
+    state = dict(readiness)
+    if neo4j_client is None or not neo4j_client.enabled:
+        state['neo4j'] = 'not configured'
+    else:
+        state['neo4j'] = 'connected' if neo4j_client.connected else 'not connected'
+    state['status'] = 'ready' if state['ready'] else 'warming'
+    return jsonify(state), 200 if state['ready'] else 503
+
+
+def _cached_json(document, status=200):
+    """
+    Serve a pre-serialised document with its strong ETag. Clients and
+    proxies may store it but must revalidate, which costs a 304.
+    """
+    response = Response(document.body, status=status, mimetype='application/json')
+    response.set_etag(document.etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @app.route('/api/products', methods=['GET'])
 def get_products():
     """Get list of available products"""
-    products = []
-    try:
-        if os.path.exists(METADATA_DIR):
-            for filename in os.listdir(METADATA_DIR):
-                if filename.endswith('_metadata.json'):
-                    product_name = filename.replace('_metadata.json', '')
-                    products.append({
-                        'id': product_name,
-                        'name': product_name.capitalize()
-                    })
-    except OSError as e:
-        print(f"Error reading metadata directory: {e}")
-    return jsonify(products)
+    return _cached_json(metadata_store.products())
+
+
+# product -> ((metadata etag, built LODs), metadata document with model_lods)
+_lod_metadata = {}
+
+
+def _with_model_lods(product_id, document):
+    """The metadata document plus the model's built levels of detail, if any"""
+    lods = model_assets.lods(product_id)
+    if not lods or not isinstance(document.value, dict):
+        return document
+    key = (document.etag, lods)
+    cached = _lod_metadata.get(product_id)
+    if cached is None or cached[0] != key:
+        cached = _lod_metadata[product_id] = (
+            key, CachedDocument({**document.value, 'model_lods': list(lods)}))
+    return cached[1]
 
 
 @app.route('/api/products/<product_id>/metadata', methods=['GET'])
 def get_product_metadata(product_id):
-    """Get metadata for a specific product"""
-    metadata_path = os.path.join(METADATA_DIR, f'{product_id}_metadata.json')
-    if os.path.exists(metadata_path):
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
-
-        # Transform components to have id and name fields for frontend compatibility
-        if isinstance(metadata, dict) and 'components' in metadata:
-            transformed_components = []
-            for comp in metadata['components']:
-                # Handle different metadata formats
-                component_id = comp.get('component') or comp.get(
-                    'id') or comp.get('name')
-                component_name = comp.get('component') or comp.get(
-                    'name') or comp.get('id')
-
-                transformed_comp = {
-                    'id': component_id,
-                    'name': component_name,
-                    **comp  # Keep all original fields
-                }
-                transformed_components.append(transformed_comp)
-
-            metadata['components'] = transformed_components
-        elif isinstance(metadata, list):
-            # If metadata is a list of components
-            metadata = {
-                'components': [
-                    {
-                        'id': comp.get('component') or comp.get('id') or comp.get('name'),
-                        'name': comp.get('component') or comp.get('name') or comp.get('id'),
-                        **comp
-                    }
-                    for comp in metadata
-                ]
-            }
-
-        return jsonify(metadata)
-    return jsonify({'error': 'Product not found'}), 404
+    """
+    Get metadata for a specific product. `model_lods` lists the model's
+    built levels of detail (absent when there are none).
+    """
+    document = metadata_store.metadata(product_id)
+    if document is None:
+        return jsonify({'error': 'Product not found'}), 404
+    return _cached_json(_with_model_lods(product_id, document))
+
+
+def _send_model_asset(asset):
+    """
+    Send an indexed model file with ETag/Last-Modified validation. Whole
+    file requests get the best precompressed variant the client accepts;
+    Range requests are served from the uncompressed file so byte offsets
+    match the model.
+    """
+    path, etag = asset.path, asset.etag
+    variant = None
+    if 'Range' not in request.headers:
+        accepted = [encoding for encoding, quality in request.accept_encodings if quality > 0]
+        variant = asset.variant(accepted)
+        if variant:
+            path, etag = variant['path'], variant['etag']
+
+    response = send_file(path, mimetype=asset.mimetype, etag=etag, conditional=True,
+                         last_modified=asset.mtime, max_age=MODEL_CACHE_MAX_AGE)
+    if variant:
+        response.headers['Content-Encoding'] = variant['encoding']
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    return response
 
 
 @app.route('/api/products/<product_id>/model', methods=['GET'])
 def get_product_model(product_id):
-    """Serve GLTF/GLB model file"""
-    # Try .gltf first, then .glb
-    gltf_path = os.path.join(GLTF_DIR, f'{product_id}.gltf')
-    glb_path = os.path.join(GLTF_DIR, f'{product_id}.glb')
-
-    if os.path.exists(gltf_path):
-        return send_file(gltf_path, mimetype='model/gltf+json')
-    elif os.path.exists(glb_path):
-        return send_file(glb_path, mimetype='model/gltf-binary')
-    return jsonify({'error': 'Model not found'}), 404
+    """
+    Serve GLTF/GLB model file. ?lod=low|medium|high picks a prebuilt level
+    of detail (404 if it was not built; the metadata's model_lods lists
+    the built ones); without one the full model is sent.
+    """
+    lod = request.args.get('lod', 'full')
+    if lod != 'full' and lod not in LOD_LEVELS:
+        return jsonify({'error': f"Unknown lod '{lod}'"}), 400
+
+    asset = model_assets.model(product_id)
+    if asset is None:
+        return jsonify({'error': 'Model not found'}), 404
+    if lod != 'full':
+        asset = model_assets.lod(product_id, lod)
+        if asset is None:
+            return jsonify({'error': f"Level of detail '{lod}' was not built for this model"}), 404
+
+    response = _send_model_asset(asset)
+    response.headers['X-Model-LOD'] = lod
+    return response
+
+
+@app.route('/api/products/<product_id>/model/parts', methods=['GET'])
+def get_product_model_parts(product_id):
+    """Part name -> node, mesh, accessors, byte size and world bounding box"""
+    asset = model_assets.model(product_id)
+    if asset is None or not asset.is_glb:
+        return jsonify({'error': 'GLB model not found'}), 404
+    return _cached_json(asset.part_index())
+
+
+@app.route('/api/products/<product_id>/model/subset', methods=['GET'])
+def get_product_model_subset(product_id):
+    """
+    A GLB with only the listed parts (and everything below them), e.g.
+    ?part=Lid&part=Handle, for loading just the parts on a sequence
+    """
+    parts = request.args.getlist('part')
+    if not parts:
+        return jsonify({'error': 'No parts specified'}), 400
+    asset = model_assets.model(product_id)
+    if asset is None or not asset.is_glb:
+        return jsonify({'error': 'GLB model not found'}), 404
+
+    subset = asset.subset(parts)
+    if subset is None:
+        return jsonify({'error': 'None of the requested parts are in the model'}), 404
+
+    response = Response(subset['body'], mimetype=asset.mimetype)
+    response.set_etag(subset['etag'])
+    response.cache_control.public = True
+    response.cache_control.max_age = MODEL_CACHE_MAX_AGE
+    return response.make_conditional(request)
 
 
 @app.route('/api/products/<product_id>/model/<filename>', methods=['GET'])
 def get_product_model_binary(product_id, filename):
-    """Serve GLTF binary files (.bin)"""
-    binary_path = os.path.join(GLTF_DIR, filename)
-    if os.path.exists(binary_path):
-        return send_file(binary_path, mimetype='application/octet-stream')
-    return jsonify({'error': 'Binary file not found'}), 404
+    """Serve GLTF binary files (.bin) referenced by the product's .gltf"""
+    asset = model_assets.buffer(product_id, filename)
+    if asset is None:
+        return jsonify({'error': 'Binary file not found'}), 404
+    return _send_model_asset(asset)
 
 
 @app.route('/api/products/<product_id>/graph', methods=['GET'])
@@ -132,196 +325,485 @@ def get_product_graph(product_id):
             print(f"Neo4j error: {e}")
 
     # Fallback to CSV file
-    csv_path = os.path.join(CSV_DIR, f'{product_id}_graph.csv')
-    if os.path.exists(csv_path):
-        try:
-            df = pd.read_csv(csv_path)
-        except Exception as e:
-            print(f"Error reading CSV file {csv_path}: {e}")
-            return jsonify({'error': f'Error reading CSV file: {str(e)}'}), 500
-
-        # Ensure 'from' and 'to' columns exist
-        if 'from' not in df.columns or 'to' not in df.columns:
-            return jsonify({'error': 'CSV must have "from" and "to" columns'}), 400
-
-        # Clean the data
-        df['from'] = df['from'].astype(str).str.strip()
-        df['to'] = df['to'].astype(str).str.strip()
-
-        # Get all unique nodes
-        all_nodes = set(df['from'].unique()) | set(df['to'].unique())
-
-        # Build graph data structure
-        nodes = [{'id': node, 'label': node} for node in all_nodes]
-        edges = []
-
-        for _, row in df.iterrows():
-            edge = {
-                'source': row['from'],
-                'target': row['to'],
-                'type': 'disassembles_to'
-            }
-            # Add additional properties if they exist in CSV
-            if 'safety_risk' in df.columns:
-                edge['safety_risk'] = row.get('safety_risk', '')
-            if 'fastener' in df.columns:
-                edge['fastener'] = row.get('fastener', '')
-            if 'tool' in df.columns:
-                edge['tool'] = row.get('tool', '')
-            if 'fastener_count' in df.columns:
-                edge['fastener_count'] = row.get('fastener_count', 0)
-
-            edges.append(edge)
-
-        graph_data = {
-            'nodes': nodes,
-            'edges': edges,
-            'csv_data': df.to_dict('records')  # Include raw CSV for algorithm
-        }
-
-        return jsonify(graph_data)
+    try:
+        graph = graph_store.get(product_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error reading CSV file {graph_store.csv_path(product_id)}: {e}")
+        return jsonify({'error': f'Error reading CSV file: {str(e)}'}), 500
+
+    if graph is not None:
+        return jsonify(graph.graph_payload())
 
     return jsonify({'error': 'Graph data not found'}), 404
 
 
+def run_optimization(product_id, data, progress_callback=None, should_stop=None):
+    """
+    Validate an optimize request and run it, going through the result cache.
+    Returns (result, cache_status); raises ValueError for bad input and
+    LookupError when the product has no graph data.
+    """
+    target_parts = data.get('target_parts', [])
+    parameters = data.get('parameters', {})
+
+    # Validate input
+    if not target_parts or len(target_parts) == 0:
+        raise ValueError('No target parts specified')
+
+    timer = PhaseTimer()
+    start_time = time.perf_counter()
+
+    # Get graph data - prefer CSV, fall back to the Neo4j snapshot
+    graph_data = load_product_graph(product_id, timer)
+    if graph_data is None:
+        raise LookupError('No graph data found')
+
+    # Get component properties from request
+    component_properties = data.get('component_properties', {})
+
+    # Compiled graphs have a fingerprint to key cached results on
+    cache_key = None
+    from algorithms.product_graph import ProductGraph
+    if isinstance(graph_data, ProductGraph):
+        cache_key = result_cache.make_key(
+            product_id, graph_data.fingerprint, target_parts[0],
+            parameters, component_properties)
+        result = result_cache.get(cache_key)
+        if result is not None:
+            timer.gauge('node_count', graph_data.topology.number_of_nodes())
+            timer.gauge('edge_count', graph_data.topology.number_of_edges())
+            return _with_timings(product_id, data, result, 'HIT', timer, start_time), 'HIT'
+
+    # Run optimization algorithm
+    result = get_optimizer().optimize(
+        product_id=product_id,
+        graph_data=graph_data,
+        target_parts=target_parts,
+        parameters=parameters,
+        component_properties=component_properties,
+        progress_callback=progress_callback,
+        should_stop=should_stop,
+        timer=timer
+    )
+
+    # Results of cancelled runs are partial
+    if cache_key is not None and result['metrics'].get('termination_reason') != 'cancelled':
+        result_cache.put(cache_key, result)
+
+    return _with_timings(product_id, data, result, 'MISS', timer, start_time), 'MISS'
+
+
+def _with_timings(product_id, data, result, cache_status, timer, start_time):
+    """
+    Record an optimisation's phases in the metrics registry. With
+    "include_phases": true in the request, the result's metrics also get
+    this request's phases (seconds) and graph size gauges.
+    """
+    algorithm = result['metrics'].get('algorithm', 'dijkstra')
+    optimization_seconds.observe(time.perf_counter() - start_time,
+                                 algorithm=algorithm, cache=cache_status.lower())
+    for phase, seconds in timer.phases.items():
+        optimization_phase_seconds.observe(seconds, phase=phase)
+    if 'node_count' in timer.gauges:
+        graph_nodes.set(timer.gauges['node_count'], product=product_id)
+        graph_edges.set(timer.gauges['edge_count'], product=product_id)
+    if 'path_count' in timer.gauges:
+        enumerated_paths.set(timer.gauges['path_count'], product=product_id)
+
+    if not data.get('include_phases'):
+        return result
+    # Cached results are shared, so add the phases to a copy
+    return {**result, 'metrics': {**result['metrics'], **timer.summary()}}
+
+
+def _optimization_error(e):
+    """Error response for a failed optimize request"""
+    if isinstance(e, LookupError):
+        return jsonify({'error': str(e)}), 404
+    if isinstance(e, ValueError):
+        # User input errors
+        error = {'error': str(e)}
+        if getattr(e, 'cycle', None):
+            # Cycle detection result from the DAG engine
+            error['cycle'] = [list(edge) for edge in e.cycle]
+        return jsonify(error), 400
+    import traceback
+    error_trace = traceback.format_exc()
+    print(f"Optimization error: {error_trace}")
+    return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+
 @app.route('/api/products/<product_id>/optimize', methods=['POST'])
 def optimize_disassembly(product_id):
     """Optimize disassembly path for selected parts"""
-    data = request.json
-    target_parts = data.get('target_parts', [])
-    parameters = data.get('parameters', {})
+    try:
+        result, cache_status = run_optimization(product_id, request.json)
+    except Exception as e:
+        return _optimization_error(e)
+
+    response = jsonify(result)
+    response.headers['X-Cache'] = cache_status
+    return response
+
+
+def _scenario_error(scenario):
+    """Why a batch scenario is malformed, or None"""
+    if not isinstance(scenario, dict):
+        return 'expected an object'
+    if 'target' in scenario and not isinstance(scenario['target'], str):
+        return 'target must be a string'
+    if 'target_parts' in scenario and not isinstance(scenario['target_parts'], list):
+        return 'target_parts must be a list'
+    for name in ('parameters', 'component_properties'):
+        if name in scenario and not isinstance(scenario[name], dict):
+            return f'{name} must be an object'
+    return None
+
+
+@app.route('/api/products/<product_id>/optimize/batch', methods=['POST'])
+def optimize_disassembly_batch(product_id):
+    """
+    Optimize a list of scenarios in one call. Each scenario has a 'target'
+    (or 'target_parts') and optional 'parameters' / 'component_properties',
+    defaulting to the request's top-level ones. Results keep scenario order.
+
+    With "parallel": true, groups of scenarios sharing edge weights run on
+    up to "workers" threads (at most BATCH_WORKERS). Threads overlap the
+    numpy weight building; the searches themselves hold the GIL.
+    """
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    scenarios = data.get('scenarios', [])
+    if not scenarios:
+        return jsonify({'error': 'No scenarios specified'}), 400
+    if not isinstance(scenarios, list):
+        return jsonify({'error': 'scenarios must be a list'}), 400
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        return jsonify({'error': f'At most {MAX_BATCH_SCENARIOS} scenarios per batch'}), 400
+    for name in ('parameters', 'component_properties'):
+        if name in data and not isinstance(data[name], dict):
+            return jsonify({'error': f'{name} must be an object'}), 400
+    for index, scenario in enumerate(scenarios):
+        error = _scenario_error(scenario)
+        if error:
+            return jsonify({'error': f'Scenario {index}: {error}'}), 400
+    try:
+        workers = min(max(1, int(data.get('workers', 1))), BATCH_WORKERS) if data.get('parallel') else 1
+    except (TypeError, ValueError):
+        return jsonify({'error': 'workers must be an integer'}), 400
+
+    graph = load_product_graph(product_id)
+    if graph is None:
+        return jsonify({'error': 'No graph data found'}), 404
+
+    # Normalise scenarios and answer what we can from the result cache
+    normalised = []
+    for scenario in scenarios:
+        target = scenario.get('target')
+        normalised.append({
+            'target_parts': [target] if target else scenario.get('target_parts', []),
+            'parameters': scenario.get('parameters', data.get('parameters', {})),
+            'component_properties': scenario.get(
+                'component_properties', data.get('component_properties', {}))
+        })
+
+    results = [None] * len(normalised)
+    cache_keys = {}
+    for index, scenario in enumerate(normalised):
+        if not scenario['target_parts']:
+            results[index] = {'error': 'No target parts specified', 'target_parts': []}
+            continue
+        key = result_cache.make_key(
+            product_id, graph.fingerprint, scenario['target_parts'][0],
+            scenario['parameters'], scenario['component_properties'])
+        results[index] = result_cache.get(key)
+        cache_keys[index] = key
+
+    misses = [index for index, result in enumerate(results) if result is None]
+    try:
+        solved = get_optimizer().optimize_batch(
+            product_id, graph, [normalised[i] for i in misses],
+            max_workers=workers)
+    except Exception as e:
+        return _optimization_error(e)
+
+    for index, result in zip(misses, solved):
+        results[index] = result
+        if 'error' not in result:
+            result_cache.put(cache_keys[index], result)
+
+    return jsonify({
+        'product_id': product_id,
+        'count': len(results),
+        'cache_hits': len(results) - len(misses),
+        'results': results
+    })
+
+
+@app.route('/api/products/<product_id>/sensitivity', methods=['POST'])
+def sensitivity_sweep(product_id):
+    """
+    Sweep component properties for one target and report how the optimal
+    path changes. Body: target, parameters, component_properties (the
+    base values), factors [{key, property, values}], mode ('grid' or
+    'random'), samples and seed (random mode), workers.
+    """
+    from algorithms import sensitivity
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    target = data.get('target')
+    if not target:
+        return jsonify({'error': 'No target part specified'}), 400
 
     try:
-        # Validate input
-        if not target_parts or len(target_parts) == 0:
-            return jsonify({'error': 'No target parts specified'}), 400
-
-        # Get graph data - prefer CSV for algorithm compatibility
-        csv_path = os.path.join(CSV_DIR, f'{product_id}_graph.csv')
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            # Clean data
-            df['from'] = df['from'].astype(str).str.strip()
-            df['to'] = df['to'].astype(str).str.strip()
-            graph_data = {
-                'csv_data': df.to_dict('records'),
-                'nodes': [],
-                'edges': []
-            }
+        for name in ('parameters', 'component_properties'):
+            if name in data and not isinstance(data[name], dict):
+                raise ValueError(f'{name} must be an object')
+        if not all(isinstance(v, dict) for v in data.get('component_properties', {}).values()):
+            raise ValueError('component_properties values must be objects')
+
+        graph = load_product_graph(product_id)
+        if graph is None:
+            raise LookupError('No graph data found')
+
+        factors = sensitivity.validate_factors(data.get('factors', []), product_id, graph)
+        mode = data.get('mode', 'grid')
+        if mode == 'grid':
+            count = sensitivity.grid_size(factors)
         else:
-            # Fallback to Neo4j
-            if neo4j_client:
-                graph_data = neo4j_client.get_product_graph(product_id)
-            else:
-                graph_data = None
-
-            if not graph_data:
-                return jsonify({'error': 'No graph data found'}), 404
-
-        # Get component properties from request
-        component_properties = data.get('component_properties', {})
-
-        # Run optimization algorithm
-        result = optimizer.optimize(
-            product_id=product_id,
-            graph_data=graph_data,
-            target_parts=target_parts,
-            parameters=parameters,
-            component_properties=component_properties
-        )
-
-        return jsonify(result)
-    except ValueError as e:
-        # User input errors
-        return jsonify({'error': str(e)}), 400
+            count = int(data.get('samples', 100))
+        if count < 1 or count > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f'A sweep must have between 1 and {MAX_SWEEP_SCENARIOS} scenarios '
+                             f'(this one has {count})')
+        levels = sensitivity.expand_levels(
+            factors, mode, samples=count, seed=int(data.get('seed', 0)))
+
+        start_time = time.perf_counter()
+        result = sensitivity.run_sweep(
+            product_id, graph, target, data.get('parameters', {}),
+            data.get('component_properties', {}), factors, levels,
+            workers=min(int(data.get('workers', SWEEP_WORKERS)), SWEEP_WORKERS))
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Optimization error: {error_trace}")
-        return jsonify({'error': str(e), 'trace': error_trace}), 500
+        return _optimization_error(e)
+
+    sweep_seconds.observe(time.perf_counter() - start_time)
+    sweep_scenarios.inc(result['scenarios'])
+    return jsonify({
+        'product_id': product_id,
+        'target': target,
+        'mode': mode,
+        **result
+    })
+
+
+@app.route('/api/products/<product_id>/optimize/jobs', methods=['POST'])
+def submit_optimization_job(product_id):
+    """Queue an optimisation to run in the background; returns a job id"""
+    data = request.json or {}
+    if not data.get('target_parts'):
+        return jsonify({'error': 'No target parts specified'}), 400
+
+    try:
+        job = job_manager.submit(product_id, data)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/jobs/{job.id}'
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_optimization_job(job_id):
+    """Status, progress and (once finished) result of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_optimization_job(job_id):
+    """
+    Server-Sent Events stream of a job's progress: one 'progress' event per
+    reported generation (best cost/path, diversity, elapsed), then a final
+    'done' event with the status and result. Stop early with DELETE.
+    Streams end after STREAM_MAX_SECONDS; EventSource clients reconnect
+    and resume. 429 when MAX_EVENT_STREAMS are already open here.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not event_stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open event streams; poll the job instead'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    # Resume after the last event the client saw
+    last_event_id = request.headers.get('Last-Event-ID')
+    after = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    def generate():
+        position = after
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Give the thread back; the client reconnects in a second
+                yield "retry: 1000\n\n"
+                return
+            events, document = job_manager.wait_for_events(
+                job_id, position, timeout=min(15, remaining))
+            for event_id, progress in events:
+                yield f"id: {event_id}\nevent: progress\ndata: {json.dumps(progress)}\n\n"
+                position = event_id + 1
+            if document is None:
+                # Purged while streaming
+                return
+            if document['status'] in FINISHED_STATUSES:
+                yield f"event: done\ndata: {json.dumps(document)}\n\n"
+                return
+            if not events:
+                # Keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(event_stream_slots.release)
+    return response
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_optimization_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/products/<product_id>/cache/invalidate', methods=['POST'])
+def invalidate_product_cache(product_id):
+    """Drop the compiled graph and cached results after product data changes"""
+    removed = result_cache.invalidate(product_id)
+    graph_store.invalidate(product_id)
+    return jsonify({'product_id': product_id, 'results_removed': removed})
 
 
 @app.route('/api/products/<product_id>/parts', methods=['GET'])
 def get_product_parts(product_id):
     """Get list of parts for a product"""
-    metadata_path = os.path.join(METADATA_DIR, f'{product_id}_metadata.json')
-    if os.path.exists(metadata_path):
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
-            parts = metadata.get('components', [])
-            return jsonify(parts)
-    return jsonify({'error': 'Product not found'}), 404
+    document = metadata_store.parts(product_id)
+    if document is None:
+        return jsonify({'error': 'Product not found'}), 404
+    return _cached_json(document)
+
+
+@app.route('/api/products/<product_id>/involved/<target_part>', methods=['GET'])
+def get_involved_components(product_id, target_part):
+    """Components and edges on some disassembly path to a target, and the path count"""
+    graph = load_product_graph(product_id)
+    if graph is None:
+        return jsonify({'error': 'Graph data not found'}), 404
+    if target_part not in graph.topology.nodes:
+        return jsonify({'error': f"Target '{target_part}' not found in graph"}), 400
+
+    components, edges = graph.reachability.involved(target_part)
+    if not components:
+        return jsonify({'error': 'No valid disassembly paths found'}), 400
+
+    total_paths, total_exact = graph.reachability.count_paths(target_part)
+    return jsonify({
+        'target': target_part,
+        'components': components,
+        'edges': [{'from': u, 'to': v} for u, v in edges],
+        'total_paths': total_paths,
+        'total_paths_exact': total_exact
+    })
 
 
 @app.route('/api/products/<product_id>/paths/<target_part>', methods=['GET'])
 def get_disassembly_paths(product_id, target_part):
-    """Get all valid disassembly paths and involved components/edges for a target part"""
+    """
+    Cheapest disassembly paths to a target part, one page at a time, plus
+    the components/edges that can appear on any path and the total path
+    count. Query: limit (default 10), cursor (from next_cursor), and
+    parameters / component_properties as JSON objects to rank the paths
+    under those weights instead of the product's defaults.
+    """
     try:
-        import networkx as nx
+        limit = int(request.args.get('limit', DEFAULT_PATHS_PAGE))
+        cursor = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and cursor must be integers'}), 400
+    weights = {}
+    for name in ('parameters', 'component_properties'):
+        try:
+            weights[name] = json.loads(request.args.get(name, '{}'))
+        except ValueError:
+            return jsonify({'error': f'{name} must be a JSON object'}), 400
+        if not isinstance(weights[name], dict):
+            return jsonify({'error': f'{name} must be a JSON object'}), 400
+    if not all(isinstance(v, dict) for v in weights['component_properties'].values()):
+        return jsonify({'error': 'component_properties values must be objects'}), 400
+    if not 1 <= limit <= MAX_PATHS_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PATHS_PAGE}'}), 400
+    if not 0 <= cursor < MAX_PATHS_LISTED:
+        return jsonify({'error': f'Only the {MAX_PATHS_LISTED} cheapest paths can be listed'}), 400
+    limit = min(limit, MAX_PATHS_LISTED - cursor)
 
+    try:
         # Get graph data
-        csv_path = os.path.join(CSV_DIR, f'{product_id}_graph.csv')
-        if not os.path.exists(csv_path):
+        graph = load_product_graph(product_id)
+        if graph is None:
             return jsonify({'error': 'Graph data not found'}), 404
 
-        df = pd.read_csv(csv_path)
-        df['from'] = df['from'].astype(str).str.strip()
-        df['to'] = df['to'].astype(str).str.strip()
-
-        # Build topology graph
-        G_topology = nx.DiGraph()
-        for _, row in df.iterrows():
-            G_topology.add_edge(row['from'], row['to'])
+        G_topology = graph.topology
 
         # Validate target
         if target_part not in G_topology.nodes:
             return jsonify({'error': f"Target '{target_part}' not found in graph"}), 400
 
         # Find start nodes
-        start_nodes = [
-            n for n in G_topology.nodes if G_topology.in_degree(n) == 0]
+        start_nodes = graph.start_nodes
 
         if not start_nodes:
             return jsonify({'error': 'No start nodes found'}), 400
 
-        # Enumerate all valid paths
-        all_paths = []
-        for start in start_nodes:
-            try:
-                all_paths.extend(nx.all_simple_paths(
-                    G_topology, start, target_part))
-            except nx.NetworkXNoPath:
-                pass
+        # Components and edges on any path, from the reachability index
+        components_in_paths, edges_in_paths = graph.reachability.involved(target_part)
 
-        if not all_paths:
+        if not components_in_paths:
             return jsonify({'error': 'No valid disassembly paths found'}), 400
 
-        # Extract components and edges involved in all paths
-        components_in_paths = set()
-        edges_in_paths = set()
-
-        for path in all_paths:
-            components_in_paths.update(path)
-            for i in range(len(path) - 1):
-                edges_in_paths.add((path[i], path[i + 1]))
-
-        # Return data based on product type
-        if product_id == 'kettle':
-            # For kettle: return edges that need properties
-            edges_list = [{'from': u, 'to': v}
-                          for u, v in sorted(edges_in_paths)]
-            return jsonify({
-                'paths': [[str(n) for n in path] for path in all_paths],
-                'edges': edges_list,
-                'components': sorted(list(components_in_paths))
-            })
-        else:
-            # For gearbox: return components that need safety risk
-            return jsonify({
-                'paths': [[str(n) for n in path] for path in all_paths],
-                'components': sorted(list(components_in_paths)),
-                'edges': [{'from': u, 'to': v} for u, v in sorted(edges_in_paths)]
-            })
+        total_paths, total_exact = graph.reachability.count_paths(target_part)
+
+        # This page of paths in cost order, resuming the listing earlier pages left off
+        lister = get_optimizer().path_lister(
+            product_id, graph, weights['parameters'], weights['component_properties'])
+        page, has_more = lister.page(target_part, offset=cursor, limit=limit)
+
+        return jsonify({
+            'paths': [[str(n) for n in path] for path, _ in page],
+            'costs': [cost for _, cost in page],
+            'components': components_in_paths,
+            'edges': [{'from': u, 'to': v} for u, v in edges_in_paths],
+            'total_paths': total_paths,
+            'total_paths_exact': total_exact,
+            'cursor': cursor,
+            'limit': limit,
+            'next_cursor': cursor + limit if has_more and cursor + limit < MAX_PATHS_LISTED else None
+        })
 
     except Exception as e:
         import traceback
@@ -330,6 +812,61 @@ def get_disassembly_paths(product_id, target_part):
         return jsonify({'error': str(e), 'trace': error_trace}), 500
 
 
+def _product_ids():
+    """Every product with metadata or a graph CSV"""
+    products = {product['id'] for product in metadata_store.products().value}
+    if os.path.isdir(CSV_DIR):
+        products.update(f[:-len('_graph.csv')] for f in os.listdir(CSV_DIR) if f.endswith('_graph.csv'))
+    return sorted(products)
+
+
+def warm_up():
+    """
+    Load the algorithm modules and build every product's compiled graph
+    (with its CSR form, fingerprint, reachability index, default weights
+    and path lister), metadata documents and model part index. Run in the
+    gunicorn master before fork, the workers share all of it copy-on-write.
+    """
+    start_time = time.perf_counter()
+    optimizer = get_optimizer()
+    importlib.import_module('algorithms.sensitivity')
+
+    warmed = 0
+    for product_id in _product_ids():
+        try:
+            metadata_store.metadata(product_id)
+            metadata_store.parts(product_id)
+            graph = graph_store.get(product_id)
+            if graph is not None:
+                graph.fingerprint
+                graph.graph_payload()
+                graph.reachability
+                # Builds the default weights and their networkx view for path pages
+                optimizer.path_lister(product_id, graph)
+            asset = model_assets.model(product_id)
+            if asset is not None and asset.is_glb:
+                asset.part_index()
+            warmed += 1
+        except Exception as e:
+            print(f"Warm-up of {product_id} failed: {e}")
+
+    readiness.update(ready=True, warmed_products=warmed,
+                     warm_up_seconds=round(time.perf_counter() - start_time, 3))
+    print(f"Warmed {warmed} products in {readiness['warm_up_seconds']}s")
+
+
+# WARM_START: 'preload' warms at import (set by gunicorn.conf.py, where the
+# import happens in the master); 'background' warms in a thread and /api/ready
+# answers 503 until it is done; unset, caches fill on first use
+WARM_START = os.environ.get('WARM_START', '')
+readiness = {'ready': WARM_START != 'background', 'warm_start': WARM_START or 'lazy',
+             'warmed_products': 0, 'warm_up_seconds': None}
+if WARM_START == 'preload':
+    warm_up()
+elif WARM_START == 'background':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', os.environ.get('FLASK_PORT', 5000)))
     app.run(host='0.0.0.0', port=port, debug=False)
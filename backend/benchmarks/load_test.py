@@ -0,0 +1,340 @@
+"""
+HTTP load harness for the API.
+
+Starts backend/app.py under gunicorn (or targets a running server with
+--url), then sends a weighted mix of product, metadata, graph, model, paths
+and optimize requests at a fixed arrival rate for --duration seconds.
+It reports throughput, error rate and p50/p95/p99 latency per route.
+
+Requests are scheduled open-loop: each one has an intended start time, and
+its latency is measured from that time. When the server falls behind, the
+queueing delay shows up in the percentiles instead of silently lowering the
+request rate.
+
+    python backend/benchmarks/load_test.py --workers 4 --threads 4 --rate 50 --duration 30
+    python backend/benchmarks/load_test.py --url http://localhost:5000 --mix optimize=1
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit, quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default share of each route in the request mix
+DEFAULT_MIX = {'products': 10, 'metadata': 20, 'graph': 20, 'model': 10, 'paths': 15, 'optimize': 25}
+
+# Algorithms an optimize request picks from by default ('dag' only works
+# on acyclic graphs; the bundled kettle and gearbox graphs have cycles)
+OPTIMIZE_ALGORITHMS = ['dijkstra']
+
+# Seconds to wait for gunicorn to answer /api/health
+STARTUP_TIMEOUT = 60
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    """One keep-alive connection to the server"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        """(status, body bytes); reconnects once if the kept-alive connection was dropped"""
+        headers = {'Accept-Encoding': 'gzip, br'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Workload:
+    """Builds requests for each route from the products the server lists"""
+
+    def __init__(self, client, rng, algorithms=OPTIMIZE_ALGORITHMS, cold_optimize=False):
+        self.rng = rng
+        self.algorithms = algorithms
+        self.cold_optimize = cold_optimize
+        status, body = client.request('GET', '/api/products')
+        if status != 200:
+            raise RuntimeError(f'/api/products answered {status}')
+        self.products = []
+        self.targets = {}
+        for product in json.loads(body):
+            product_id = product['id']
+            status, body = client.request('GET', f'/api/products/{quote(product_id)}/graph')
+            if status != 200:
+                continue
+            graph = json.loads(body)
+            has_parent = {edge['target'] for edge in graph.get('edges', [])}
+            targets = sorted(has_parent)
+            if targets:
+                self.products.append(product_id)
+                self.targets[product_id] = targets
+        if not self.products:
+            raise RuntimeError('No product has a graph to load-test against')
+
+    def build(self, route):
+        """(method, path, body) for one request to a route"""
+        product_id = self.rng.choice(self.products)
+        base = f'/api/products/{quote(product_id)}'
+        target = self.rng.choice(self.targets[product_id])
+        if route == 'products':
+            return 'GET', '/api/products', None
+        if route == 'metadata':
+            return 'GET', f'{base}/metadata', None
+        if route == 'graph':
+            return 'GET', f'{base}/graph', None
+        if route == 'model':
+            return 'GET', f'{base}/model', None
+        if route == 'paths':
+            return 'GET', f'{base}/paths/{quote(target, safe="")}?limit=10', None
+        if route == 'optimize':
+            parameters = {'algorithm': self.rng.choice(self.algorithms)}
+            if self.cold_optimize:
+                # An unused parameter changes the result cache key
+                parameters['nonce'] = self.rng.random()
+            return 'POST', f'{base}/optimize', {'target_parts': [target], 'parameters': parameters}
+        raise ValueError(f'Unknown route: {route}')
+
+
+def run_load(base_url, mix, rate, duration, clients, timeout, seed, algorithms, cold_optimize, warmup):
+    """Drive the server; returns per-route results"""
+    rng = random.Random(seed)
+    setup_client = Client(base_url, timeout)
+    workload = Workload(setup_client, rng, algorithms, cold_optimize)
+    setup_client.close()
+
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    total = int(rate * (warmup + duration))
+    # Requests are built up front so building them doesn't skew the schedule
+    schedule = [(i / rate, rng.choices(routes, weights)[0]) for i in range(total)]
+    schedule = [(offset, route, workload.build(route)) for offset, route in schedule]
+
+    pending = queue.Queue()
+    samples = []
+    samples_lock = threading.Lock()
+    start = time.perf_counter() + 0.5
+
+    def client_loop():
+        client = Client(base_url, timeout)
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            offset, route, (method, path, body) = item
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            error = None
+            try:
+                status, _ = client.request(method, path, body)
+                if status >= 400:
+                    error = f'HTTP {status}'
+            except Exception as e:
+                error = type(e).__name__
+            finished = time.perf_counter()
+            if offset >= warmup:
+                with samples_lock:
+                    samples.append((route, finished - intended, error, finished))
+        client.close()
+
+    threads = [threading.Thread(target=client_loop, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for item in schedule:
+        pending.put(item)
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+
+    measured = samples
+    if not measured:
+        return {'routes': {}, 'total': {}}
+    window_start = start + warmup
+    window = max(max(s[3] for s in measured) - window_start, 1e-9)
+
+    def summarise(entries):
+        latencies = sorted(e[1] for e in entries)
+        errors = {}
+        for e in entries:
+            if e[2]:
+                errors[e[2]] = errors.get(e[2], 0) + 1
+        return {
+            'requests': len(entries),
+            'throughput_rps': len(entries) / window,
+            'error_rate': sum(errors.values()) / len(entries),
+            'errors': errors,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000
+        }
+
+    by_route = {}
+    for sample in measured:
+        by_route.setdefault(sample[0], []).append(sample)
+    return {
+        'routes': {route: summarise(entries) for route, entries in sorted(by_route.items())},
+        'total': summarise(measured)
+    }
+
+
+def start_gunicorn(port, workers, threads, log_path, preload=False):
+    """Start the app under gunicorn and wait until it answers"""
+    command = [sys.executable, '-m', 'gunicorn', 'app:app',
+               '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads),
+               '--timeout', '120', '--log-level', 'warning']
+    if preload:
+        # The deployment settings: preloaded, warmed app in the master
+        command += ['--config', os.path.join(os.path.dirname(BACKEND_DIR), 'gunicorn.conf.py')]
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT,
+                               start_new_session=True)
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}; see {log_path}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_gunicorn(process)
+    raise RuntimeError(f'gunicorn did not answer within {STARTUP_TIMEOUT}s; see {log_path}')
+
+
+def stop_gunicorn(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def parse_mix(values):
+    mix = dict(DEFAULT_MIX) if not values else {}
+    for value in values or []:
+        route, _, weight = value.partition('=')
+        if route not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'Unknown route {route!r} (choose from {", ".join(DEFAULT_MIX)})')
+        mix[route] = float(weight or 1)
+    return {route: weight for route, weight in mix.items() if weight > 0}
+
+
+def print_report(results, title):
+    print(title)
+    print(f"{'route':<10} {'requests':>9} {'rps':>8} {'errors':>7} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(results['routes'].items()) + [('TOTAL', results['total'])]
+    for route, r in rows:
+        if not r:
+            continue
+        print(f"{route:<10} {r['requests']:>9} {r['throughput_rps']:>8.1f} {100 * r['error_rate']:>6.1f}% "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+        for error, count in r['errors'].items():
+            print(f"{'':<10} {count:>9} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the API under gunicorn')
+    parser.add_argument('--url', help='test a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5055, help='port for the gunicorn server')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--preload', action='store_true',
+                        help='use gunicorn.conf.py (app preloaded and warmed before fork)')
+    parser.add_argument('--rate', type=float, default=20, help='requests per second')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before that')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--mix', nargs='+', metavar='ROUTE=WEIGHT',
+                        help=f'request mix (default: {" ".join(f"{k}={v}" for k, v in DEFAULT_MIX.items())})')
+    parser.add_argument('--algorithms', nargs='+', default=OPTIMIZE_ALGORITHMS,
+                        choices=['dijkstra', 'dag', 'genetic'], help='algorithms optimize requests use')
+    parser.add_argument('--cold-optimize', action='store_true',
+                        help='make every optimize request miss the result cache')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON')
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        log_path = os.path.join(tempfile.gettempdir(), f'load_test_gunicorn_{args.port}.log')
+        process = start_gunicorn(args.port, args.workers, args.threads, log_path, args.preload)
+        base_url = f'http://127.0.0.1:{args.port}'
+    try:
+        results = run_load(base_url, mix, args.rate, args.duration, args.clients, args.timeout,
+                           args.seed, args.algorithms, args.cold_optimize, args.warmup)
+    finally:
+        if process is not None:
+            stop_gunicorn(process)
+
+    server = 'external server' if args.url else (f'{args.workers} workers x {args.threads} threads'
+                                                 + (', preloaded' if args.preload else ''))
+    print_report(results, f"{base_url} ({server}), {args.rate:g} req/s target for {args.duration:g}s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'config': {'url': base_url, 'workers': None if args.url else args.workers,
+                           'threads': None if args.url else args.threads, 'rate': args.rate,
+                           'duration': args.duration, 'clients': args.clients, 'mix': mix,
+                           'algorithms': args.algorithms, 'cold_optimize': args.cold_optimize},
+                **results
+            }, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 1 if results['total'] and results['total']['error_rate'] > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
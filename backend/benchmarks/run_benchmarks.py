@@ -0,0 +1,222 @@
+"""
+Micro-benchmarks of the disassembly optimizer on synthetic assemblies.
+
+For each size the suite times graph compilation, weight building (kettle
+and gearbox cost models), optimize() with Dijkstra, DAG and the genetic
+algorithm, and path enumeration. It records the median and best wall time
+of --repeat runs and the peak traced memory of one more run. Path
+enumeration and the GA need every path to the target, so they use the
+deepest target with at most ENUMERATION_LIMIT paths and are skipped above
+ENUMERATION_MAX_COMPONENTS.
+
+    python backend/benchmarks/run_benchmarks.py --sizes 100 1000 10000
+    python backend/benchmarks/run_benchmarks.py --compare baseline.json
+
+Results go to --output as JSON; copy a run to a baseline file to compare
+later runs against it. --compare exits with status 1 if any case got slower
+than the baseline by more than --tolerance.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from statistics import median
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from algorithms.disassembly_optimizer import DisassemblyOptimizer  # noqa: E402
+from algorithms.product_graph import ProductGraph  # noqa: E402
+from algorithms import path_listing  # noqa: E402
+from benchmarks.synthetic_graphs import generate_assembly  # noqa: E402
+
+SIZES = [100, 1000, 10000, 100000]
+
+# Most paths a target may have for the enumeration and GA cases
+ENUMERATION_LIMIT = 2000
+
+# Largest assembly the enumeration and GA cases run on: the enumeration
+# searches from every start node through the whole graph, not only through
+# the target's ancestors, so its cost grows with assembly size whatever the
+# target's path count
+ENUMERATION_MAX_COMPONENTS = 10000
+
+# Differences below this many seconds are never reported as regressions
+NOISE_FLOOR = 0.001
+
+GA_PARAMETERS = {'algorithm': 'genetic', 'generations': 30, 'seed': 0}
+
+
+def measure(setup, run, repeat, trace_memory=True):
+    """
+    {'median_s', 'min_s', 'runs', 'peak_kib'} for run(setup()); setup is
+    not timed. Memory is measured on a separate run, as tracing slows it down.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    result = {'median_s': median(times), 'min_s': min(times), 'runs': repeat}
+
+    if trace_memory:
+        state = setup()
+        tracemalloc.start()
+        try:
+            run(state)
+            result['peak_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def enumeration_target(graph: ProductGraph, layers):
+    """Deepest layer's first component with at most ENUMERATION_LIMIT paths, and its count"""
+    def paths_to(depth):
+        return path_listing.count_paths(
+            graph.topology, graph.start_nodes, layers[depth][0], limit=ENUMERATION_LIMIT + 1)[0]
+
+    # Path counts grow with depth, so search for the deepest layer that fits
+    low, high = 1, len(layers) - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if paths_to(mid) <= ENUMERATION_LIMIT:
+            low = mid
+        else:
+            high = mid - 1
+    return layers[low][0], paths_to(low)
+
+
+def run_size(size, seed, repeat, trace_memory):
+    assembly = generate_assembly(size, seed=seed)
+    graph = ProductGraph('kettle', assembly.edges)
+    properties = assembly.component_properties()
+    deep_target = assembly.layers[-1][0]
+    enumerable = size <= ENUMERATION_MAX_COMPONENTS
+    enum_target, enum_paths = enumeration_target(graph, assembly.layers) if enumerable else (None, None)
+    print(f"{size} components: {len(assembly.edges)} edges, {len(assembly.layers)} layers, "
+          f"{len(graph.start_nodes)} start nodes"
+          + (f"; enumeration target has {enum_paths} paths" if enumerable else ''))
+
+    def fresh_optimizer():
+        return DisassemblyOptimizer()
+
+    def warm_optimizer():
+        optimizer = DisassemblyOptimizer()
+        optimizer.optimize('kettle', graph, [deep_target], {'algorithm': 'dijkstra'})
+        return optimizer
+
+    cases = {
+        'compile_graph': (lambda: assembly.edges,
+                          lambda edges: ProductGraph('kettle', edges).csr),
+        'weights_kettle': (fresh_optimizer,
+                           lambda o: o._edge_weights('kettle', graph.edges_df, {})),
+        'weights_gearbox': (fresh_optimizer,
+                            lambda o: o._edge_weights('gearbox', graph.edges_df, {}, properties)),
+        'optimize_dijkstra': (fresh_optimizer,
+                              lambda o: o.optimize('kettle', graph, [deep_target],
+                                                   {'algorithm': 'dijkstra'})),
+        'optimize_dijkstra_cached': (warm_optimizer,
+                                     lambda o: o.optimize('kettle', graph, [deep_target],
+                                                          {'algorithm': 'dijkstra'})),
+        'optimize_dag': (fresh_optimizer,
+                         lambda o: o.optimize('kettle', graph, [deep_target], {'algorithm': 'dag'})),
+        'enumerate_paths': (fresh_optimizer,
+                            lambda o: o._enumerate_paths(graph.topology, graph.start_nodes, enum_target)),
+        'optimize_genetic': (fresh_optimizer,
+                             lambda o: o.optimize('kettle', graph, [enum_target], GA_PARAMETERS)),
+    }
+
+    results = {}
+    for name, (setup, run) in cases.items():
+        if not enumerable and name in ('enumerate_paths', 'optimize_genetic'):
+            results[name] = {'skipped': f'more than {ENUMERATION_MAX_COMPONENTS} components'}
+            print(f"   {name}: skipped")
+            continue
+        results[name] = measure(setup, run, repeat, trace_memory)
+        memory = f", peak {results[name]['peak_kib']} KiB" if 'peak_kib' in results[name] else ''
+        print(f"   {name}: {results[name]['median_s'] * 1000:.2f} ms{memory}")
+
+    return {
+        'graph': {
+            'components': assembly.size,
+            'edges': len(assembly.edges),
+            'layers': len(assembly.layers),
+            'start_nodes': len(graph.start_nodes),
+            'target': deep_target,
+            'enumeration_target': enum_target,
+            'enumeration_paths': enum_paths
+        },
+        'cases': results
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print cases slower than the baseline; returns how many there were"""
+    regressions = 0
+    for size, entry in results['results'].items():
+        base_cases = baseline.get('results', {}).get(size, {}).get('cases', {})
+        for name, case in entry['cases'].items():
+            base = base_cases.get(name)
+            if base is None or 'median_s' not in base or 'median_s' not in case:
+                continue
+            ratio = case['median_s'] / base['median_s'] if base['median_s'] else float('inf')
+            slower = (ratio > 1 + tolerance
+                      and case['median_s'] - base['median_s'] > NOISE_FLOOR)
+            regressions += slower
+            print(f"{'REGRESSION' if slower else 'ok':>10}  {size:>7} {name:<26} "
+                  f"{base['median_s'] * 1000:10.2f} -> {case['median_s'] * 1000:10.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the disassembly optimizer')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs')
+    parser.add_argument('--output', default=os.path.join(BACKEND_DIR, 'benchmarks', 'results.json'))
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before a case counts as a regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'networkx': nx.__version__,
+            'seed': args.seed,
+            'repeat': args.repeat
+        },
+        'results': {}
+    }
+    for size in args.sizes:
+        results['results'][str(size)] = run_size(size, args.seed, args.repeat, not args.no_memory)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{regressions} regression(s) against {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Random disassembly graphs for benchmarks and load tests.
+
+An assembly is built in layers: the first layer holds the outer components
+(the start nodes) and every later component has one parent in the layer
+above it, plus, with probability `branching`, up to `max_parents - 1` more
+from any earlier layer. The result is a DAG whose path counts grow with
+depth like a real product's. Edges carry kettle-style attributes
+(safety_risk, fastener, tool, fastener_count). Components get
+gearbox-style properties (assembly, blocked_by, disassembly_tools, safety_risk).
+
+Write one out as data files:
+    python backend/benchmarks/synthetic_graphs.py 10000 --name synthetic_10k
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+SAFETY_RISKS = ['Low', 'Medium', 'High']
+FASTENERS = ['Snap fit', 'Spring', 'Screws', 'Wires']
+TOOLS = ['Hand', 'Pull', 'Philips screwdriver', 'Wire cutter']
+DISASSEMBLY_TOOLS = ['Pull', 'Hand', 'Screwdriver', 'Puller', 'Snap ring pliers', 'Press']
+
+# Name stems; the gearbox cost model charges more for bolts, screws and snap rings
+KINDS = ['Housing', 'Cover', 'Bolt', 'Screw', 'Snap Ring', 'Gear', 'Bearing',
+         'Shaft', 'Spacer', 'Seal', 'Bracket', 'Clip']
+
+
+class SyntheticAssembly:
+    """A generated product: its edge table, layers and component metadata"""
+
+    def __init__(self, edges: pd.DataFrame, layers: List[List[str]], components: List[Dict[str, Any]]):
+        self.edges = edges
+        self.layers = layers
+        self.components = components
+
+    @property
+    def size(self) -> int:
+        return sum(len(layer) for layer in self.layers)
+
+    def component_properties(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component overrides in the form the gearbox cost model reads"""
+        return {c['component']: {'safety_risk': c['safety_risk'],
+                                 'disassembly_tools': c['disassembly_tools']}
+                for c in self.components}
+
+
+def generate_assembly(n_components: int, seed: int = 0, width: Optional[int] = None,
+                      branching: float = 0.15, max_parents: int = 3) -> SyntheticAssembly:
+    """Random layered assembly with `n_components` components"""
+    if n_components < 2:
+        raise ValueError('An assembly needs at least 2 components')
+    rng = np.random.default_rng(seed)
+    width = width or max(2, int(round(np.sqrt(n_components) * 2)))
+
+    kinds = rng.integers(len(KINDS), size=n_components)
+    names = [f'{KINDS[k]} {i:06d}' for i, k in enumerate(kinds)]
+    layers = [names[i:i + width] for i in range(0, n_components, width)]
+
+    sources = []
+    targets = []
+    offset = len(layers[0])
+    for depth in range(1, len(layers)):
+        layer = layers[depth]
+        above = layers[depth - 1]
+        # Every component hangs off one component of the layer above...
+        parents = rng.integers(len(above), size=len(layer))
+        sources.extend(above[p] for p in parents)
+        targets.extend(layer)
+        # ...and some are also blocked by components further up
+        extra = rng.random(len(layer)) < branching
+        for i in np.flatnonzero(extra):
+            for _ in range(rng.integers(1, max_parents)):
+                parent = names[int(rng.integers(offset))]
+                if parent != above[parents[i]]:
+                    sources.append(parent)
+                    targets.append(layer[i])
+        offset += len(layer)
+
+    edges = pd.DataFrame({'from': sources, 'to': targets}).drop_duplicates(ignore_index=True)
+    count = len(edges)
+    edges['safety_risk'] = np.array(SAFETY_RISKS)[rng.integers(len(SAFETY_RISKS), size=count)]
+    edges['fastener'] = np.array(FASTENERS)[rng.integers(len(FASTENERS), size=count)]
+    edges['tool'] = np.array(TOOLS)[rng.integers(len(TOOLS), size=count)]
+    edges['fastener_count'] = rng.integers(0, 9, size=count)
+
+    blocked_by = edges.groupby('to')['from'].apply(list).to_dict()
+    assembly_of = {}
+    for depth, layer in enumerate(layers):
+        for name in layer:
+            assembly_of[name] = f'Stage {depth // 4 + 1}'
+    components = []
+    for name in names:
+        tools = rng.choice(DISASSEMBLY_TOOLS, size=int(rng.integers(1, 3)), replace=False)
+        components.append({
+            'component': name,
+            'assembly': assembly_of[name],
+            'blocked_by': blocked_by.get(name, []),
+            'disassembly_tools': [str(t) for t in tools],
+            'safety_risk': SAFETY_RISKS[int(rng.integers(len(SAFETY_RISKS)))]
+        })
+
+    return SyntheticAssembly(edges, layers, components)
+
+
+def write_product(assembly: SyntheticAssembly, product_id: str, data_dir: str):
+    """Write <product>_graph.csv and <product>_metadata.json under data_dir"""
+    csv_dir = os.path.join(data_dir, 'csv')
+    metadata_dir = os.path.join(data_dir, 'metadata')
+    os.makedirs(csv_dir, exist_ok=True)
+    os.makedirs(metadata_dir, exist_ok=True)
+    assembly.edges.to_csv(os.path.join(csv_dir, f'{product_id}_graph.csv'), index=False)
+    with open(os.path.join(metadata_dir, f'{product_id}_metadata.json'), 'w') as f:
+        json.dump({'components': assembly.components}, f)
+
+
+def main():
+    data_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+    parser = argparse.ArgumentParser(description='Write a synthetic product to the data directory')
+    parser.add_argument('components', type=int, help='number of components')
+    parser.add_argument('--name', help='product id (default: synthetic_<components>)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--branching', type=float, default=0.15,
+                        help='probability that a component has extra parents')
+    parser.add_argument('--data-dir', default=data_dir)
+    args = parser.parse_args()
+
+    product_id = args.name or f'synthetic_{args.components}'
+    assembly = generate_assembly(args.components, seed=args.seed, branching=args.branching)
+    write_product(assembly, product_id, args.data_dir)
+    print(f"{product_id}: {assembly.size} components, {len(assembly.edges)} edges, "
+          f"{len(assembly.layers)} layers -> {args.data_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,396 @@
+import json
+import mmap
+import struct
+import numpy as np
+from typing import Dict, Any, List, Optional, Iterable
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# Float accessor layouts, for POSITION bounds the exporter left out
+_COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT4': 16}
+_FLOAT = 5126
+
+
+def _part_key(name: str) -> str:
+    """Part names match the viewer's way: trimmed and case-insensitive"""
+    return str(name).strip().lower()
+
+
+def node_matrix(node: Dict[str, Any]) -> np.ndarray:
+    """Local transform of a glTF node as a 4x4 matrix"""
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=float).reshape(4, 4).T
+    x, y, z, w = node.get('rotation', [0, 0, 0, 1])
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get('scale', [1, 1, 1]), dtype=float)
+    matrix[:3, 3] = node.get('translation', [0, 0, 0])
+    return matrix
+
+
+class GLBReader:
+    """
+    A binary glTF file mapped into memory. The JSON chunk is parsed once;
+    the BIN chunk stays a memoryview over the mapping, so buffer data is
+    only copied when a sub-asset is written out.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)
+
+        magic, version, length = struct.unpack_from('<4sII', data, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError(f'{path} is not a glTF 2.0 binary file')
+
+        self.json = None
+        self.bin = data[0:0]
+        offset = 12
+        while offset + 8 <= min(length, len(data)):
+            chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+            chunk = data[offset + 8:offset + 8 + chunk_length]
+            if chunk_type == CHUNK_JSON:
+                self.json = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN:
+                self.bin = chunk
+            offset += 8 + chunk_length
+        if self.json is None:
+            raise ValueError(f'{path} has no JSON chunk')
+
+        self._parents = {}
+        for i, node in enumerate(self.json.get('nodes', [])):
+            for child in node.get('children', []):
+                self._parents[child] = i
+        self._world = {}
+        self._part_index = None
+
+    def buffer_view(self, index: int) -> memoryview:
+        view = self.json['bufferViews'][index]
+        if view.get('buffer', 0) != 0:
+            raise ValueError('Only the embedded GLB buffer is supported')
+        start = view.get('byteOffset', 0)
+        return self.bin[start:start + view['byteLength']]
+
+    def world_matrix(self, node: int) -> np.ndarray:
+        matrix = self._world.get(node)
+        if matrix is None:
+            matrix = node_matrix(self.json['nodes'][node])
+            if node in self._parents:
+                matrix = self.world_matrix(self._parents[node]) @ matrix
+            self._world[node] = matrix
+        return matrix
+
+    def position_bounds(self, accessor_index: int) -> Optional[np.ndarray]:
+        """(2, 3) local min/max of a POSITION accessor"""
+        accessor = self.json['accessors'][accessor_index]
+        if 'min' in accessor and 'max' in accessor:
+            return np.array([accessor['min'][:3], accessor['max'][:3]], dtype=float)
+        if accessor.get('componentType') != _FLOAT or 'bufferView' not in accessor:
+            return None
+        width = _COMPONENTS[accessor['type']]
+        view = self.json['bufferViews'][accessor['bufferView']]
+        stride = view.get('byteStride', 4 * width) // 4
+        values = np.frombuffer(self.buffer_view(accessor['bufferView']), dtype='<f4',
+                               offset=accessor.get('byteOffset', 0),
+                               count=(accessor['count'] - 1) * stride + width)
+        points = np.lib.stride_tricks.as_strided(
+            values, shape=(accessor['count'], width), strides=(stride * 4, 4))[:, :3]
+        return np.array([points.min(axis=0), points.max(axis=0)], dtype=float)
+
+    def _mesh_bounds(self, node: int) -> Optional[np.ndarray]:
+        """World-space (2, 3) bounds of one node's own mesh"""
+        mesh = self.json['nodes'][node].get('mesh')
+        if mesh is None:
+            return None
+        local = [self.position_bounds(p['attributes']['POSITION'])
+                 for p in self.json['meshes'][mesh]['primitives'] if 'POSITION' in p['attributes']]
+        local = [b for b in local if b is not None]
+        if not local:
+            return None
+        low = np.min([b[0] for b in local], axis=0)
+        high = np.max([b[1] for b in local], axis=0)
+        corners = np.array([[x, y, z, 1.0] for x in (low[0], high[0])
+                            for y in (low[1], high[1]) for z in (low[2], high[2])])
+        world = (self.world_matrix(node) @ corners.T).T[:, :3]
+        return np.array([world.min(axis=0), world.max(axis=0)])
+
+    def _mesh_accessors(self, mesh: int) -> List[int]:
+        accessors = []
+        for primitive in self.json['meshes'][mesh]['primitives']:
+            accessors.extend(primitive.get('attributes', {}).values())
+            if 'indices' in primitive:
+                accessors.append(primitive['indices'])
+            for target in primitive.get('targets', []):
+                accessors.extend(target.values())
+        return sorted(set(accessors))
+
+    def part_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Named node -> {node, mesh, parent, accessors, bytes, bbox}. bbox is
+        the world-space box of the node and everything below it (None if
+        nothing below has geometry); bytes is what its own mesh occupies.
+        """
+        if self._part_index is not None:
+            return self._part_index
+
+        nodes = self.json.get('nodes', [])
+        own = {i: self._mesh_bounds(i) for i in range(len(nodes))}
+        subtree = {}
+
+        def subtree_bounds(i):
+            if i not in subtree:
+                boxes = [b for b in [own[i]] + [subtree_bounds(c) for c in nodes[i].get('children', [])]
+                         if b is not None]
+                subtree[i] = (np.array([np.min([b[0] for b in boxes], axis=0),
+                                        np.max([b[1] for b in boxes], axis=0)])
+                              if boxes else None)
+            return subtree[i]
+
+        index = {}
+        for i, node in enumerate(nodes):
+            name = node.get('name')
+            if name is None or name in index:
+                continue
+            mesh = node.get('mesh')
+            accessors = self._mesh_accessors(mesh) if mesh is not None else []
+            views = {self.json['accessors'][a]['bufferView'] for a in accessors
+                     if 'bufferView' in self.json['accessors'][a]}
+            box = subtree_bounds(i)
+            parent = self._parents.get(i)
+            index[name] = {
+                'node': i,
+                'mesh': mesh,
+                'parent': nodes[parent].get('name') if parent is not None else None,
+                'accessors': accessors,
+                'bytes': sum(self.json['bufferViews'][v]['byteLength'] for v in views),
+                'bbox': {'min': box[0].tolist(), 'max': box[1].tolist()} if box is not None else None
+            }
+        self._part_index = index
+        return index
+
+    def select_nodes(self, parts: Iterable[str]) -> List[int]:
+        """Nodes named in parts (matched like the viewer does) and everything below them"""
+        wanted = {_part_key(p) for p in parts}
+        nodes = self.json.get('nodes', [])
+        selected = set()
+        stack = [i for i, node in enumerate(nodes) if _part_key(node.get('name', '')) in wanted]
+        while stack:
+            i = stack.pop()
+            if i not in selected:
+                selected.add(i)
+                stack.extend(nodes[i].get('children', []))
+        return sorted(selected)
+
+    def subset(self, parts: Iterable[str]) -> bytes:
+        """A standalone GLB with only the meshes of the given parts"""
+        return _SubsetWriter(self, self.select_nodes(parts)).write()
+
+
+class _SubsetWriter:
+    """
+    Copies the selected nodes' meshes, and whatever they reference, into a
+    new GLB. Ancestor nodes are kept (without their meshes) so transforms
+    are unchanged; files with skins or animations keep every node.
+    """
+
+    def __init__(self, reader: GLBReader, selected: List[int]):
+        self.reader = reader
+        self.src = reader.json
+        self.selected = set(selected)
+
+    def write(self) -> bytes:
+        src = self.src
+        nodes = src.get('nodes', [])
+
+        # Nodes: selected ones with meshes plus their ancestors
+        if src.get('skins') or src.get('animations'):
+            keep_nodes = list(range(len(nodes)))
+        else:
+            keep = set()
+            for i in self.selected:
+                if nodes[i].get('mesh') is not None:
+                    while i is not None and i not in keep:
+                        keep.add(i)
+                        i = self.reader._parents.get(i)
+            keep_nodes = sorted(keep)
+        node_map = {old: new for new, old in enumerate(keep_nodes)}
+
+        meshes = sorted({nodes[i]['mesh'] for i in keep_nodes
+                         if i in self.selected and nodes[i].get('mesh') is not None})
+        mesh_map = {old: new for new, old in enumerate(meshes)}
+
+        # Accessors from meshes, skins and animations
+        accessors = set()
+        for mesh in meshes:
+            accessors.update(self.reader._mesh_accessors(mesh))
+        for skin in src.get('skins', []):
+            if 'inverseBindMatrices' in skin:
+                accessors.add(skin['inverseBindMatrices'])
+        for animation in src.get('animations', []):
+            for sampler in animation.get('samplers', []):
+                accessors.update((sampler['input'], sampler['output']))
+        accessor_map = {old: new for new, old in enumerate(sorted(accessors))}
+
+        # Materials -> textures -> images/samplers
+        materials = sorted({p['material'] for m in meshes for p in src['meshes'][m]['primitives']
+                            if 'material' in p})
+        material_map = {old: new for new, old in enumerate(materials)}
+        textures = set()
+        for material in materials:
+            _texture_refs(src['materials'][material], textures.add)
+        texture_map = {old: new for new, old in enumerate(sorted(textures))}
+        images = sorted({src['textures'][t]['source'] for t in textures if 'source' in src['textures'][t]})
+        image_map = {old: new for new, old in enumerate(images)}
+        samplers = sorted({src['textures'][t]['sampler'] for t in textures if 'sampler' in src['textures'][t]})
+        sampler_map = {old: new for new, old in enumerate(samplers)}
+
+        # Buffer views referenced by any kept accessor, image or compressed mesh
+        views = set()
+        for a in accessor_map:
+            accessor = src['accessors'][a]
+            if 'bufferView' in accessor:
+                views.add(accessor['bufferView'])
+            sparse = accessor.get('sparse')
+            if sparse:
+                views.update((sparse['indices']['bufferView'], sparse['values']['bufferView']))
+        for i in images:
+            if 'bufferView' in src['images'][i]:
+                views.add(src['images'][i]['bufferView'])
+        for m in meshes:
+            for primitive in src['meshes'][m]['primitives']:
+                draco = primitive.get('extensions', {}).get('KHR_draco_mesh_compression')
+                if draco:
+                    views.add(draco['bufferView'])
+        view_map = {old: new for new, old in enumerate(sorted(views))}
+
+        # New BIN chunk: each kept view copied once, 4-byte aligned
+        chunks = []
+        out_views = []
+        offset = 0
+        for old in sorted(views):
+            data = self.reader.buffer_view(old)
+            view = dict(src['bufferViews'][old], buffer=0, byteOffset=offset)
+            out_views.append(view)
+            chunks.append(data)
+            padding = -len(data) % 4
+            if padding:
+                chunks.append(b'\0' * padding)
+            offset += len(data) + padding
+        binary = b''.join(chunks)
+
+        out = {key: value for key, value in src.items()
+               if key not in ('nodes', 'scenes', 'meshes', 'accessors', 'materials', 'textures',
+                              'images', 'samplers', 'bufferViews', 'buffers', 'skins', 'animations')}
+
+        out_nodes = []
+        for old in keep_nodes:
+            node = dict(nodes[old])
+            if 'mesh' in node:
+                if old in self.selected:
+                    node['mesh'] = mesh_map[node['mesh']]
+                else:
+                    del node['mesh']
+            children = [node_map[c] for c in node.get('children', []) if c in node_map]
+            if children:
+                node['children'] = children
+            else:
+                node.pop('children', None)
+            out_nodes.append(node)
+        out['nodes'] = out_nodes
+        out['scenes'] = [dict(scene, nodes=[node_map[n] for n in scene.get('nodes', []) if n in node_map])
+                         for scene in src.get('scenes', [])]
+
+        out_meshes = []
+        for m in meshes:
+            mesh = json.loads(json.dumps(src['meshes'][m]))
+            for primitive in mesh['primitives']:
+                primitive['attributes'] = {k: accessor_map[v] for k, v in primitive['attributes'].items()}
+                if 'indices' in primitive:
+                    primitive['indices'] = accessor_map[primitive['indices']]
+                if 'material' in primitive:
+                    primitive['material'] = material_map[primitive['material']]
+                if 'targets' in primitive:
+                    primitive['targets'] = [{k: accessor_map[v] for k, v in t.items()}
+                                            for t in primitive['targets']]
+                draco = primitive.get('extensions', {}).get('KHR_draco_mesh_compression')
+                if draco:
+                    draco['bufferView'] = view_map[draco['bufferView']]
+            out_meshes.append(mesh)
+        out['meshes'] = out_meshes
+
+        out_accessors = []
+        for a in sorted(accessors):
+            accessor = json.loads(json.dumps(src['accessors'][a]))
+            if 'bufferView' in accessor:
+                accessor['bufferView'] = view_map[accessor['bufferView']]
+            if 'sparse' in accessor:
+                for part in ('indices', 'values'):
+                    accessor['sparse'][part]['bufferView'] = view_map[accessor['sparse'][part]['bufferView']]
+            out_accessors.append(accessor)
+        out['accessors'] = out_accessors
+
+        if materials:
+            out['materials'] = []
+            for m in materials:
+                material = json.loads(json.dumps(src['materials'][m]))
+                _texture_refs(material, None, texture_map)
+                out['materials'].append(material)
+        if textures:
+            out['textures'] = []
+            for t in sorted(textures):
+                texture = dict(src['textures'][t])
+                if 'source' in texture:
+                    texture['source'] = image_map[texture['source']]
+                if 'sampler' in texture:
+                    texture['sampler'] = sampler_map[texture['sampler']]
+                out['textures'].append(texture)
+        if images:
+            out['images'] = [dict(src['images'][i], bufferView=view_map[src['images'][i]['bufferView']])
+                             if 'bufferView' in src['images'][i] else dict(src['images'][i])
+                             for i in images]
+        if samplers:
+            out['samplers'] = [src['samplers'][s] for s in samplers]
+        if 'skins' in src:
+            out['skins'] = [dict(skin, inverseBindMatrices=accessor_map[skin['inverseBindMatrices']])
+                            if 'inverseBindMatrices' in skin else skin for skin in src['skins']]
+        if 'animations' in src:
+            out['animations'] = [dict(animation, samplers=[
+                dict(s, input=accessor_map[s['input']], output=accessor_map[s['output']])
+                for s in animation['samplers']]) for animation in src['animations']]
+        if out_views:
+            out['bufferViews'] = out_views
+            out['buffers'] = [{'byteLength': len(binary)}]
+
+        return pack_glb(out, binary)
+
+
+def _texture_refs(value: Any, visit=None, texture_map: Dict[int, int] = None):
+    """Visit (or remap in place) every textureInfo index inside a material"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.endswith('Texture') and isinstance(item, dict) and 'index' in item:
+                if visit:
+                    visit(item['index'])
+                if texture_map is not None:
+                    item['index'] = texture_map[item['index']]
+            _texture_refs(item, visit, texture_map)
+    elif isinstance(value, list):
+        for item in value:
+            _texture_refs(item, visit, texture_map)
+
+
+def pack_glb(document: Dict[str, Any], binary: bytes) -> bytes:
+    json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    chunks = [struct.pack('<II', len(json_chunk), CHUNK_JSON), json_chunk]
+    if binary:
+        binary += b'\0' * (-len(binary) % 4)
+        chunks += [struct.pack('<II', len(binary), CHUNK_BIN), binary]
+    body = b''.join(chunks)
+    return struct.pack('<4sII', GLB_MAGIC, 2, 12 + len(body)) + body
@@ -0,0 +1,82 @@
+import os
+import threading
+from algorithms.timing import timed
+
+
+class ProductGraphStore:
+    """
+    Loads each data/csv/<product>_graph.csv once into a compiled ProductGraph.
+    Entries are invalidated when the file's mtime or size changes.
+    """
+
+    def __init__(self, csv_dir: str):
+        self.csv_dir = csv_dir
+        self._graphs = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(product_id) whenever a product's graph changes or is dropped"""
+        self._listeners.append(callback)
+
+    def _notify(self, product_id):
+        for callback in self._listeners:
+            callback(product_id)
+
+    def csv_path(self, product_id: str) -> str:
+        return os.path.join(self.csv_dir, f'{product_id}_graph.csv')
+
+    def version(self, product_id: str):
+        """Version stamp (mtime, size) of the product CSV, or None if missing"""
+        try:
+            stat = os.stat(self.csv_path(product_id))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, product_id: str, timer=None):
+        """
+        Return the compiled graph for a product, or None if it has no CSV.
+        If it has to be compiled, the load phases are recorded on `timer`.
+        """
+        version = self.version(product_id)
+        if version is None:
+            return None
+
+        graph = self._graphs.get(product_id)
+        if graph is not None and graph.version == version:
+            self.hits += 1
+            return graph
+
+        with self._lock:
+            # Another thread may have compiled it while we waited
+            graph = self._graphs.get(product_id)
+            if graph is not None and graph.version == version:
+                self.hits += 1
+                return graph
+
+            self.misses += 1
+            # pandas and the graph classes load with the first graph
+            import pandas as pd
+            from algorithms.product_graph import ProductGraph
+            with timed(timer, 'csv_load'):
+                edges_df = pd.read_csv(self.csv_path(product_id))
+            replaced = self._graphs.get(product_id)
+            graph = ProductGraph(product_id, edges_df, version=version, timer=timer)
+            self._graphs[product_id] = graph
+
+        if replaced is not None:
+            # The CSV changed on disk
+            self._notify(product_id)
+        return graph
+
+    def invalidate(self, product_id: str = None):
+        """Drop one compiled product graph, or all of them"""
+        with self._lock:
+            if product_id is None:
+                self._graphs.clear()
+            else:
+                self._graphs.pop(product_id, None)
+        self._notify(product_id)
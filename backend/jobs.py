@@ -0,0 +1,320 @@
+"""
+Background optimisation jobs.
+
+Jobs run on a bounded thread pool in the worker process that accepted
+them. Their state (status, progress events, result) lives in a sqlite file
+shared by every worker process on the host, so status, cancel and event
+requests may reach any gunicorn worker. Cancelling a job owned by another
+worker sets a flag its owner polls. The file is local: workers on other
+hosts do not see each other's jobs, so run one instance per host or route
+a client's job requests to the host that accepted them.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Progress events kept per job for streaming clients
+MAX_EVENTS = 1000
+
+# How often a running job checks for a cancel request from another worker
+CANCEL_POLL_SECONDS = 0.5
+
+# How often a waiting reader checks the store for new events
+EVENT_POLL_SECONDS = 0.25
+
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), 'disassembly-jobs.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, event_id)
+);
+"""
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at its depth limit"""
+
+
+class JobStore:
+    """Job records and progress events in a sqlite file"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation: cheap for sqlite, and safe across
+        # threads and the gunicorn fork
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.row_factory = sqlite3.Row
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def create(self, job_id: str, product_id: str):
+        with self._connect() as db:
+            db.execute('INSERT INTO jobs (id, product_id, status, created_at, owner_pid) '
+                       'VALUES (?, ?, ?, ?, ?)',
+                       (job_id, product_id, 'queued', time.time(), os.getpid()))
+
+    def start(self, job_id: str) -> bool:
+        """queued -> running; False if the job was cancelled first"""
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? "
+                "WHERE id = ? AND status = 'queued' AND cancel_requested = 0",
+                (time.time(), job_id))
+            return cursor.rowcount == 1
+
+    def finish(self, job_id: str, status: str, result: Dict[str, Any] = None, error: str = None):
+        with self._connect() as db:
+            db.execute('UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? '
+                       'WHERE id = ?',
+                       (status, json.dumps(result) if result is not None else None, error,
+                        time.time(), job_id))
+
+    def add_event(self, job_id: str, event_id: int, progress: Dict[str, Any]):
+        data = json.dumps(progress)
+        with self._connect() as db:
+            db.execute('INSERT INTO job_events (job_id, event_id, data) VALUES (?, ?, ?)',
+                       (job_id, event_id, data))
+            db.execute('UPDATE jobs SET progress = ? WHERE id = ?', (data, job_id))
+            db.execute('DELETE FROM job_events WHERE job_id = ? AND event_id <= ?',
+                       (job_id, event_id - MAX_EVENTS))
+
+    def request_cancel(self, job_id: str) -> bool:
+        """
+        Flag a job for cancellation; a queued one is cancelled outright.
+        False if there is no such unfinished job.
+        """
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ? "
+                "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            if cursor.rowcount:
+                return True
+            cursor = db.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,))
+            return cursor.rowcount == 1
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as db:
+            row = db.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def events(self, job_id: str, after: int) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._connect() as db:
+            rows = db.execute('SELECT event_id, data FROM job_events '
+                              'WHERE job_id = ? AND event_id >= ? ORDER BY event_id',
+                              (job_id, after)).fetchall()
+        return [(row['event_id'], json.loads(row['data'])) for row in rows]
+
+    def purge(self, cutoff: float):
+        """Forget jobs that finished before `cutoff`"""
+        with self._connect() as db:
+            db.execute('DELETE FROM job_events WHERE job_id IN '
+                       '(SELECT id FROM jobs WHERE finished_at < ?)', (cutoff,))
+            db.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def job_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The API view of a stored job"""
+    data = {
+        'job_id': record['id'],
+        'product_id': record['product_id'],
+        'status': record['status'],
+        'progress': json.loads(record['progress']),
+        'created_at': record['created_at'],
+        'started_at': record['started_at'],
+        'finished_at': record['finished_at']
+    }
+    if record['result'] is not None:
+        data['result'] = json.loads(record['result'])
+    if record['error'] is not None:
+        data['error'] = record['error']
+    return data
+
+
+class Job:
+    """One asynchronous optimisation request, as run by the worker that accepted it"""
+
+    def __init__(self, store: JobStore, product_id: str, payload: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.store = store
+        self.product_id = product_id
+        self.payload = payload
+        self.status = 'queued'
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.next_event = 0
+        self._cancel_checked = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def record_progress(self, progress: Dict[str, Any]):
+        self.store.add_event(self.id, self.next_event, progress)
+        self.next_event += 1
+
+    def should_stop(self) -> bool:
+        """Cancelled here, or (checked every CANCEL_POLL_SECONDS) by another worker"""
+        if not self.cancel_event.is_set():
+            now = time.monotonic()
+            if now - self._cancel_checked >= CANCEL_POLL_SECONDS:
+                self._cancel_checked = now
+                if self.store.cancel_requested(self.id):
+                    self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+
+class JobManager:
+    """
+    Runs optimisation jobs on a bounded thread pool. At most
+    `max_workers` jobs run at once in this process and at most `max_queue`
+    more may wait; submissions beyond that raise JobQueueFull. Finished
+    jobs are kept for `retention_seconds` so clients can collect results.
+    """
+
+    def __init__(self, run: Callable[..., Dict[str, Any]], max_workers: int = 2,
+                 max_queue: int = 16, retention_seconds: float = 900,
+                 store_path: str = DEFAULT_STORE_PATH):
+        # run(product_id, payload, progress_callback=..., should_stop=...) -> result
+        self._run = run
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self.store = JobStore(store_path)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='optimize-job')
+        # Unfinished jobs this process accepted
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, product_id: str, payload: Dict[str, Any]) -> Job:
+        with self._lock:
+            self.store.purge(time.time() - self.retention_seconds)
+            if self.pending() >= self.max_workers + self.max_queue:
+                raise JobQueueFull(
+                    f'Job queue is full ({self.max_queue} waiting, {self.max_workers} running)')
+            job = Job(self.store, product_id, payload)
+            self.store.create(job.id, product_id)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._execute, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's document, from whichever worker runs it; None if unknown"""
+        record = self.store.load(job_id)
+        if record is None:
+            return None
+        if (record['status'] not in FINISHED_STATUSES and record['owner_pid'] != os.getpid()
+                and not _pid_alive(record['owner_pid'])):
+            # Its worker exited (restart, crash) before finishing it
+            self.store.finish(job_id, 'failed', error='The worker running this job exited')
+            record = self.store.load(job_id)
+        return job_document(record)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job outright; ask a running one to stop"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+            if job.future.cancel():
+                self._finish(job, 'cancelled')
+        else:
+            self.store.request_cancel(job_id)
+        return self.get(job_id)
+
+    def wait_for_events(self, job_id: str, after: int, timeout: float
+                        ) -> Tuple[List[Tuple[int, Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """
+        Progress events with id >= after, polling up to `timeout` seconds for
+        new ones. Returns ([(event_id, progress), ...], document), where the
+        document is None if the job is gone.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            document = self.get(job_id)
+            events = self.store.events(job_id, after)
+            if events or document is None or document['status'] in FINISHED_STATUSES:
+                return events, document
+            if time.monotonic() >= deadline:
+                return [], document
+            time.sleep(EVENT_POLL_SECONDS)
+
+    def pending(self) -> int:
+        """Jobs queued or running in this process"""
+        return sum(1 for job in list(self._jobs.values()) if not job.finished)
+
+    def queue_depth(self) -> int:
+        """Jobs waiting for a worker in this process"""
+        return sum(1 for job in list(self._jobs.values()) if job.status == 'queued')
+
+    def _execute(self, job: Job):
+        if job.cancel_event.is_set() or not self.store.start(job.id):
+            self._finish(job, 'cancelled')
+            return
+        job.status = 'running'
+
+        try:
+            result = self._run(
+                job.product_id, job.payload,
+                progress_callback=job.record_progress,
+                should_stop=job.should_stop)
+            self._finish(job, 'cancelled' if job.cancel_event.is_set() else 'succeeded', result)
+        except Exception as e:
+            self._finish(job, 'failed', error=str(e))
+
+    def _finish(self, job: Job, status: str, result: Dict[str, Any] = None, error: str = None):
+        job.status = status
+        self.store.finish(job.id, status, result, error)
+        with self._lock:
+            self._jobs.pop(job.id, None)
@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+def _serialise(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _etag(body: bytes) -> str:
+    """Strong validator for a response body"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class CachedDocument:
+    """A JSON document with its serialised body and ETag"""
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.body = _serialise(value)
+        self.etag = _etag(self.body)
+
+
+def transform_metadata(metadata: Any) -> Dict[str, Any]:
+    """Give every component the id/name fields the frontend expects"""
+    def with_id(comp):
+        # Handle different metadata formats
+        return {
+            'id': comp.get('component') or comp.get('id') or comp.get('name'),
+            'name': comp.get('component') or comp.get('name') or comp.get('id'),
+            **comp  # Keep all original fields
+        }
+
+    if isinstance(metadata, dict) and 'components' in metadata:
+        return {**metadata, 'components': [with_id(comp) for comp in metadata['components']]}
+    if isinstance(metadata, list):
+        # If metadata is a list of components
+        return {'components': [with_id(comp) for comp in metadata]}
+    return metadata
+
+
+class MetadataStore:
+    """
+    Parsed data/metadata/<product>_metadata.json documents, transformed and
+    serialised once. Entries are invalidated when the file's mtime or size
+    changes; the product listing when the directory changes.
+    """
+
+    def __init__(self, metadata_dir: str):
+        self.metadata_dir = metadata_dir
+        self._entries = {}
+        self._products = None
+        self._lock = threading.Lock()
+
+    def metadata_path(self, product_id: str) -> str:
+        return os.path.join(self.metadata_dir, f'{product_id}_metadata.json')
+
+    def _stat(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, product_id: str) -> Optional[Dict[str, Any]]:
+        version = self._stat(self.metadata_path(product_id))
+        if version is None:
+            return None
+
+        entry = self._entries.get(product_id)
+        if entry is not None and entry['version'] == version:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is not None and entry['version'] == version:
+                return entry
+            with open(self.metadata_path(product_id), 'r') as f:
+                raw = json.load(f)
+            entry = {
+                'version': version,
+                'metadata': CachedDocument(transform_metadata(raw)),
+                # The parts endpoint serves the components as stored
+                'parts': CachedDocument(raw.get('components', []) if isinstance(raw, dict) else raw)
+            }
+            self._entries[product_id] = entry
+        return entry
+
+    def metadata(self, product_id: str) -> Optional[CachedDocument]:
+        """Transformed metadata document, or None if the product has no metadata"""
+        entry = self._load(product_id)
+        return entry['metadata'] if entry else None
+
+    def parts(self, product_id: str) -> Optional[CachedDocument]:
+        entry = self._load(product_id)
+        return entry['parts'] if entry else None
+
+    def products(self) -> CachedDocument:
+        """[{id, name}] for every product with a metadata file"""
+        version = self._stat(self.metadata_dir)
+        cached = self._products
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        products = []
+        try:
+            if version is not None:
+                for filename in sorted(os.listdir(self.metadata_dir)):
+                    if filename.endswith('_metadata.json'):
+                        product_name = filename.replace('_metadata.json', '')
+                        products.append({
+                            'id': product_name,
+                            'name': product_name.capitalize()
+                        })
+        except OSError as e:
+            print(f"Error reading metadata directory: {e}")
+        document = CachedDocument(products)
+        self._products = (version, document)
+        return document
+
@@ -0,0 +1,157 @@
+import math
+import threading
+from typing import Dict, Any, Callable, Iterable, List, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return self.header() + [f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+                                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return self.header() + [f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+                                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry['counts']):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(entry["sum"])}')
+                lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {entry["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms of this process, rendered in the
+    Prometheus text format. Collectors are called at render time for values
+    owned by other objects (cache statistics, job queue depth) and return
+    (name, help, kind, [(labels, value)]) tuples. Under gunicorn each worker
+    process has its own registry.
+    """
+
+    def __init__(self, namespace: str = ''):
+        self.namespace = namespace
+        self._metrics = []
+        self._collectors = []
+
+    def _name(self, name: str) -> str:
+        return f'{self.namespace}_{name}' if self.namespace else name
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self._name(name), help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self._name(name), help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self._name(name), help_text, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]):
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, help_text, kind, samples in collect():
+                name = self._name(name)
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    keys = tuple(labels)
+                    lines.append(f'{name}{_labels(keys, tuple(labels[k] for k in keys))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,250 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Iterable, Tuple, TYPE_CHECKING
+from metadata_store import CachedDocument
+
+if TYPE_CHECKING:
+    from glb_reader import GLBReader
+
+# Served model formats and their media types
+MODEL_MIMETYPES = {
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+    '.bin': 'application/octet-stream'
+}
+
+# Levels of detail written by scripts/build_model_lods.py into data/gltf/lod
+LOD_LEVELS = ('low', 'medium', 'high')
+
+# Per-part sub-assets kept per model
+SUBSET_CACHE_SIZE = 32
+
+# Precompressed variants written by scripts/precompress_models.py, in
+# order of preference: (Content-Encoding, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _file_etag(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+class ModelAsset:
+    """One servable model file, with its validators and precompressed variants"""
+
+    def __init__(self, path: str):
+        stat = os.stat(path)
+        self.path = path
+        self.mimetype = MODEL_MIMETYPES[os.path.splitext(path)[1].lower()]
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self._etag = None
+        self._reader = None
+        self._parts = None
+        self._subsets = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Variants older than the source are stale leftovers; ignore them
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant = os.stat(path + suffix)
+            except OSError:
+                continue
+            if variant.st_mtime_ns >= stat.st_mtime_ns:
+                self.variants[encoding] = {'path': path + suffix, 'size': variant.st_size}
+
+    @property
+    def etag(self) -> str:
+        """Content hash of the file, computed on first use"""
+        if self._etag is None:
+            with self._lock:
+                if self._etag is None:
+                    self._etag = _file_etag(self.path)
+        return self._etag
+
+    def is_current(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == self.version
+
+    @property
+    def is_glb(self) -> bool:
+        return self.mimetype == MODEL_MIMETYPES['.glb']
+
+    def reader(self) -> 'GLBReader':
+        """Memory-mapped reader for a .glb asset, opened on first use"""
+        if self._reader is None:
+            from glb_reader import GLBReader
+            self._reader = GLBReader(self.path)
+        return self._reader
+
+    def part_index(self) -> CachedDocument:
+        """Serialised part-name index of a .glb asset"""
+        if self._parts is None:
+            self._parts = CachedDocument(self.reader().part_index())
+        return self._parts
+
+    def subset(self, parts: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        {'body', 'etag'} of a GLB with only the given parts' meshes, or None
+        if none of them are in the model. Recent subsets are kept.
+        """
+        reader = self.reader()
+        nodes = tuple(reader.select_nodes(parts))
+        if not nodes:
+            return None
+        with self._lock:
+            subset = self._subsets.get(nodes)
+            if subset is not None:
+                self._subsets.move_to_end(nodes)
+                return subset
+        body = reader.subset(parts)
+        subset = {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32]}
+        with self._lock:
+            self._subsets[nodes] = subset
+            while len(self._subsets) > SUBSET_CACHE_SIZE:
+                self._subsets.popitem(last=False)
+        return subset
+
+    def variant(self, accepted: List[str]) -> Optional[Dict[str, Any]]:
+        """Preferred precompressed variant among the accepted encodings"""
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                return {'encoding': encoding, 'etag': f'{self.etag}-{encoding}',
+                        **self.variants[encoding]}
+        return None
+
+
+class ModelAssetIndex:
+    """
+    The set of model files the API may serve, built from data/gltf: each
+    product's <product>.gltf or <product>.glb, the buffers a .gltf
+    references, and lod/<product>_<level>.glb variants. Anything else in
+    the directory is not reachable. The index
+    is rebuilt when the directory changes; files are hashed for their
+    ETags on first request, and a changed file is re-hashed on its next.
+    """
+
+    def __init__(self, gltf_dir: str):
+        self.gltf_dir = gltf_dir
+        self._models = {}
+        self._buffers = {}
+        self._lods = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _dir_version(self):
+        versions = []
+        for directory in (self.gltf_dir, os.path.join(self.gltf_dir, 'lod')):
+            try:
+                versions.append(os.stat(directory).st_mtime_ns)
+            except OSError:
+                versions.append(None)
+        return tuple(versions)
+
+    def refresh(self):
+        """Rebuild the index from the directory contents"""
+        with self._lock:
+            version = self._dir_version()
+            models = {}
+            buffers = {}
+            filenames = sorted(os.listdir(self.gltf_dir)) if version[0] is not None else []
+
+            # Unchanged files keep their asset, and with it their ETag and reader
+            previous = {asset.path: asset for table in (self._models, self._buffers, self._lods)
+                        for asset in table.values()}
+
+            def asset(path):
+                current = previous.get(path)
+                if current is not None and current.is_current():
+                    return current
+                return ModelAsset(path)
+
+            for filename in filenames:
+                product_id, ext = os.path.splitext(filename)
+                # .gltf takes precedence over .glb, as before
+                if ext.lower() == '.glb' and product_id not in models:
+                    models[product_id] = asset(os.path.join(self.gltf_dir, filename))
+            for filename in filenames:
+                product_id, ext = os.path.splitext(filename)
+                if ext.lower() == '.gltf':
+                    path = os.path.join(self.gltf_dir, filename)
+                    models[product_id] = asset(path)
+                    for uri in self._buffer_uris(path):
+                        buffers[(product_id, uri)] = asset(os.path.join(self.gltf_dir, uri))
+
+            lods = {}
+            lod_dir = os.path.join(self.gltf_dir, 'lod')
+            for filename in sorted(os.listdir(lod_dir)) if version[1] is not None else []:
+                stem, ext = os.path.splitext(filename)
+                product_id, _, level = stem.rpartition('_')
+                if ext.lower() == '.glb' and level in LOD_LEVELS and product_id in models:
+                    lods[(product_id, level)] = asset(os.path.join(lod_dir, filename))
+
+            first = self._version is None
+            self._models = models
+            self._buffers = buffers
+            self._lods = lods
+            self._version = version
+            if first:
+                # Later refreshes follow directory changes and stay quiet
+                print(f"Indexed {len(models)} models, {len(buffers)} buffers and "
+                      f"{len(lods)} LOD variants in {self.gltf_dir}")
+
+    def _buffer_uris(self, gltf_path: str) -> List[str]:
+        """Local .bin buffers a .gltf file references (no paths, no data: URIs)"""
+        try:
+            with open(gltf_path, 'r') as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {gltf_path}: {e}")
+            return []
+        uris = []
+        for buffer in document.get('buffers', []):
+            uri = buffer.get('uri')
+            if (uri and os.path.basename(uri) == uri and uri.lower().endswith('.bin')
+                    and os.path.isfile(os.path.join(self.gltf_dir, uri))):
+                uris.append(uri)
+        return uris
+
+    def _lookup(self, table: str, key) -> Optional[ModelAsset]:
+        if self._dir_version() != self._version:
+            self.refresh()
+        assets = {'models': self._models, 'buffers': self._buffers, 'lods': self._lods}[table]
+        asset = assets.get(key)
+        if asset is not None and not asset.is_current():
+            # Rewritten in place since it was indexed
+            asset = ModelAsset(asset.path) if os.path.isfile(asset.path) else None
+            with self._lock:
+                if asset is None:
+                    assets.pop(key, None)
+                else:
+                    assets[key] = asset
+        return asset
+
+    def model(self, product_id: str) -> Optional[ModelAsset]:
+        return self._lookup('models', product_id)
+
+    def lods(self, product_id: str) -> Tuple[str, ...]:
+        """Levels of detail built for a product's model, coarsest first"""
+        if self._dir_version() != self._version:
+            self.refresh()
+        return tuple(level for level in LOD_LEVELS if (product_id, level) in self._lods)
+
+    def lod(self, product_id: str, level: str) -> Optional[ModelAsset]:
+        """A built level of detail for a product's model, if there is one"""
+        return self._lookup('lods', (product_id, level))
+
+    def buffer(self, product_id: str, filename: str) -> Optional[ModelAsset]:
+        return self._lookup('buffers', (product_id, filename))
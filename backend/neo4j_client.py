@@ -1,120 +1,264 @@
-from neo4j import GraphDatabase
 import os
+import time
+import base64
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Relationship types that make up a product's disassembly graph
+RELATIONSHIP_TYPES = 'CONNECTED_TO|DISASSEMBLES_TO|REQUIRES'
+
+# Driver connection pool
+MAX_POOL_SIZE = int(os.getenv('NEO4J_MAX_POOL_SIZE', 50))
+CONNECTION_TIMEOUT = float(os.getenv('NEO4J_CONNECTION_TIMEOUT', 15))
+ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', 30))
+MAX_CONNECTION_LIFETIME = float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', 3600))
+
+# Seconds between connection attempts while the database is unreachable
+RECONNECT_INTERVAL = float(os.getenv('NEO4J_RECONNECT_INTERVAL', 30))
+
+# Seconds a product snapshot is used without asking the database whether
+# the product changed; after that one stamp query decides whether to refetch
+SNAPSHOT_TTL = float(os.getenv('NEO4J_SNAPSHOT_TTL', 30))
+
+# Every part of a product with its outgoing relationships, one row per part
+GRAPH_QUERY = f"""
+MATCH (p:Part {{product: $product_id}})
+OPTIONAL MATCH (p)-[r:{RELATIONSHIP_TYPES}]->(q:Part {{product: $product_id}})
+WITH p, collect(CASE WHEN r IS NULL THEN NULL
+                ELSE {{to: q.name, type: type(r), properties: properties(r)}} END) AS out
+RETURN p.name AS name, properties(p) AS properties, out
+"""
+
+# Cheap version stamp of a product: an explicit (:Product {id}).version
+# if the loader maintains one, plus counts and the latest part update
+STAMP_QUERY = f"""
+MATCH (p:Part {{product: $product_id}})
+OPTIONAL MATCH (p)-[r:{RELATIONSHIP_TYPES}]->(:Part {{product: $product_id}})
+WITH count(DISTINCT p) AS parts, count(r) AS relationships, max(p.updated_at) AS updated
+OPTIONAL MATCH (v:Product {{id: $product_id}})
+RETURN v.version AS version, parts, relationships, updated
+"""
+
+
+def _json_value(value):
+    """
+    A property value the JSON encoder can write: neo4j.time values (such as
+    the loader's updated_at) as ISO 8601 strings, points as coordinate
+    lists, byte arrays as base64
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    # Durations and points are tuples, so test for them first
+    if hasattr(value, 'iso_format'):
+        return value.iso_format()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'srid'):
+        return list(value)
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {key: _json_value(v) for key, v in value.items()}
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    return str(value)
+
+
+def _json_properties(properties):
+    return {key: _json_value(value) for key, value in properties.items()}
+
+
+class GraphSnapshot:
+    """A product graph as read from Neo4j, compiled once per version stamp"""
+
+    def __init__(self, product_id, stamp, rows):
+        import pandas as pd
+        from algorithms.product_graph import ProductGraph
+
+        self.product_id = product_id
+        self.stamp = stamp
+        self.checked_at = time.monotonic()
+
+        nodes = []
+        edges = []
+        for row in rows:
+            nodes.append({'id': row['name'], 'label': row['name'],
+                          'properties': _json_properties(row['properties'])})
+            for rel in row['out']:
+                edges.append({
+                    'source': row['name'],
+                    'target': rel['to'],
+                    'type': rel['type'],
+                    'properties': _json_properties(rel['properties'])
+                })
+        self.payload = {'nodes': nodes, 'edges': edges}
+
+        edges_df = pd.DataFrame(
+            [{**edge['properties'], 'from': edge['source'], 'to': edge['target']}
+             for edge in edges],
+            columns=None if edges else ['from', 'to'])
+        self.graph = ProductGraph(product_id, edges_df, version=('neo4j', stamp))
+
+
 class Neo4jClient:
+    """
+    Neo4j access with a per-product snapshot cache. The driver (and the
+    neo4j package) is loaded on first use, not when the client is created,
+    so importing the app stays cheap and no connection exists before
+    gunicorn forks its workers.
+    """
+
     def __init__(self):
         self.uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
         self.user = os.getenv('NEO4J_USER', 'neo4j')
         self.password = os.getenv('NEO4J_PASSWORD', '')
-        self.driver = None
+        self.database = os.getenv('NEO4J_DATABASE') or None
+        self._driver = None
+        self._last_attempt = None
+        self._connect_lock = threading.Lock()
+        self._snapshots = {}
+        self._lock = threading.Lock()
         # Only try to connect if password is provided
-        if self.password:
-            self.connect()
-        else:
+        if not self.password:
             print("Neo4j not configured (no password). Will use CSV files instead.")
-    
+
+    @property
+    def enabled(self):
+        return bool(self.password)
+
+    @property
+    def connected(self):
+        return self._driver is not None
+
+    @property
+    def driver(self):
+        """The driver, connecting on first use; None if Neo4j is not configured or unreachable"""
+        if self._driver is None and self.enabled:
+            with self._connect_lock:
+                if self._driver is None and (self._last_attempt is None or
+                                             time.monotonic() - self._last_attempt >= RECONNECT_INTERVAL):
+                    self._last_attempt = time.monotonic()
+                    self.connect()
+        return self._driver
+
     def connect(self):
         """Establish connection to Neo4j database"""
+        from neo4j import GraphDatabase
         try:
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+            self._driver = GraphDatabase.driver(
+                self.uri, auth=(self.user, self.password),
+                max_connection_pool_size=MAX_POOL_SIZE,
+                connection_timeout=CONNECTION_TIMEOUT,
+                connection_acquisition_timeout=ACQUISITION_TIMEOUT,
+                max_connection_lifetime=MAX_CONNECTION_LIFETIME)
             # Verify connection
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            self._driver.verify_connectivity()
             print("Connected to Neo4j successfully")
         except Exception as e:
             print(f"Neo4j connection failed: {e}")
             print("Will use CSV files instead.")
-            self.driver = None
-    
+            self._driver = None
+
     def close(self):
         """Close Neo4j connection"""
-        if self.driver:
-            self.driver.close()
-    
-    def get_product_graph(self, product_id):
-        """Get knowledge graph data for a product"""
-        if not self.driver:
+        if self._driver:
+            self._driver.close()
+            self._driver = None
+
+    def _query(self, query, **parameters):
+        from neo4j import RoutingControl
+        records, _, _ = self.driver.execute_query(
+            query, parameters_=parameters, database_=self.database, routing_=RoutingControl.READ)
+        return records
+
+    def _stamp(self, product_id):
+        record = self._query(STAMP_QUERY, product_id=product_id)[0]
+        if not record['parts']:
             return None
-        
-        query = """
-        MATCH (p:Part {product: $product_id})
-        OPTIONAL MATCH (p)-[r:CONNECTED_TO|DISASSEMBLES_TO|REQUIRES]-(related:Part)
-        RETURN p, r, related
+        return (record['version'], record['parts'], record['relationships'],
+                str(record['updated']) if record['updated'] is not None else None)
+
+    def snapshot(self, product_id):
         """
-        
-        try:
-            with self.driver.session() as session:
-                result = session.run(query, product_id=product_id)
-                
-                nodes = []
-                edges = []
-                node_ids = set()
-                
-                for record in result:
-                    # Process nodes
-                    if record['p']:
-                        node_id = record['p'].id
-                        if node_id not in node_ids:
-                            nodes.append({
-                                'id': str(node_id),
-                                'label': record['p'].get('name', ''),
-                                'properties': dict(record['p'])
-                            })
-                            node_ids.add(node_id)
-                    
-                    if record['related']:
-                        related_id = record['related'].id
-                        if related_id not in node_ids:
-                            nodes.append({
-                                'id': str(related_id),
-                                'label': record['related'].get('name', ''),
-                                'properties': dict(record['related'])
-                            })
-                            node_ids.add(related_id)
-                    
-                    # Process edges
-                    if record['r']:
-                        edges.append({
-                            'source': str(record['p'].id),
-                            'target': str(record['related'].id),
-                            'type': record['r'].type,
-                            'properties': dict(record['r'])
-                        })
-                
-                return {
-                    'nodes': nodes,
-                    'edges': edges
-                }
-        except Exception as e:
-            print(f"Error querying Neo4j: {e}")
+        Cached GraphSnapshot of a product, or None if Neo4j is unavailable or
+        has no parts for it. Within SNAPSHOT_TTL of the last check the cached
+        snapshot is returned without a database call; after that the version
+        stamp is compared and the graph refetched only if it changed.
+        """
+        if not self.driver:
             return None
-    
+
+        snapshot = self._snapshots.get(product_id)
+        if snapshot is not None and time.monotonic() - snapshot.checked_at < SNAPSHOT_TTL:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(product_id)
+            if snapshot is not None and time.monotonic() - snapshot.checked_at < SNAPSHOT_TTL:
+                return snapshot
+            try:
+                stamp = self._stamp(product_id)
+                if stamp is None:
+                    self._snapshots.pop(product_id, None)
+                    return None
+                if snapshot is not None and snapshot.stamp == stamp:
+                    snapshot.checked_at = time.monotonic()
+                    return snapshot
+
+                start_time = time.time()
+                rows = self._query(GRAPH_QUERY, product_id=product_id)
+                snapshot = GraphSnapshot(product_id, stamp, rows)
+                self._snapshots[product_id] = snapshot
+                print(f"Loaded {product_id} from Neo4j: {len(snapshot.payload['nodes'])} parts, "
+                      f"{len(snapshot.payload['edges'])} relationships "
+                      f"in {time.time() - start_time:.3f}s")
+                return snapshot
+            except Exception as e:
+                print(f"Error querying Neo4j: {e}")
+                return None
+
+    def invalidate(self, product_id=None):
+        """Drop one cached snapshot, or all of them"""
+        with self._lock:
+            if product_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(product_id, None)
+
+    def get_product_graph(self, product_id):
+        """Get knowledge graph data for a product: name-keyed nodes and directed edges"""
+        snapshot = self.snapshot(product_id)
+        return snapshot.payload if snapshot else None
+
+    def get_compiled_graph(self, product_id):
+        """Compiled ProductGraph of a product's Neo4j snapshot, or None"""
+        snapshot = self.snapshot(product_id)
+        return snapshot.graph if snapshot else None
+
     def get_disassembly_paths(self, product_id, target_part):
         """Get all possible disassembly paths to a target part"""
         if not self.driver:
             return None
-        
+
         query = """
         MATCH path = (start:Part {product: $product_id, is_root: true})-[*]->(target:Part {name: $target_part})
         RETURN path
         ORDER BY length(path)
         LIMIT 10
         """
-        
+
         try:
             with self.driver.session() as session:
                 result = session.run(query, product_id=product_id, target_part=target_part)
                 paths = []
                 for record in result:
                     path = record['path']
-                    path_nodes = [{'id': str(node.id), 'name': node.get('name', '')} 
+                    path_nodes = [{'id': str(node.id), 'name': node.get('name', '')}
                                  for node in path.nodes]
                     paths.append(path_nodes)
                 return paths
         except Exception as e:
             print(f"Error querying disassembly paths: {e}")
             return None
-
@@ -0,0 +1,77 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from algorithms.hashing import canonical_hash
+
+
+class ResultCache:
+    """
+    In-process LRU + TTL cache of optimisation results, keyed by product,
+    graph version, target, algorithm and canonical hashes of the request's
+    parameters and component properties.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(product_id: str, graph_version: str, target: str,
+                 parameters: Dict[str, Any], component_properties: Dict[str, Any] = None) -> tuple:
+        return (
+            product_id,
+            graph_version,
+            target,
+            parameters.get('algorithm', 'dijkstra'),
+            canonical_hash(parameters),
+            canonical_hash(component_properties or {})
+        )
+
+    def get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                # Expired
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, product_id: str = None) -> int:
+        """Drop cached results for one product (or all); returns how many"""
+        with self._lock:
+            if product_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key[0] == product_id]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,335 @@
+"""
+Build level-of-detail variants of every product GLB in data/gltf.
+
+Each level deduplicates vertices, stores positions as 16-bit integers and
+normals as 8-bit normalised integers (KHR_mesh_quantization), and drops
+texture coordinates from untextured materials. The medium and
+low levels also simplify meshes by vertex clustering. Node names, the node
+hierarchy and materials are kept, so parts can still be found and
+highlighted by name.
+
+Output: data/gltf/lod/<product>_<level>.glb, served by
+/api/products/<product>/model?lod=<level>.
+
+Run after adding or changing a model:  python backend/scripts/build_model_lods.py
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from glb_reader import GLBReader, pack_glb, node_matrix  # noqa: E402
+
+# Level -> clustering grid cells along a mesh's longest side (None: no simplification)
+LEVELS = {'high': None, 'medium': 32, 'low': 8}
+
+QUANTIZATION = 'KHR_mesh_quantization'
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+DTYPES = {BYTE: '<i1', UNSIGNED_BYTE: '<u1', SHORT: '<i2', UNSIGNED_SHORT: '<u2',
+          UNSIGNED_INT: '<u4', FLOAT: '<f4'}
+WIDTHS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+
+
+def read_accessor(reader: GLBReader, index: int) -> np.ndarray:
+    """Accessor data as a (count, width) array of its stored component type"""
+    accessor = reader.json['accessors'][index]
+    if 'sparse' in accessor or 'bufferView' not in accessor:
+        raise ValueError('sparse or empty accessors are not supported')
+    dtype = np.dtype(DTYPES[accessor['componentType']])
+    width = WIDTHS[accessor['type']]
+    view = reader.json['bufferViews'][accessor['bufferView']]
+    stride = view.get('byteStride', dtype.itemsize * width)
+    data = reader.buffer_view(accessor['bufferView'])
+    count = accessor['count']
+    values = np.frombuffer(data, dtype=np.uint8, offset=accessor.get('byteOffset', 0),
+                           count=(count - 1) * stride + dtype.itemsize * width)
+    rows = np.lib.stride_tricks.as_strided(values, shape=(count, dtype.itemsize * width),
+                                           strides=(stride, 1))
+    return np.ascontiguousarray(rows).view(dtype).reshape(count, width)
+
+
+class BinaryWriter:
+    """Accumulates accessors and buffer views for a new GLB BIN chunk"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def add_view(self, data: bytes, target: int = None, stride: int = None) -> int:
+        view = {'buffer': 0, 'byteOffset': self.offset, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        if stride:
+            view['byteStride'] = stride
+        self.buffer_views.append(view)
+        padding = -len(data) % 4
+        self.chunks.append(data + b'\0' * padding)
+        self.offset += len(data) + padding
+        return len(self.buffer_views) - 1
+
+    def add_accessor(self, array: np.ndarray, component_type: int, accessor_type: str,
+                     target: int = ARRAY_BUFFER, normalized: bool = False, bounds: bool = False) -> int:
+        array = np.ascontiguousarray(array, dtype=DTYPES[component_type])
+        if array.ndim == 1:
+            array = array[:, None]
+        stride = None
+        if target == ARRAY_BUFFER:
+            # Vertex attribute elements must start on 4-byte boundaries
+            element = array.shape[1] * array.itemsize
+            padded = element + (-element % 4)
+            if padded != element:
+                raw = np.zeros((len(array), padded), dtype=np.uint8)
+                raw[:, :element] = array.view(np.uint8).reshape(len(array), element)
+                data = raw.tobytes()
+                stride = padded
+            else:
+                data = array.tobytes()
+        else:
+            data = array.tobytes()
+        accessor = {
+            'bufferView': self.add_view(data, target, stride),
+            'componentType': component_type,
+            'count': len(array),
+            'type': accessor_type
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds:
+            accessor['min'] = array.min(axis=0).tolist()
+            accessor['max'] = array.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def binary(self) -> bytes:
+        return b''.join(self.chunks)
+
+
+def weld(positions: np.ndarray, attributes: dict, indices: np.ndarray):
+    """Merge vertices whose every attribute is identical"""
+    rows = np.hstack([positions] + [a.astype(np.float32) for a in attributes.values()])
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    # Keep first-appearance order so the result is stable
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    keep = first[order]
+    return (positions[keep], {k: a[keep] for k, a in attributes.items()},
+            rank[inverse.reshape(-1)][indices])
+
+
+def cluster(positions: np.ndarray, attributes: dict, indices: np.ndarray, cells: int):
+    """
+    Vertex clustering: snap vertices to a grid with `cells` cells along the
+    longest side, average each cell, and drop triangles that collapse.
+    Returns None if nothing is left.
+    """
+    low = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - low).max())
+    if extent == 0:
+        return None
+    grid = np.floor((positions - low) / (extent / cells)).astype(np.int64)
+    _, cell_of, counts = np.unique(grid, axis=0, return_inverse=True, return_counts=True)
+    cell_of = cell_of.reshape(-1)
+
+    def average(values):
+        sums = np.zeros((len(counts), values.shape[1]))
+        np.add.at(sums, cell_of, values)
+        return sums / counts[:, None]
+
+    new_positions = average(positions).astype(np.float32)
+    new_attributes = {}
+    for name, values in attributes.items():
+        averaged = average(values.astype(np.float64))
+        if name == 'NORMAL':
+            lengths = np.linalg.norm(averaged, axis=1, keepdims=True)
+            averaged = np.where(lengths > 0, averaged / np.maximum(lengths, 1e-12), [0, 0, 1])
+        new_attributes[name] = averaged.astype(values.dtype)
+
+    triangles = cell_of[indices].reshape(-1, 3)
+    keep = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2]))
+    triangles = triangles[keep]
+    if len(triangles) == 0:
+        return None
+    triangles = np.unique(triangles, axis=0)
+
+    # Drop cells no remaining triangle uses
+    used, remap = np.unique(triangles, return_inverse=True)
+    return (new_positions[used], {k: v[used] for k, v in new_attributes.items()},
+            remap.reshape(-1).astype(np.int64))
+
+
+def quantize_positions(positions: np.ndarray, low: np.ndarray, scale: float) -> np.ndarray:
+    return np.clip(np.round((positions - low) / scale), 0, 65535).astype(np.uint16)
+
+
+def quantize_normals(normals: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(normals * 127), -127, 127).astype(np.int8)
+
+
+def mesh_dequantization(reader: GLBReader, mesh: int):
+    """(offset, scale) mapping a mesh's 16-bit positions back to model space"""
+    bounds = [reader.position_bounds(p['attributes']['POSITION'])
+              for p in reader.json['meshes'][mesh]['primitives']]
+    low = np.min([b[0] for b in bounds], axis=0)
+    high = np.max([b[1] for b in bounds], axis=0)
+    scale = float((high - low).max()) / 65535 or 1.0
+    return low, scale
+
+
+def build_level(reader: GLBReader, cells) -> bytes:
+    src = reader.json
+    if src.get('skins') or src.get('animations'):
+        raise ValueError('skinned or animated models are not supported')
+    writer = BinaryWriter()
+    document = json.loads(json.dumps(src))
+
+    dequantization = {m: mesh_dequantization(reader, m) for m in range(len(src.get('meshes', [])))}
+
+    for m, mesh in enumerate(document.get('meshes', [])):
+        offset, scale = dequantization[m]
+        for p, primitive in enumerate(mesh['primitives']):
+            original = src['meshes'][m]['primitives'][p]
+            if primitive.get('mode', 4) != 4 or 'targets' in primitive or 'extensions' in primitive:
+                raise ValueError('only plain indexed triangle meshes are supported')
+
+            positions = read_accessor(reader, original['attributes']['POSITION']).astype(np.float32)
+            # Texture coordinates are dead weight on untextured materials
+            textured = _is_textured(src, original.get('material'))
+            attributes = {name: read_accessor(reader, index)
+                          for name, index in original['attributes'].items()
+                          if name != 'POSITION' and (textured or not name.startswith('TEXCOORD_'))}
+            if 'indices' in original:
+                indices = read_accessor(reader, original['indices']).reshape(-1).astype(np.int64)
+            else:
+                indices = np.arange(len(positions), dtype=np.int64)
+
+            positions, attributes, indices = weld(positions, attributes, indices)
+            if cells:
+                # Parts too small for the grid keep their welded mesh
+                simplified = cluster(positions, attributes, indices, cells)
+                if simplified is not None:
+                    positions, attributes, indices = simplified
+
+            primitive['attributes'] = {'POSITION': writer.add_accessor(
+                quantize_positions(positions, offset, scale), UNSIGNED_SHORT, 'VEC3', bounds=True)}
+            for name, values in attributes.items():
+                accessor = src['accessors'][original['attributes'][name]]
+                if name == 'NORMAL':
+                    primitive['attributes'][name] = writer.add_accessor(
+                        quantize_normals(values), BYTE, 'VEC3', normalized=True)
+                else:
+                    primitive['attributes'][name] = writer.add_accessor(
+                        values, accessor['componentType'], accessor['type'],
+                        normalized=accessor.get('normalized', False))
+            index_type = UNSIGNED_SHORT if len(positions) < 65536 else UNSIGNED_INT
+            primitive['indices'] = writer.add_accessor(
+                indices, index_type, 'SCALAR', target=ELEMENT_ARRAY_BUFFER)
+
+    # Fold each mesh's dequantisation into its node, and undo it for the
+    # node's children so nothing else moves
+    for i, node in enumerate(document.get('nodes', [])):
+        if node.get('mesh') is None:
+            continue
+        offset, scale = dequantization[node['mesh']]
+        dequantize = np.eye(4)
+        dequantize[:3, :3] *= scale
+        dequantize[:3, 3] = offset
+        _set_matrix(node, node_matrix(node) @ dequantize)
+        for child in node.get('children', []):
+            child_node = document['nodes'][child]
+            _set_matrix(child_node, np.linalg.inv(dequantize) @ node_matrix(child_node))
+
+    # Images stored in the BIN chunk
+    for image in document.get('images', []):
+        if 'bufferView' in image:
+            image['bufferView'] = writer.add_view(bytes(reader.buffer_view(image['bufferView'])))
+
+    document['accessors'] = writer.accessors
+    document['bufferViews'] = writer.buffer_views
+    document['buffers'] = [{'byteLength': writer.offset}]
+    for key in ('extensionsUsed', 'extensionsRequired'):
+        document[key] = sorted(set(document.get(key, [])) | {QUANTIZATION})
+    return pack_glb(document, writer.binary())
+
+
+def _is_textured(document: dict, material) -> bool:
+    if material is None:
+        return False
+    return 'Texture' in json.dumps(document['materials'][material])
+
+
+def _set_matrix(node: dict, matrix: np.ndarray):
+    """Store a transform as TRS when it is one (no shear), otherwise as a matrix"""
+    for key in ('matrix', 'translation', 'rotation', 'scale'):
+        node.pop(key, None)
+    linear = matrix[:3, :3]
+    scale = np.linalg.norm(linear, axis=0)
+    rotation = linear / scale
+    if np.allclose(rotation.T @ rotation, np.eye(3), atol=1e-6) and np.linalg.det(rotation) > 0:
+        node['translation'] = matrix[:3, 3].tolist()
+        node['rotation'] = _quaternion(rotation)
+        node['scale'] = scale.tolist()
+    else:
+        node['matrix'] = matrix.T.reshape(-1).tolist()
+
+
+def _quaternion(rotation: np.ndarray) -> list:
+    """Unit quaternion [x, y, z, w] of a rotation matrix"""
+    m = rotation
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2 * np.sqrt(trace + 1)
+        q = [(m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s, s / 4]
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2 * np.sqrt(1 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = [s / 4, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s, (m[2, 1] - m[1, 2]) / s]
+    elif m[1, 1] > m[2, 2]:
+        s = 2 * np.sqrt(1 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = [(m[0, 1] + m[1, 0]) / s, s / 4, (m[1, 2] + m[2, 1]) / s, (m[0, 2] - m[2, 0]) / s]
+    else:
+        s = 2 * np.sqrt(1 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = [(m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, s / 4, (m[1, 0] - m[0, 1]) / s]
+    q = np.array(q) / np.linalg.norm(q)
+    return q.tolist()
+
+
+def main():
+    default_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'gltf')
+    parser = argparse.ArgumentParser(description='Build LOD variants of the product GLB models')
+    parser.add_argument('--dir', default=default_dir, help='model directory (default: data/gltf)')
+    parser.add_argument('--levels', nargs='+', default=list(LEVELS), choices=list(LEVELS))
+    args = parser.parse_args()
+
+    out_dir = os.path.join(args.dir, 'lod')
+    os.makedirs(out_dir, exist_ok=True)
+    for filename in sorted(os.listdir(args.dir)):
+        if not filename.lower().endswith('.glb'):
+            continue
+        product_id = os.path.splitext(filename)[0]
+        path = os.path.join(args.dir, filename)
+        reader = GLBReader(path)
+        print(f"{filename} ({os.path.getsize(path)} bytes)")
+        for level in args.levels:
+            try:
+                data = build_level(reader, LEVELS[level])
+            except ValueError as e:
+                print(f"   {level}: skipped ({e})")
+                continue
+            target = os.path.join(out_dir, f'{product_id}_{level}.glb')
+            with open(target, 'wb') as f:
+                f.write(data)
+            print(f"   {level}: {len(data)} bytes ({100 * len(data) / os.path.getsize(path):.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
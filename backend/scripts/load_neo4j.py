@@ -0,0 +1,393 @@
+"""
+Load products from data/csv and data/metadata into Neo4j.
+
+For each product the disassembly graph (<product>_graph.csv) becomes
+(:Part)-[:DISASSEMBLES_TO]->(:Part) relationships carrying the CSV columns,
+and the metadata (<product>_metadata.json) adds part properties,
+(:Part)-[:BLOCKED_BY]->(:Part), (:Part)-[:NEEDS_TOOL]->(:Tool) and
+(:Part)-[:IN_ASSEMBLY]->(:Assembly). Rows are written in batches with
+UNWIND, one transaction per batch, and every write is a MERGE. A part's
+updated_at is set when it is created or its properties change, so loading
+the same files again changes nothing but the product's version stamp.
+
+Run:  python backend/scripts/load_neo4j.py [product ...] [--replace] [--dry-run]
+Connection settings are the NEO4J_* variables read by neo4j_client.
+--dry-run writes into an in-memory stand-in graph instead of the database.
+"""
+import os
+import sys
+import json
+import time
+import math
+import argparse
+from itertools import islice
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.product_graph import clean_edges  # noqa: E402
+
+# Rows per UNWIND batch (and per transaction)
+BATCH_SIZE = int(os.environ.get('NEO4J_LOAD_BATCH', 1000))
+
+SCHEMA = [
+    "CREATE CONSTRAINT product_id IF NOT EXISTS FOR (v:Product) REQUIRE v.id IS UNIQUE",
+    "CREATE CONSTRAINT part_key IF NOT EXISTS FOR (p:Part) REQUIRE (p.product, p.name) IS UNIQUE",
+    "CREATE CONSTRAINT tool_name IF NOT EXISTS FOR (t:Tool) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT assembly_key IF NOT EXISTS FOR (a:Assembly) REQUIRE (a.product, a.name) IS UNIQUE",
+    # Product-wide reads (neo4j_client.GRAPH_QUERY) match on the product alone
+    "CREATE INDEX part_product IF NOT EXISTS FOR (p:Part) ON (p.product)",
+]
+
+# Batched writes; each takes $rows, a list of maps
+STATEMENTS = {
+    'parts': """
+        UNWIND $rows AS row
+        MERGE (p:Part {product: row.product, name: row.name})
+        WITH p, row, p.updated_at IS NULL OR any(key IN keys(row.properties)
+                                                 WHERE p[key] IS NULL OR p[key] <> row.properties[key]) AS changed
+        SET p += row.properties
+        SET p.updated_at = CASE WHEN changed THEN datetime() ELSE p.updated_at END
+    """,
+    'edges': """
+        UNWIND $rows AS row
+        MERGE (a:Part {product: row.product, name: row.from})
+        ON CREATE SET a.updated_at = datetime()
+        MERGE (b:Part {product: row.product, name: row.to})
+        ON CREATE SET b.updated_at = datetime()
+        MERGE (a)-[r:DISASSEMBLES_TO]->(b)
+        SET r = row.properties
+    """,
+    'blocked_by': """
+        UNWIND $rows AS row
+        MERGE (p:Part {product: row.product, name: row.part})
+        MERGE (b:Part {product: row.product, name: row.blocker})
+        MERGE (p)-[:BLOCKED_BY]->(b)
+    """,
+    'tools': """
+        UNWIND $rows AS row
+        MERGE (t:Tool {name: row.tool})
+        MERGE (p:Part {product: row.product, name: row.part})
+        MERGE (p)-[:NEEDS_TOOL]->(t)
+    """,
+    'assemblies': """
+        UNWIND $rows AS row
+        MERGE (a:Assembly {product: row.product, name: row.assembly})
+        MERGE (p:Part {product: row.product, name: row.part})
+        MERGE (p)-[:IN_ASSEMBLY]->(a)
+    """,
+    # Written last, so readers see a new stamp only once the product is loaded
+    'version': """
+        UNWIND $rows AS row
+        MERGE (v:Product {id: row.id})
+        SET v.name = row.name, v.version = coalesce(v.version, 0) + 1, v.loaded_at = datetime()
+    """,
+}
+
+CLEAR_PRODUCT = """
+MATCH (n) WHERE (n:Part OR n:Assembly) AND n.product = $product_id
+DETACH DELETE n
+"""
+
+# Metadata fields that become relationships rather than part properties
+RELATION_FIELDS = ('blocked_by', 'disassembly_tools', 'disassembly_tool', 'assembly')
+NAME_FIELDS = ('component', 'name', 'id')
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _value(value):
+    """A property value Neo4j can store, or None to leave it out"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        return int(value) if value.is_integer() else value
+    if isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, list):
+        items = [_value(v) for v in value]
+        # Neo4j lists must be homogeneous and null-free
+        if items and all(type(item) is type(items[0]) for item in items):
+            return items
+    return None
+
+
+def _properties(record, skip=()):
+    properties = {}
+    for key, value in record.items():
+        value = _value(value)
+        if key not in skip and value is not None:
+            properties[key] = value
+    return properties
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def edge_rows(product_id, csv_path, batch_size):
+    """Yield batches of 'edges' rows, reading the CSV a chunk at a time"""
+    for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+        chunk = clean_edges(chunk)
+        yield [{'product': product_id, 'from': record['from'], 'to': record['to'],
+                'properties': _properties(record, skip=('from', 'to'))}
+               for record in chunk.to_dict('records')]
+
+
+def metadata_rows(product_id, metadata_path):
+    """{statement: rows} for a product's metadata components"""
+    with open(metadata_path, 'r') as f:
+        raw = json.load(f)
+    components = raw.get('components', []) if isinstance(raw, dict) else raw
+
+    rows = {'parts': [], 'blocked_by': [], 'tools': [], 'assemblies': []}
+    for component in components:
+        # Some metadata files nest the attributes under 'properties'
+        fields = {**component.get('properties', {}),
+                  **{k: v for k, v in component.items() if k != 'properties'}}
+        name = next((str(fields[k]).strip() for k in NAME_FIELDS if fields.get(k)), None)
+        if not name:
+            continue
+
+        rows['parts'].append({'product': product_id, 'name': name,
+                              'properties': _properties(fields, skip=RELATION_FIELDS + NAME_FIELDS)})
+        for blocker in _as_list(fields.get('blocked_by')):
+            rows['blocked_by'].append({'product': product_id, 'part': name, 'blocker': str(blocker).strip()})
+        for tool in _as_list(fields.get('disassembly_tools')) + _as_list(fields.get('disassembly_tool')):
+            rows['tools'].append({'product': product_id, 'part': name, 'tool': str(tool).strip()})
+        if fields.get('assembly'):
+            rows['assemblies'].append({'product': product_id, 'part': name,
+                                       'assembly': str(fields['assembly']).strip()})
+    return rows
+
+
+class Neo4jWriter:
+    """Runs the loader statements against a Neo4j database"""
+
+    def __init__(self, driver, database=None):
+        self.driver = driver
+        self.database = database
+
+    def ensure_schema(self):
+        with self.driver.session(database=self.database) as session:
+            for statement in SCHEMA:
+                session.run(statement).consume()
+
+    def clear(self, product_id):
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(lambda tx: tx.run(CLEAR_PRODUCT, product_id=product_id).consume())
+
+    def write(self, name, rows):
+        """Write one batch in its own transaction; returns (nodes, relationships) created"""
+        with self.driver.session(database=self.database) as session:
+            summary = session.execute_write(
+                lambda tx: tx.run(STATEMENTS[name], rows=rows).consume())
+        counters = summary.counters
+        return counters.nodes_created, counters.relationships_created
+
+
+class MemoryGraph:
+    """
+    In-memory stand-in for the database with the same MERGE semantics as
+    STATEMENTS: nodes are keyed by label and merge key, relationships by
+    type and endpoints. A write counter stands in for datetime(). Used by
+    --dry-run.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = {}
+        self.clock = 0
+
+    def _now(self):
+        self.clock += 1
+        return self.clock
+
+    def ensure_schema(self):
+        pass
+
+    def clear(self, product_id):
+        removed = {key for key, props in self.nodes.items()
+                   if key[0] in ('Part', 'Assembly') and props.get('product') == product_id}
+        self.nodes = {k: v for k, v in self.nodes.items() if k not in removed}
+        self.relationships = {k: v for k, v in self.relationships.items()
+                              if k[1] not in removed and k[2] not in removed}
+
+    def _merge_node(self, label, key, **identity):
+        created = key not in self.nodes
+        if created:
+            self.nodes[key] = dict(identity)
+        return key, created
+
+    def _merge_relationship(self, rel_type, start, end):
+        key = (rel_type, start, end)
+        created = key not in self.relationships
+        if created:
+            self.relationships[key] = {}
+        return key, created
+
+    def _part(self, product, name):
+        key, created = self._merge_node('Part', ('Part', product, name), product=product, name=name)
+        if created:
+            self.nodes[key]['updated_at'] = self._now()
+        return key, created
+
+    def write(self, name, rows):
+        nodes_created = relationships_created = 0
+        for row in rows:
+            created_nodes = []
+            created_rels = []
+            if name == 'parts':
+                key, created = self._part(row['product'], row['name'])
+                part = self.nodes[key]
+                if any(part.get(k) != v for k, v in row['properties'].items()):
+                    part.update(row['properties'], updated_at=self._now())
+                created_nodes.append(created)
+            elif name == 'edges':
+                start, a = self._part(row['product'], row['from'])
+                end, b = self._part(row['product'], row['to'])
+                key, created = self._merge_relationship('DISASSEMBLES_TO', start, end)
+                self.relationships[key] = dict(row['properties'])
+                created_nodes += [a, b]
+                created_rels.append(created)
+            elif name == 'blocked_by':
+                start, a = self._part(row['product'], row['part'])
+                end, b = self._part(row['product'], row['blocker'])
+                created_nodes += [a, b]
+                created_rels.append(self._merge_relationship('BLOCKED_BY', start, end)[1])
+            elif name == 'tools':
+                tool, a = self._merge_node('Tool', ('Tool', row['tool']), name=row['tool'])
+                part, b = self._part(row['product'], row['part'])
+                created_nodes += [a, b]
+                created_rels.append(self._merge_relationship('NEEDS_TOOL', part, tool)[1])
+            elif name == 'assemblies':
+                assembly, a = self._merge_node(
+                    'Assembly', ('Assembly', row['product'], row['assembly']),
+                    product=row['product'], name=row['assembly'])
+                part, b = self._part(row['product'], row['part'])
+                created_nodes += [a, b]
+                created_rels.append(self._merge_relationship('IN_ASSEMBLY', part, assembly)[1])
+            elif name == 'version':
+                key, created = self._merge_node('Product', ('Product', row['id']), id=row['id'])
+                product = self.nodes[key]
+                product.update(name=row['name'], version=product.get('version', 0) + 1)
+                created_nodes.append(created)
+            else:
+                raise KeyError(name)
+            nodes_created += sum(created_nodes)
+            relationships_created += sum(created_rels)
+        return nodes_created, relationships_created
+
+
+def load_product(writer, product_id, csv_dir, metadata_dir, batch_size=BATCH_SIZE, replace=False):
+    """Load one product; returns {statement: {rows, batches, nodes, relationships, seconds}}"""
+    report = {}
+
+    def run(name, row_batches):
+        entry = report.setdefault(name, {'rows': 0, 'batches': 0, 'nodes': 0,
+                                         'relationships': 0, 'seconds': 0.0})
+        for rows in row_batches:
+            start_time = time.perf_counter()
+            nodes, relationships = writer.write(name, rows)
+            entry['seconds'] += time.perf_counter() - start_time
+            entry['rows'] += len(rows)
+            entry['batches'] += 1
+            entry['nodes'] += nodes
+            entry['relationships'] += relationships
+
+    if replace:
+        writer.clear(product_id)
+
+    metadata_path = os.path.join(metadata_dir, f'{product_id}_metadata.json')
+    if os.path.isfile(metadata_path):
+        rows = metadata_rows(product_id, metadata_path)
+        run('parts', batches(rows['parts'], batch_size))
+    else:
+        rows = None
+
+    csv_path = os.path.join(csv_dir, f'{product_id}_graph.csv')
+    if os.path.isfile(csv_path):
+        run('edges', edge_rows(product_id, csv_path, batch_size))
+
+    if rows is not None:
+        for name in ('blocked_by', 'tools', 'assemblies'):
+            run(name, batches(rows[name], batch_size))
+
+    run('version', [[{'id': product_id, 'name': product_id.capitalize()}]])
+    return report
+
+
+def discover_products(csv_dir, metadata_dir):
+    """Products with a graph CSV or a metadata file"""
+    products = set()
+    for directory, suffix in ((csv_dir, '_graph.csv'), (metadata_dir, '_metadata.json')):
+        if os.path.isdir(directory):
+            products.update(f[:-len(suffix)] for f in os.listdir(directory) if f.endswith(suffix))
+    return sorted(products)
+
+
+def main():
+    data_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+    parser = argparse.ArgumentParser(description='Load product graphs and metadata into Neo4j')
+    parser.add_argument('products', nargs='*', help='products to load (default: all)')
+    parser.add_argument('--csv-dir', default=os.path.join(data_dir, 'csv'))
+    parser.add_argument('--metadata-dir', default=os.path.join(data_dir, 'metadata'))
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='rows per transaction')
+    parser.add_argument('--replace', action='store_true',
+                        help="delete each product's parts and assemblies before loading")
+    parser.add_argument('--dry-run', action='store_true',
+                        help='load into an in-memory stand-in graph instead of Neo4j')
+    args = parser.parse_args()
+
+    client = None
+    if args.dry_run:
+        writer = MemoryGraph()
+    else:
+        from neo4j_client import Neo4jClient
+        client = Neo4jClient()
+        if client.driver is None:
+            print("No Neo4j connection - set NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD or use --dry-run")
+            return 1
+        writer = Neo4jWriter(client.driver, client.database)
+
+    products = args.products or discover_products(args.csv_dir, args.metadata_dir)
+    try:
+        writer.ensure_schema()
+        start_time = time.perf_counter()
+        total_rows = 0
+        for product_id in products:
+            product_start = time.perf_counter()
+            report = load_product(writer, product_id, args.csv_dir, args.metadata_dir,
+                                  batch_size=args.batch_size, replace=args.replace)
+            rows = sum(entry['rows'] for entry in report.values())
+            total_rows += rows
+            print(f"{product_id}: {rows} rows in {time.perf_counter() - product_start:.3f}s")
+            for name, entry in report.items():
+                print(f"   {name}: {entry['rows']} rows, {entry['batches']} batches, "
+                      f"{entry['nodes']} nodes and {entry['relationships']} relationships created "
+                      f"({entry['seconds']:.3f}s)")
+        elapsed = time.perf_counter() - start_time
+        print(f"Loaded {len(products)} products, {total_rows} rows in {elapsed:.3f}s "
+              f"({total_rows / elapsed if elapsed else 0:.0f} rows/s)")
+        if args.dry_run:
+            print(f"Stand-in graph: {len(writer.nodes)} nodes, {len(writer.relationships)} relationships")
+    finally:
+        if client is not None:
+            client.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
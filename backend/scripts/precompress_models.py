@@ -0,0 +1,73 @@
+"""
+Write gzip (and, if the brotli package is installed, brotli) variants of
+every model file in data/gltf and data/gltf/lod, next to the original as
+<file>.gz / <file>.br.
+The API serves them to clients that accept the encoding.
+
+Run after adding or changing a model:  python backend/scripts/precompress_models.py
+"""
+import os
+import sys
+import gzip
+import argparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MODEL_EXTENSIONS = ('.glb', '.gltf', '.bin')
+
+# Keep a variant only if it saves at least this fraction of the bytes
+MIN_SAVING = 0.05
+
+
+def compress_file(path: str, force: bool = False):
+    with open(path, 'rb') as f:
+        data = f.read()
+    source_mtime = os.stat(path).st_mtime_ns
+
+    encoders = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda d: brotli.compress(d, quality=11)))
+
+    for suffix, encode in encoders:
+        target = path + suffix
+        if not force and os.path.exists(target) and os.stat(target).st_mtime_ns >= source_mtime:
+            print(f"   {os.path.basename(target)} is up to date")
+            continue
+        encoded = encode(data)
+        if len(encoded) > len(data) * (1 - MIN_SAVING):
+            print(f"   {os.path.basename(target)} skipped ({len(encoded)} of {len(data)} bytes)")
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        with open(target, 'wb') as f:
+            f.write(encoded)
+        print(f"   {os.path.basename(target)}: {len(data)} -> {len(encoded)} bytes "
+              f"({100 * len(encoded) / len(data):.0f}%)")
+
+
+def main():
+    default_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'gltf')
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dir', default=default_dir, help='model directory (default: data/gltf)')
+    parser.add_argument('--force', action='store_true', help='rewrite up-to-date variants')
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli not installed - writing gzip variants only (pip install brotli)")
+
+    for directory in (args.dir, os.path.join(args.dir, 'lod')):
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(MODEL_EXTENSIONS):
+                print(os.path.relpath(os.path.join(directory, filename), args.dir))
+                compress_file(os.path.join(directory, filename), force=args.force)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import sys
+import math
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'data')
+CSV_DIR = os.path.join(DATA_DIR, 'csv')
+METADATA_DIR = os.path.join(DATA_DIR, 'metadata')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+import load_neo4j  # noqa: E402
+from load_neo4j import MemoryGraph, load_product, metadata_rows  # noqa: E402
+from algorithms.product_graph import clean_edges  # noqa: E402
+
+PRODUCTS = ['kettle', 'gearbox']
+
+# Small enough that every product needs several batches
+BATCH_SIZE = 7
+
+
+def _load(graph, product_id):
+    return load_product(graph, product_id, CSV_DIR, METADATA_DIR, batch_size=BATCH_SIZE)
+
+
+@pytest.mark.parametrize('product_id', PRODUCTS)
+def test_reload_is_idempotent(product_id):
+    graph = MemoryGraph()
+    _load(graph, product_id)
+    nodes = {key: dict(props) for key, props in graph.nodes.items()}
+    relationships = {key: dict(props) for key, props in graph.relationships.items()}
+
+    report = _load(graph, product_id)
+
+    assert len(graph.nodes) == len(nodes)
+    assert len(graph.relationships) == len(relationships)
+    assert all(entry['nodes'] == 0 and entry['relationships'] == 0 for entry in report.values())
+    assert graph.relationships == relationships
+    # Only the product's version stamp moves; parts keep their updated_at
+    for key, props in graph.nodes.items():
+        if key[0] == 'Product':
+            assert props['version'] == nodes[key]['version'] + 1
+        else:
+            assert props == nodes[key]
+
+
+def test_products_load_into_one_graph():
+    graph = MemoryGraph()
+    for product_id in PRODUCTS:
+        _load(graph, product_id)
+    counts = (len(graph.nodes), len(graph.relationships))
+    for product_id in PRODUCTS:
+        _load(graph, product_id)
+    assert (len(graph.nodes), len(graph.relationships)) == counts
+
+
+@pytest.mark.parametrize('product_id', PRODUCTS)
+def test_batches_match_source_rows(product_id):
+    csv_path = os.path.join(CSV_DIR, f'{product_id}_graph.csv')
+    raw = pd.read_csv(csv_path)
+    edges = clean_edges(raw)
+    rows = metadata_rows(product_id, os.path.join(METADATA_DIR, f'{product_id}_metadata.json'))
+
+    graph = MemoryGraph()
+    report = _load(graph, product_id)
+
+    # The CSV is read and cleaned one batch-sized chunk at a time
+    assert report['edges']['batches'] == math.ceil(len(raw) / BATCH_SIZE)
+    assert report['edges']['rows'] == len(edges)
+    distinct_edges = set(zip(edges['from'], edges['to']))
+    assert sum(1 for key in graph.relationships if key[0] == 'DISASSEMBLES_TO') == len(distinct_edges)
+
+    for name in ('parts', 'blocked_by', 'tools', 'assemblies'):
+        if rows[name]:
+            assert report[name]['rows'] == len(rows[name])
+            assert report[name]['batches'] == math.ceil(len(rows[name]) / BATCH_SIZE)
+
+
+def test_batches_split_rows():
+    rows = list(range(2 * load_neo4j.BATCH_SIZE + 1))
+    sizes = [len(batch) for batch in load_neo4j.batches(rows, load_neo4j.BATCH_SIZE)]
+    assert sizes == [load_neo4j.BATCH_SIZE, load_neo4j.BATCH_SIZE, 1]
@@ -7,7 +7,7 @@ import ParameterPanel from './components/ParameterPanel';
 import PartSelector from './components/PartSelector';
 import ResultsPanel from './components/ResultsPanel';
 import AnimationControls from './components/AnimationControls';
-import { getProducts, getProductMetadata, getProductGraph, optimizeDisassembly, getDisassemblyPaths } from './services/api';
+import { getProducts, getProductMetadata, getProductGraph, optimizeDisassembly, getInvolvedComponents } from './services/api';
 import ComponentPropertiesPanel from './components/ComponentPropertiesPanel';
 
 function App() {
@@ -79,8 +79,8 @@ function App() {
     
     if (partId && selectedProduct) {
       try {
-        const paths = await getDisassemblyPaths(selectedProduct, partId);
-        setPathsData(paths);
+        const involved = await getInvolvedComponents(selectedProduct, partId);
+        setPathsData(involved);
       } catch (error) {
         console.error('Error loading disassembly paths:', error);
         setPathsData(null);
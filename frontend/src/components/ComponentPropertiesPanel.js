@@ -67,7 +67,7 @@ const ComponentPropertiesPanel = ({
         Configure properties for components involved in disassembly paths to <strong>{targetPart}</strong>
       </p>
       <p className="paths-count">
-        Found {pathsData.paths?.length || 0} valid disassembly path(s)
+        Found {pathsData.total_paths ?? pathsData.paths?.length ?? 0} valid disassembly path(s)
       </p>
       
       <div className="properties-content">
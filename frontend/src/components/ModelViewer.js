@@ -1,13 +1,14 @@
-import React, { useRef, useEffect, useState } from 'react';
+import React, { Suspense, useRef, useEffect, useState } from 'react';
 import { Canvas } from '@react-three/fiber';
 import { OrbitControls, useGLTF } from '@react-three/drei';
 import * as THREE from 'three';
 import './ModelViewer.css';
 
-function Model({ productId, metadata, optimizationResult, isAnimating, currentStep }) {
-  const modelUrl = process.env.REACT_APP_API_URL
+function Model({ productId, lod, metadata, optimizationResult, isAnimating, currentStep }) {
+  const baseUrl = process.env.REACT_APP_API_URL
     ? `${process.env.REACT_APP_API_URL}/products/${productId}/model`
     : `http://localhost:5000/api/products/${productId}/model`;
+  const modelUrl = lod ? `${baseUrl}?lod=${lod}` : baseUrl;
   const { scene } = useGLTF(modelUrl);
   const groupRef = useRef();
   const [highlightedParts, setHighlightedParts] = useState(new Set());
@@ -201,19 +202,37 @@ function Model({ productId, metadata, optimizationResult, isAnimating, currentSt
 const ModelViewer = ({ productId, metadata, optimizationResult, isAnimating, currentStep }) => {
   if (!productId) return <div className="model-viewer-placeholder">Select a product to view 3D model</div>;
 
+  const hasLowLod = Boolean(metadata && metadata.model_lods && metadata.model_lods.includes('low'));
+
   return (
     <div className="model-viewer">
       <Canvas camera={{ position: [5, 5, 5], fov: 50 }}>
         <ambientLight intensity={0.5} />
         <directionalLight position={[10, 10, 5]} intensity={1} />
         <pointLight position={[-10, -10, -5]} intensity={0.5} />
-        <Model
-          productId={productId}
-          metadata={metadata}
-          optimizationResult={optimizationResult}
-          isAnimating={isAnimating}
-          currentStep={currentStep}
-        />
+        {/* Show the coarse level of detail, if it was built, while the full model loads */}
+        <Suspense
+          fallback={
+            hasLowLod ? (
+              <Model
+                productId={productId}
+                lod="low"
+                metadata={metadata}
+                optimizationResult={optimizationResult}
+                isAnimating={isAnimating}
+                currentStep={currentStep}
+              />
+            ) : null
+          }
+        >
+          <Model
+            productId={productId}
+            metadata={metadata}
+            optimizationResult={optimizationResult}
+            isAnimating={isAnimating}
+            currentStep={currentStep}
+          />
+        </Suspense>
         <OrbitControls enableDamping dampingFactor={0.05} />
         <gridHelper args={[10, 10]} />
       </Canvas>
@@ -29,13 +29,84 @@ export const optimizeDisassembly = async (productId, data) => {
   return response.data;
 };
 
+export const submitOptimizationJob = async (productId, data) => {
+  const response = await api.post(`/products/${productId}/optimize/jobs`, data);
+  return response.data;
+};
+
+export const getOptimizationJob = async (jobId) => {
+  const response = await api.get(`/jobs/${jobId}`);
+  return response.data;
+};
+
+export const cancelOptimizationJob = async (jobId) => {
+  const response = await api.delete(`/jobs/${jobId}`);
+  return response.data;
+};
+
+// Subscribe to a job's per-generation progress; returns a function that closes the stream.
+// The server ends long streams periodically; the browser reconnects and resumes from the last event.
+export const streamOptimizationJob = (jobId, { onProgress, onDone, onError } = {}) => {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+  source.addEventListener('progress', (event) => {
+    if (onProgress) onProgress(JSON.parse(event.data));
+  });
+  source.addEventListener('done', (event) => {
+    source.close();
+    if (onDone) onDone(JSON.parse(event.data));
+  });
+  source.onerror = (error) => {
+    // CONNECTING: the stream ended and the browser is reconnecting
+    if (source.readyState === EventSource.CONNECTING) return;
+    source.close();
+    if (onError) onError(error);
+  };
+  return () => source.close();
+};
+
+// scenarios: [{ target, parameters, component_properties }]; results come back in the same order
+export const optimizeBatch = async (productId, scenarios, { parallel = false, workers = 1 } = {}) => {
+  const response = await api.post(`/products/${productId}/optimize/batch`, { scenarios, parallel, workers });
+  return response.data;
+};
+
+// factors: [{ key, property, values }]; options: { parameters, component_properties, mode, samples, seed, workers }
+export const runSensitivitySweep = async (productId, target, factors, options = {}) => {
+  const response = await api.post(`/products/${productId}/sensitivity`, { target, factors, ...options });
+  return response.data;
+};
+
+// Part name -> node/mesh/accessors/bytes/bbox for a product's GLB
+export const getModelPartIndex = async (productId) => {
+  const response = await api.get(`/products/${productId}/model/parts`);
+  return response.data;
+};
+
+// URL of a GLB holding only the given parts, e.g. an optimisation result's sequence
+export const getModelSubsetUrl = (productId, parts) => {
+  const query = parts.map((part) => `part=${encodeURIComponent(part)}`).join('&');
+  return `${API_BASE_URL}/products/${productId}/model/subset?${query}`;
+};
+
 export const getProductParts = async (productId) => {
   const response = await api.get(`/products/${productId}/parts`);
   return response.data;
 };
 
-export const getDisassemblyPaths = async (productId, targetPart) => {
-  const response = await api.get(`/products/${productId}/paths/${targetPart}`);
+// Components/edges on some path to the target plus the path count, without listing paths
+export const getInvolvedComponents = async (productId, targetPart) => {
+  const response = await api.get(`/products/${productId}/involved/${targetPart}`);
+  return response.data;
+};
+
+// Cheapest paths first (under the given weights, default the product's own);
+// pass the previous response's next_cursor to page on
+export const getDisassemblyPaths = async (productId, targetPart,
+  { limit, cursor, parameters, componentProperties } = {}) => {
+  const params = { limit, cursor };
+  if (parameters) params.parameters = JSON.stringify(parameters);
+  if (componentProperties) params.component_properties = JSON.stringify(componentProperties);
+  const response = await api.get(`/products/${productId}/paths/${targetPart}`, { params });
   return response.data;
 };
 
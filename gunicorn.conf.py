@@ -0,0 +1,28 @@
+"""
+Gunicorn settings, read from the working directory (the Procfile runs
+gunicorn from the repository root).
+
+The app is imported once in the master (preload_app) with WARM_START=preload,
+so product graphs, metadata and the algorithm modules are built before the
+workers fork and shared copy-on-write. No Neo4j connection is opened
+before the fork; each worker connects on first use.
+"""
+import os
+import gc
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Workers default to $WEB_CONCURRENCY (gunicorn's own default)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+if preload_app:
+    os.environ.setdefault('WARM_START', 'preload')
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is warm and before any
+    # worker forks: move everything built so far out of the collector's
+    # generations, so collections in the workers don't touch (and copy)
+    # those pages
+    gc.freeze()